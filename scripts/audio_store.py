@@ -0,0 +1,212 @@
+"""
+Content-addressed store for downloaded Macaulay Library audio.
+
+Files are kept under objects/<sha256[:2]>/<sha256>.<ext> and indexed by
+Macaulay asset id in index.json, so an asset referenced from several regions
+(or by several URLs) is fetched and stored once. Interrupted downloads are
+kept under partial/ with the response's ETag (or Last-Modified) and resumed
+with a Range + If-Range request, so a file that changed on the server since is
+fetched again from the start instead of being spliced onto the old bytes.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+ASSET_ID_PATTERN = re.compile(r'/asset/(\d+)(?:/(\w+))?')
+CHUNK_SIZE = 64 * 1024
+
+
+def asset_id_for(url: str) -> str:
+    """Return the Macaulay asset id for a CDN URL, or a hash of the URL for anything else."""
+    match = ASSET_ID_PATTERN.search(url)
+    if match:
+        return match.group(1)
+    return 'url-' + hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]
+
+
+def collect_urls(birds_data: Dict[str, List[Dict[str, Any]]], regions: Optional[Iterable[str]] = None,
+                 by_asset: bool = False) -> List[str]:
+    """
+    Return the unique audio URLs in birds.json data, in file order, optionally
+    limited to some region keys. With by_asset, only the first URL of each
+    Macaulay asset is kept.
+    """
+    regions = set(regions) if regions else None
+    urls: Dict[str, str] = {}
+    for region, birds in birds_data.items():
+        if regions and region not in regions:
+            continue
+        for bird in birds:
+            for url in bird.get('audioUrl', []):
+                urls.setdefault(asset_id_for(url) if by_asset else url, url)
+    return list(urls.values())
+
+
+def response_validator(headers) -> Optional[str]:
+    """The validator If-Range can use for a response: a strong ETag, else Last-Modified."""
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):  # If-Range only accepts strong ETags
+        return etag
+    return headers.get('Last-Modified')
+
+
+def unsatisfiable_length(headers) -> Optional[int]:
+    """The full length from a 416 reply's "Content-Range: bytes */N", or None."""
+    match = re.fullmatch(r'bytes \*/(\d+)', headers.get('Content-Range', '').strip())
+    return int(match.group(1)) if match else None
+
+
+def extension_for(url: str) -> str:
+    """Guess a file extension from the format segment after the asset id (e.g. .../asset/123/mp3)."""
+    match = ASSET_ID_PATTERN.search(url)
+    if match and match.group(2):
+        return match.group(2)
+    return 'bin'
+
+
+class HostSessionPool:
+    """One pooled requests session per host, shared by all worker threads."""
+
+    def __init__(self, per_host: int = 8):
+        self.per_host = per_host
+        self.sessions: Dict[str, requests.Session] = {}
+        self.lock = threading.Lock()
+
+    def get(self, url: str) -> requests.Session:
+        host = urlparse(url).netloc
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.per_host, pool_block=True)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self.sessions[host] = session
+            return session
+
+    def close(self) -> None:
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+
+
+class AudioStore:
+    """Content-addressed audio store with an asset-id index."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.index_path = os.path.join(root, 'index.json')
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(root, 'partial'), exist_ok=True)
+        self.assets: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.assets = json.load(f).get('assets', {})
+
+    def get(self, asset_id: str) -> Optional[Dict[str, Any]]:
+        """Return the index entry for an asset if its object is present on disk."""
+        with self.lock:
+            entry = self.assets.get(asset_id)
+        if entry and os.path.exists(self.object_path(entry['sha256'], entry['ext'])):
+            return entry
+        return None
+
+    def object_path(self, sha256: str, ext: str) -> str:
+        return os.path.join(self.root, 'objects', sha256[:2], f'{sha256}.{ext}')
+
+    def partial_path(self, asset_id: str) -> str:
+        return os.path.join(self.root, 'partial', f'{asset_id}.part')
+
+    def validator_path(self, asset_id: str) -> str:
+        return os.path.join(self.root, 'partial', f'{asset_id}.validator')
+
+    def download(self, session: requests.Session, url: str, timeout: float = 60) -> Dict[str, Any]:
+        """
+        Stream a URL into the store, resuming a partial file if one exists.
+        Returns the index entry for the asset.
+        """
+        asset_id = asset_id_for(url)
+        existing = self.get(asset_id)
+        if existing:
+            return existing
+
+        partial = self.partial_path(asset_id)
+        validator_file = self.validator_path(asset_id)
+        offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+        validator = None
+        if offset and os.path.exists(validator_file):
+            with open(validator_file, 'r', encoding='utf-8') as f:
+                validator = f.read().strip() or None
+        if not validator:
+            offset = 0  # Without a validator the partial bytes can't be trusted to match
+        headers = {'Range': f'bytes={offset}-', 'If-Range': validator} if offset else {}
+
+        response = session.get(url, headers=headers, stream=True, timeout=timeout)
+        if response.status_code == 416 and offset:
+            response.close()
+            if unsatisfiable_length(response.headers) != offset:
+                # Servers that ignore If-Range also answer 416 when the asset shrank or was replaced
+                os.remove(partial)
+                if os.path.exists(validator_file):
+                    os.remove(validator_file)
+                offset = 0
+                response = session.get(url, stream=True, timeout=timeout)
+        complete = response.status_code == 416 and offset  # The partial file already holds the whole body
+
+        with response:
+            if not complete:
+                response.raise_for_status()
+                if offset and response.status_code != 206:
+                    offset = 0  # The file changed (or Range was ignored), start over
+                if not offset:
+                    validator = response_validator(response.headers)
+                    if validator:
+                        with open(validator_file, 'w', encoding='utf-8') as f:
+                            f.write(validator)
+                    elif os.path.exists(validator_file):
+                        os.remove(validator_file)
+                with open(partial, 'ab' if offset else 'wb') as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+            content_type = response.headers.get('Content-Type', '')
+
+        digest = hashlib.sha256()
+        with open(partial, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+        ext = extension_for(url)
+        size = os.path.getsize(partial)
+
+        target = self.object_path(sha256, ext)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.exists(target):
+            os.remove(partial)  # Identical content already stored under another asset
+        else:
+            os.replace(partial, target)
+        if os.path.exists(validator_file):
+            os.remove(validator_file)
+
+        entry = {'url': url, 'sha256': sha256, 'ext': ext, 'bytes': size, 'contentType': content_type}
+        with self.lock:
+            self.assets[asset_id] = entry
+        return entry
+
+    def save(self) -> None:
+        """Atomically write the asset index."""
+        with self.lock:
+            data = {'assets': dict(sorted(self.assets.items()))}
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.index_path)
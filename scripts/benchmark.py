@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Pipeline benchmarks on synthetic data.
+
+Synthesizes taxonomy, URL lists, region species lists, subregion observations
+and multi-year history at a configurable scale, then times the core functions
+of ebird-filter-region.py, game-data-generator.py, generate-daily-birds.py and
+the subregion fetch in generate-daily-region-data.py (against a local
+ebird-stub-server.py). Each case records wall time over --repeat runs and the
+peak Python heap (tracemalloc) of one extra run. Results are written as JSON,
+and --compare prints the ratio against an earlier results file.
+
+Usage:
+    python benchmark.py --scale small
+    python benchmark.py --scale production --output bench-results.json
+    python benchmark.py --scale medium --only daily --compare bench-results.json
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+SCALES = {
+    'small': {'species': 1000, 'regions': 5, 'subregions': 20, 'years': 1, 'urls_per_species': 5},
+    'medium': {'species': 5000, 'regions': 25, 'subregions': 60, 'years': 2, 'urls_per_species': 8},
+    'production': {'species': 10000, 'regions': 100, 'subregions': 200, 'years': 5, 'urls_per_species': 10},
+}
+AUDIO_PREFIX = 'https://cdn.download.ams.birds.cornell.edu/api/v2/asset/'
+
+
+def load_script(filename: str):
+    """Import a hyphenated pipeline script as a module."""
+    name = filename.replace('-', '_').removesuffix('.py')
+    spec = importlib.util.spec_from_file_location(name, SCRIPTS_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# -- synthetic data ----------------------------------------------------------
+class SyntheticData:
+    def __init__(self, species: int, regions: int, subregions: int, years: int, urls_per_species: int, seed: int = 0):
+        rng = random.Random(seed)
+        self.taxonomy = [
+            {
+                'sciName': f'Genus{position // 20} species{position}',
+                'comName': f'Synthetic Bird {position}',
+                'speciesCode': f'syn{position:05d}',
+                'category': 'hybrid' if position % 25 == 0 else 'species',
+                'taxonOrder': float(position),
+                'bandingCodes': [],
+                'comNameCodes': [f'SB{position:04d}'],
+                'sciNameCodes': [f'GS{position:04d}'],
+                'order': f'Order{position // 500}',
+                'familyCode': f'fam{position // 100}',
+                'familyComName': f'Family {position // 100}',
+                'familySciName': f'Familidae{position // 100}',
+            }
+            for position in range(species)
+        ]
+        codes = [record['speciesCode'] for record in self.taxonomy]
+
+        # Each region lists a random 30% of the taxonomy
+        self.region_ids = [f'r{position:03d}' for position in range(regions)]
+        self.region_species = {region: sorted(rng.sample(codes, max(1, species * 3 // 10))) for region in self.region_ids}
+
+        # URL records in scrape order (species by species), with a few failed pages
+        self.url_records = []
+        asset = 100000000
+        for code in codes:
+            for _ in range(rng.randint(1, urls_per_species)):
+                asset += 1
+                audio_url = '' if rng.random() < 0.01 else f'{AUDIO_PREFIX}{asset}/mp3'
+                self.url_records.append({'code': code, 'page Url': f'https://macaulaylibrary.org/asset/{asset}', 'audio Url': audio_url})
+
+        # birds.json-shaped region lists built from the above
+        by_code = {record['speciesCode']: record for record in self.taxonomy}
+        urls = {}
+        for record in self.url_records:
+            if record['audio Url']:
+                urls.setdefault(record['code'], []).append(record['audio Url'])
+        self.birds = {
+            region: [
+                {'id': code, 'name': by_code[code]['comName'], 'scientificName': by_code[code]['sciName'],
+                 'order': by_code[code]['order'], 'family': by_code[code]['familySciName'], 'audioUrl': urls[code]}
+                for code in region_codes if code in urls
+            ]
+            for region, region_codes in self.region_species.items()
+        }
+
+        # Each subregion observes a random 15% of its region's birds
+        self.subregions = {
+            region: {
+                f'{region}-sub{position:03d}': [{'id': bird['id']} for bird in rng.sample(birds, max(1, len(birds) * 15 // 100))]
+                for position in range(subregions)
+            }
+            for region, birds in self.birds.items()
+        }
+
+        # One answer per region per day for `years` years before the benchmark date
+        self.today = date(2030, 1, 1)
+        self.history = {
+            region: [
+                {'date': (self.today - timedelta(days=offset)).isoformat(), 'id': rng.choice(birds)['id'], 'name': 'x'}
+                for offset in range(years * 365, 0, -1)
+            ]
+            for region, birds in self.birds.items()
+        }
+
+    def write_inputs(self, directory: Path) -> Dict[str, Any]:
+        """Write the file inputs the scripts read; returns their paths."""
+        taxonomy_csv = directory / 'ebird-taxonomy.csv'
+        with open(taxonomy_csv, 'w', encoding='utf-8', newline='') as f:
+            f.write('SCIENTIFIC_NAME,COMMON_NAME,SPECIES_CODE,CATEGORY,TAXON_ORDER,COM_NAME_CODES,SCI_NAME_CODES,'
+                    'BANDING_CODES,ORDER,FAMILY_COM_NAME,FAMILY_SCI_NAME,REPORT_AS,EXTINCT,EXTINCT_YEAR,FAMILY_CODE\n')
+            for record in self.taxonomy:
+                f.write(f"{record['sciName']},{record['comName']},{record['speciesCode']},{record['category']},"
+                        f"{record['taxonOrder']},{record['comNameCodes'][0]},{record['sciNameCodes'][0]},,"
+                        f"{record['order']},{record['familyComName']},{record['familySciName']},,,,{record['familyCode']}\n")
+        taxonomy_json = directory / 'ebird-taxonomy.json'
+        with open(taxonomy_json, 'w', encoding='utf-8') as f:
+            json.dump(self.taxonomy, f, indent=2)
+        region_files = []
+        for region, codes in self.region_species.items():
+            region_file = directory / f'{region}.json'
+            with open(region_file, 'w', encoding='utf-8') as f:
+                json.dump(codes, f)
+            region_files.append(region_file)
+        urls_jsonl = directory / 'synthetic-urls.jsonl'
+        with open(urls_jsonl, 'w', encoding='utf-8') as f:
+            for record in self.url_records:
+                f.write(json.dumps(record) + '\n')
+        subregion_file = directory / 'synthetic-subregions.json'
+        with open(subregion_file, 'w', encoding='utf-8') as f:
+            json.dump([{'code': f'XX-{position:03d}', 'name': f'Sub {position}'}
+                       for position in range(len(next(iter(self.subregions.values()), {})))], f)
+        return {'taxonomy_csv': taxonomy_csv, 'taxonomy_json': taxonomy_json, 'region_files': region_files,
+                'urls_jsonl': urls_jsonl, 'subregion_file': subregion_file}
+
+
+# -- measurement -------------------------------------------------------------
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Time func `repeat` times (output silenced), then trace one more run for peak heap."""
+    timings = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'seconds': timings,
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'peakBytes': peak,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def stub_server(species_per_region: int):
+    """Run ebird-stub-server.py on a free local port for the duration of the block."""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, str(SCRIPTS_DIR / 'ebird-stub-server.py'), '--port', str(port),
+         '--species-per-region', str(species_per_region)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError('ebird-stub-server.py did not start')
+                time.sleep(0.05)
+        yield f'http://127.0.0.1:{port}/v2'
+    finally:
+        process.terminate()
+        process.wait()
+
+
+# -- cases -------------------------------------------------------------------
+def build_cases(data: SyntheticData, inputs: Dict[str, Any], workdir: Path) -> Dict[str, Callable[[], Any]]:
+    filter_region = load_script('ebird-filter-region.py')
+    game_data = load_script('game-data-generator.py')
+    daily = load_script('generate-daily-birds.py')
+    from daily_history import HistoryIndex, to_ordinal
+    from pipeline_store import iter_url_file
+    from daily_selection import SelectionEngine
+    from subregion_presence import SubregionPresence
+
+    first_region = data.region_ids[0]
+    region_birds = data.birds[first_region]
+    url_groups = game_data.group_urls_by_code(data.url_records)
+    region_taxonomy = [record for record in data.taxonomy if record['speciesCode'] in set(data.region_species[first_region])]
+    history = HistoryIndex(json.loads(json.dumps(data.history)))
+    subregion_names = list(data.subregions[first_region])
+    presence = SubregionPresence(data.subregions[first_region], [bird['id'] for bird in region_birds])
+    regions = [{'id': region, 'name': region} for region in data.region_ids]
+
+    def generate_month():
+        # 30 days for every region on a copy of the history
+        month_history = HistoryIndex(json.loads(json.dumps(data.history)))
+        presence_cache = {}
+        engine = SelectionEngine()
+        for offset in range(30):
+            daily.generate_daily_entries(regions, data.birds, data.subregions, month_history,
+                                         data.today + timedelta(days=offset), 60, presence_cache, engine)
+
+    uniform = SelectionEngine().selector(first_region, region_birds, presence, data.subregions[first_region])
+    weighted = SelectionEngine(['frequency', 'audio'], family_days=7).selector(
+        first_region, region_birds, presence, data.subregions[first_region])
+
+    return {
+        'filter.csv_all_regions': lambda: filter_region.filter_taxonomies(
+            inputs['region_files'], inputs['taxonomy_csv'], exclude_hybrids=True),
+        'filter.json_all_regions': lambda: filter_region.filter_taxonomies(
+            inputs['region_files'], inputs['taxonomy_json'], exclude_hybrids=True),
+        'pipeline_store.iter_url_file': lambda: sum(1 for _ in iter_url_file(str(inputs['urls_jsonl']))),
+        'game_data.group_urls_by_code': lambda: game_data.group_urls_by_code(data.url_records),
+        'game_data.process_taxonomy_data': lambda: game_data.process_taxonomy_data(region_taxonomy, url_groups),
+        'game_data.build_region_hash_indexes': lambda: game_data.build_region_hash_indexes(data.birds),
+        'game_data.write_regions_json': lambda: game_data.write_regions_json(
+            data.birds.items(), str(workdir / 'birds.json')),
+        'daily.history_index_load': lambda: HistoryIndex(json.loads(json.dumps(data.history))),
+        'daily.get_recent_answers_x1000': lambda: [
+            'syn00001' in daily.get_recent_answers(history, first_region, 60, data.today - timedelta(days=offset))
+            for offset in range(1000)
+        ],
+        'daily.uniform_select_x100': lambda: [
+            uniform.select(history.region(first_region), to_ordinal(data.today), 60, 0, subregion_names[0])
+            for _ in range(100)
+        ],
+        'daily.weighted_select_x100': lambda: [
+            weighted.select(history.region(first_region), to_ordinal(data.today), 60, 7, subregion_names[0])
+            for _ in range(100)
+        ],
+        'daily.subregion_presence_build': lambda: SubregionPresence(
+            data.subregions[first_region], [bird['id'] for bird in region_birds]),
+        'daily.generate_daily_entries_30d': generate_month,
+    }
+
+
+def http_cases(data: SyntheticData, inputs: Dict[str, Any], api_base: str) -> Dict[str, Callable[[], Any]]:
+    region_data = load_script('generate-daily-region-data.py')
+    from ebird_client import EBirdClient
+
+    subregions = region_data.load_subregions(str(inputs['subregion_file']))
+    jobs = [('xx', subregion) for subregion in subregions]
+
+    def fetch():
+        with EBirdClient(api_key='stub', api_base=api_base, pool_size=8, rate=10000, burst=10000) as client:
+            region_data.fetch_all_subregions(client, jobs, 8)
+
+    return {'region_data.fetch_all_subregions': fetch}
+
+
+def compare(results: Dict[str, Any], scale: Dict[str, int], baseline_path: str) -> None:
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline_report = json.load(f)
+    baseline = baseline_report['results']
+    print(f"\nCompared with {baseline_path} (median time, peak heap):")
+    if baseline_report['meta']['scale'] != scale:
+        print(f"  Warning: baseline scale {baseline_report['meta']['scale']} differs from this run")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        time_ratio = result['median'] / baseline[name]['median'] if baseline[name]['median'] else float('inf')
+        memory_ratio = result['peakBytes'] / baseline[name]['peakBytes'] if baseline[name]['peakBytes'] else float('inf')
+        flag = '  <-- slower' if time_ratio > 1.2 else ''
+        print(f"  {name}: {time_ratio:.2f}x time, {memory_ratio:.2f}x memory{flag}")
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPTS_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pipeline functions on synthetic data.')
+    parser.add_argument('--scale', choices=SCALES, default='small', help='Preset data size (default: small)')
+    parser.add_argument('--species', type=int, help='Override the number of taxonomy species')
+    parser.add_argument('--regions', type=int, help='Override the number of regions')
+    parser.add_argument('--subregions', type=int, help='Override the number of subregions per region')
+    parser.add_argument('--years', type=int, help='Override the years of history per region')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per case (default: 3)')
+    parser.add_argument('--only', default='', help='Only run cases whose name contains this text')
+    parser.add_argument('--no-http', action='store_true', help='Skip cases that need the local stub server')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data (default: 0)')
+    parser.add_argument('--output', default='bench-results.json', help='Results JSON path (default: bench-results.json)')
+    parser.add_argument('--compare', help='Earlier results JSON to compare against')
+    args = parser.parse_args()
+
+    scale = dict(SCALES[args.scale])
+    for key in ('species', 'regions', 'subregions', 'years'):
+        if getattr(args, key) is not None:
+            scale[key] = getattr(args, key)
+
+    print(f"Synthesizing data: {scale}")
+    start = time.perf_counter()
+    data = SyntheticData(seed=args.seed, **scale)
+    print(f"  {len(data.taxonomy)} species, {len(data.url_records)} URL records, "
+          f"{sum(len(h) for h in data.history.values())} history entries ({time.perf_counter() - start:.1f}s)")
+
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix='birdle-bench-') as tmp:
+        workdir = Path(tmp)
+        inputs = data.write_inputs(workdir)
+        cases = build_cases(data, inputs, workdir)
+
+        with contextlib.ExitStack() as stack:
+            if not args.no_http:
+                api_base = stack.enter_context(stub_server(len(data.birds[data.region_ids[0]]) * 15 // 100))
+                cases.update(http_cases(data, inputs, api_base))
+
+            for name, func in cases.items():
+                if args.only not in name:
+                    continue
+                result = measure(func, args.repeat)
+                results[name] = result
+                print(f"  {name}: median {result['median'] * 1000:.1f} ms, "
+                      f"min {result['min'] * 1000:.1f} ms, peak {result['peakBytes'] / 1e6:.1f} MB")
+
+    report = {
+        'meta': {
+            'scale': scale,
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'revision': git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    if args.compare:
+        compare(results, scale, args.compare)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Answer-hash helpers shared by the Python generators.
+
+Must stay in sync with hashString / hashBirdId in src/utils/HashUtils.jsx and
+src/utils/DailyBirdUtils.jsx: a Java-style 31x string hash over
+"<birdId>-<SECRET_SALT>", truncated to 32 bits and written as hex.
+"""
+
+from typing import Dict, List, Sequence
+
+# Salt for hashing (must match JavaScript implementation)
+SECRET_SALT = "birdle-salt-2025"
+
+MASK_32 = 0xFFFFFFFF
+
+
+def hash_bird_id(bird_id: str) -> str:
+    """
+    Hash a bird ID with the secret salt using the same algorithm as JavaScript
+    """
+    combined = f"{bird_id}-{SECRET_SALT}"
+    hash_value = 0
+
+    for char in combined:
+        hash_value = (hash_value * 31 + ord(char)) & MASK_32
+
+    # Convert to hex and take first 8 characters
+    return format(hash_value, '08x')[:8]
+
+
+def hash_bird_ids(bird_ids: Sequence[str]) -> List[str]:
+    """Hash many bird IDs in one pass, vectorized across IDs when numpy is available."""
+    # Imported here so scripts that only hash single IDs start without numpy
+    try:
+        import numpy as np
+    except ImportError:  # numpy is optional; fall back to the scalar loop
+        np = None
+    if np is None or not bird_ids:
+        return [hash_bird_id(bird_id) for bird_id in bird_ids]
+
+    lengths = np.fromiter((len(bird_id) for bird_id in bird_ids), dtype=np.int64, count=len(bird_ids))
+    width = int(lengths.max())
+    codes = np.zeros((len(bird_ids), width), dtype=np.uint32)
+    for row, bird_id in enumerate(bird_ids):
+        codes[row, :len(bird_id)] = [ord(char) for char in bird_id]
+
+    # uint32 arithmetic wraps modulo 2**32, matching the JavaScript `hash & hash`
+    hashes = np.zeros(len(bird_ids), dtype=np.uint32)
+    with np.errstate(over='ignore'):
+        for column in range(width):
+            active = column < lengths
+            hashes[active] = hashes[active] * np.uint32(31) + codes[active, column]
+        # The "-<salt>" suffix is shared by every ID
+        for char in f"-{SECRET_SALT}":
+            hashes = hashes * np.uint32(31) + np.uint32(ord(char))
+
+    return [format(int(value), '08x') for value in hashes]
+
+
+class HashCollisionError(ValueError):
+    """Raised when two birds in one region share an answer hash."""
+
+
+def build_hash_index(bird_ids: Sequence[str]) -> Dict[str, int]:
+    """
+    Map answer hash -> position in bird_ids.
+    Raises HashCollisionError if two different IDs share a hash.
+    """
+    index: Dict[str, int] = {}
+    collisions = []
+    for position, bird_hash in enumerate(hash_bird_ids(bird_ids)):
+        if bird_hash in index and bird_ids[index[bird_hash]] != bird_ids[position]:
+            collisions.append(f"{bird_ids[index[bird_hash]]} / {bird_ids[position]} -> {bird_hash}")
+            continue
+        index.setdefault(bird_hash, position)
+
+    if collisions:
+        raise HashCollisionError("Answer hash collisions: " + ", ".join(collisions))
+    return index
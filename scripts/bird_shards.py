@@ -0,0 +1,165 @@
+"""
+Sharded client output for birds.json.
+
+Writes one compact file per region (and optionally a separate audio URL file
+per region) under a shard directory, named by content hash so they can be
+served with long-lived cache headers, plus a small manifest.json that points
+at the current shards:
+
+    {"version": 1,
+     "urlPrefixes": ["https://cdn.download.ams.birds.cornell.edu/api/v2/asset/"],
+     "regions": {"us": {"birds": "us.0123456789ab.json", "audio": "us-audio.ba9876543210.json", "count": 704}}}
+
+A region shard is {"birds": [...], "hashIndex": {...}, "distractors": {...}},
+with the distractor table from distractors.py when one is given. Audio URLs
+that start with one of the manifest's urlPrefixes are stored as
+"<prefix index>:<rest>"; with split audio, bird entries carry no audioUrl and
+the audio shard maps {id: [urls]}. Must stay in sync with src/utils/LoadGameData.jsx.
+
+Every shard gets .gz (and .br, when the brotli package is installed) siblings
+for hosts that serve precompressed files.
+
+The client loads shards whenever the manifest exists, so tools that rewrite
+birds.json call shard_options() to keep a <output dir>/birds shard set in step
+even without --shard-dir, and rewrite the hash index and distractor tables at
+hash_index_path() / distractors_path() next to it.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; only .gz siblings are written without it
+    brotli = None
+
+SHARD_VERSION = 1
+DEFAULT_URL_PREFIXES = ['https://cdn.download.ams.birds.cornell.edu/api/v2/asset/']
+SHARD_NAME_PATTERN = re.compile(r'^[a-z0-9_-]+\.[0-9a-f]{12}\.json(\.gz|\.br)?$')
+
+
+def encode_url(url: str, prefixes: Sequence[str]) -> str:
+    for position, prefix in enumerate(prefixes):
+        if url.startswith(prefix):
+            return f"{position}:{url[len(prefix):]}"
+    return url
+
+
+def decode_url(value: str, prefixes: Sequence[str]) -> str:
+    match = re.match(r'^(\d+):', value)
+    return prefixes[int(match.group(1))] + value[match.end():] if match else value
+
+
+def compact_json_bytes(data: Any) -> bytes:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def write_shard(shard_dir: str, stem: str, data: Any) -> Dict[str, Any]:
+    """Write <stem>.<hash>.json plus compressed siblings; returns its name and sizes."""
+    body = compact_json_bytes(data)
+    name = f"{stem}.{hashlib.sha256(body).hexdigest()[:12]}.json"
+    variants = {name: body, name + '.gz': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[name + '.br'] = brotli.compress(body, quality=11)
+
+    for variant, payload in variants.items():
+        path = os.path.join(shard_dir, variant)
+        if not os.path.exists(path):  # content-addressed, so an existing file is already correct
+            with open(path, 'wb') as f:
+                f.write(payload)
+    return {'name': name, 'bytes': {variant[len(name):] or 'raw': len(payload) for variant, payload in variants.items()}}
+
+
+def write_shards(output_data: Dict[str, List[Dict[str, Any]]], hash_indexes: Dict[str, Dict[str, int]],
+                 shard_dir: str, split_audio: bool = False,
+                 url_prefixes: Sequence[str] = DEFAULT_URL_PREFIXES,
+                 distractor_tables: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Write every region's shards and manifest.json, removing shards no longer referenced."""
+    os.makedirs(shard_dir, exist_ok=True)
+    url_prefixes = list(url_prefixes)
+    manifest = {'version': SHARD_VERSION, 'urlPrefixes': url_prefixes, 'regions': {}}
+    keep = set()
+
+    for region_key, birds in output_data.items():
+        entries = []
+        audio = {}
+        for bird in birds:
+            urls = [encode_url(url, url_prefixes) for url in bird.get('audioUrl', [])]
+            entry = {key: value for key, value in bird.items() if key != 'audioUrl'}
+            if split_audio:
+                audio[bird['id']] = urls
+            else:
+                entry['audioUrl'] = urls
+            entries.append(entry)
+
+        shard = {'birds': entries, 'hashIndex': hash_indexes.get(region_key, {})}
+        if distractor_tables and region_key in distractor_tables:
+            shard['distractors'] = distractor_tables[region_key]
+        written = write_shard(shard_dir, region_key, shard)
+        region = {'birds': written['name'], 'count': len(birds), 'bytes': {'birds': written['bytes']}}
+        if split_audio:
+            written = write_shard(shard_dir, f"{region_key}-audio", audio)
+            region['audio'] = written['name']
+            region['bytes']['audio'] = written['bytes']
+        manifest['regions'][region_key] = region
+        keep.update(name for name in (region['birds'], region.get('audio')) if name)
+
+    # The manifest is the only mutable file; swap it in after its shards exist
+    manifest_path = os.path.join(shard_dir, 'manifest.json')
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(compact_json_bytes(manifest))
+    os.replace(tmp_path, manifest_path)
+
+    for name in os.listdir(shard_dir):
+        if SHARD_NAME_PATTERN.match(name) and re.sub(r'\.(gz|br)$', '', name) not in keep:
+            os.remove(os.path.join(shard_dir, name))
+    return manifest
+
+
+def default_shard_dir(output_path: str) -> str:
+    """The shard directory the client reads for an output file (public/data/birds.json -> public/data/birds)."""
+    return os.path.join(os.path.dirname(output_path) or '.', 'birds')
+
+
+def hash_index_path(output_path: str) -> str:
+    """Path of the hash index written next to the output file (birds.json -> birds-hash-index.json)."""
+    root, ext = os.path.splitext(output_path)
+    return f"{root}-hash-index{ext or '.json'}"
+
+
+def distractors_path(output_path: str) -> str:
+    """Path of the distractor tables written next to the output file (birds.json -> birds-distractors.json)."""
+    root, ext = os.path.splitext(output_path)
+    return f"{root}-distractors{ext or '.json'}"
+
+
+def load_manifest(shard_dir: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(shard_dir, 'manifest.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def shard_options(output_path: str, shard_dir: Optional[str] = None, split_audio: bool = False,
+                  url_prefixes: Sequence[str] = DEFAULT_URL_PREFIXES) -> Tuple[Optional[str], bool, List[str]]:
+    """
+    Where and how to write shards for an output file. Without an explicit
+    shard_dir, an existing manifest next to the output is updated in place,
+    keeping its audio split and URL prefixes. Returns (shard dir or None,
+    split_audio, url_prefixes).
+    """
+    url_prefixes = list(url_prefixes)
+    if shard_dir:
+        return shard_dir, split_audio, url_prefixes
+    shard_dir = default_shard_dir(output_path)
+    existing = load_manifest(shard_dir)
+    if existing is None:
+        return None, split_audio, url_prefixes
+    split_audio = split_audio or any('audio' in region for region in existing.get('regions', {}).values())
+    return shard_dir, split_audio, list(dict.fromkeys(existing.get('urlPrefixes', []) + url_prefixes))
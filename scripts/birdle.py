@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Birdle pipeline CLI
+
+One entry point for the pipeline scripts. Each subcommand runs the matching
+script in this directory as __main__, so only that script's imports are
+loaded: `birdle daily` never imports requests, selenium or bs4. The scripts
+also keep working when run directly.
+
+Usage:
+    python scripts/birdle.py daily --days 60 --subregions public/data/daily-subregion-birds.json
+    python scripts/birdle.py build --help
+    python scripts/birdle.py import-times  # check each subcommand against its import budget
+"""
+
+import argparse
+import os
+import runpy
+import statistics
+import subprocess
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# name: (script, summary, import budget in ms). Budgets are about 2.5x the median of
+# several import-times runs, so machine noise passes and a heavy new import does not
+COMMANDS = {
+    'taxonomy': ('ebird-taxonomy.py', 'Download the eBird taxonomy', 250),
+    'region': ('ebird-region.py', 'Download a region species list', 250),
+    'subregions': ('ebird-generate-subregions.py', 'Download a region subregion list', 250),
+    'filter': ('ebird-filter-region.py', 'Filter the taxonomy down to region species lists', 40),
+    'scrape': ('ebird-songdownload.py', 'Scrape Macaulay Library audio URLs per species', 100),
+    'build': ('game-data-generator.py', 'Build birds.json, hash indexes and client shards', 100),
+    'daily': ('generate-daily-birds.py', 'Pick the daily birds and update history', 50),
+    'observations': ('generate-daily-region-data.py', 'Fetch recent observations per subregion', 300),
+    'download-audio': ('download-audio.py', 'Mirror birds.json audio into a local store', 300),
+    'transcode-audio': ('transcode-audio.py', 'Cut stored audio into short clips', 300),
+    'check-urls': ('check-audio-urls.py', 'Probe birds.json audio URLs and prune dead ones', 300),
+    'store': ('pipeline_store.py', 'Import into and export from the SQLite pipeline store', 40),
+    'simulate': ('simulate-schedules.py', 'Monte Carlo daily schedules to tune the no-repeat windows', 250),
+    'benchmark': ('benchmark.py', 'Time the pipeline on synthetic data', 150),
+    'stub-server': ('ebird-stub-server.py', 'Serve fake eBird API responses for offline runs', 100),
+}
+
+# Loads a script the way runpy does, minus running main(), and prints the milliseconds taken
+IMPORT_PROBE = '''
+import importlib.util, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location('probe', sys.argv[1])
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+print((time.perf_counter() - start) * 1000)
+'''
+
+
+def run_command(name, argv):
+    """Run a subcommand's script as __main__ with argv as its arguments."""
+    script = os.path.join(SCRIPTS_DIR, COMMANDS[name][0])
+    sys.argv = [script] + list(argv)
+    runpy.run_path(script, run_name='__main__')
+
+
+def measure_import(script, repeat):
+    """Median time in ms to import a script in a fresh interpreter, over repeat runs."""
+    timings = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-c', IMPORT_PROBE, script], cwd=SCRIPTS_DIR,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'import failed')
+        timings.append(float(result.stdout))
+    return statistics.median(timings)
+
+
+def import_times(argv):
+    parser = argparse.ArgumentParser(prog='birdle import-times',
+                                     description='Measure each subcommand\'s import time against its budget.')
+    parser.add_argument('commands', nargs='*', metavar='command', help='Subcommands to measure (default: all)')
+    parser.add_argument('--repeat', type=int, default=7, help='Fresh interpreters per command; the median counts (default: 7)')
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.commands if name not in COMMANDS]
+    if unknown:
+        parser.error(f"unknown command(s): {', '.join(unknown)}")
+
+    over = []
+    for name in args.commands or COMMANDS:
+        script, _, budget = COMMANDS[name]
+        try:
+            elapsed = measure_import(script, args.repeat)
+        except RuntimeError as e:
+            print(f"⚠️  {name:<16} {script}: {e}")
+            continue
+        status = '✅' if elapsed <= budget else '❌'
+        print(f"{status} {name:<16} {elapsed:6.1f} ms  (budget {budget} ms)")
+        if elapsed > budget:
+            over.append(name)
+
+    if over:
+        print(f"\n{len(over)} command(s) over their import budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+def main():
+    epilog = 'commands:\n' + '\n'.join(f'  {name:<16} {summary}' for name, (_, summary, _) in COMMANDS.items())
+    epilog += '\n  import-times     Check each command\'s import time against its budget'
+    parser = argparse.ArgumentParser(prog='birdle', description='Birdle data pipeline.', epilog=epilog,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     usage='birdle <command> [args...]')
+    parser.add_argument('command', choices=[*COMMANDS, 'import-times'], metavar='command', help=argparse.SUPPRESS)
+    parser.add_argument('args', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.command == 'import-times':
+        import_times(args.args)
+    else:
+        run_command(args.command, args.args)
+
+
+if __name__ == '__main__':
+    main()
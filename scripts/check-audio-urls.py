@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Audio URL Checker
+
+Probes every audioUrl in birds.json for liveness (see url_check.py) on a
+bounded worker pool with per-host connection limits, records each URL's
+status, Content-Length and MIME type in a status cache, and with --prune
+removes dead URLs from birds.json. URLs checked within --ttl-days are skipped.
+
+Pruning drops birds left without live audio, which shifts positions, so it
+also rewrites the hash index and distractor tables next to the output and any
+shard set there (see bird_shards.py), as game-data-generator.py would.
+
+Usage:
+    python check-audio-urls.py ./public/data/birds.json --prune
+    python check-audio-urls.py birds-local.json --status /tmp/url-status.json --ttl-days 0
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from audio_store import collect_urls
+from bird_hash import build_hash_index
+from bird_shards import DEFAULT_URL_PREFIXES, distractors_path, hash_index_path, shard_options, write_shards
+from distractors import DEFAULT_SIMILAR_COUNT, build_region_distractor_tables
+from url_check import DEFAULT_STATUS_CACHE, DEFAULT_TTL, UrlStatusCache, check_urls
+
+
+def prune_birds(birds_data, dead_urls):
+    """
+    Drop dead URLs from every bird's audioUrl list in place, and drop birds
+    left without any, since the game has nothing to play for them.
+    Returns (number of URLs removed, [(region, bird id)] dropped).
+    """
+    removed = 0
+    dropped = []
+    for region, birds in birds_data.items():
+        kept = []
+        for bird in birds:
+            urls = bird.get('audioUrl', [])
+            live = [url for url in urls if url not in dead_urls]
+            removed += len(urls) - len(live)
+            if not live:
+                dropped.append((region, bird['id']))
+                continue
+            bird['audioUrl'] = live
+            kept.append(bird)
+        birds[:] = kept
+    return removed, dropped
+
+
+def save_json(data, filepath, **options):
+    """Write JSON to filepath, swapping it in atomically."""
+    tmp_path = filepath + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, **options)
+    os.replace(tmp_path, filepath)
+
+
+def save_birds(birds_data, filepath, similar_count=DEFAULT_SIMILAR_COUNT):
+    """
+    Write birds.json in game-data-generator.py's format with its hash index,
+    distractor tables and, when a shard manifest exists, its shards.
+    Returns the shard directory that was rewritten, or None.
+    """
+    hash_indexes = {region: build_hash_index([bird['id'] for bird in birds]) for region, birds in birds_data.items()}
+    distractor_tables = build_region_distractor_tables(birds_data, similar_count)
+    save_json(birds_data, filepath, indent=2)
+    save_json(hash_indexes, hash_index_path(filepath), separators=(',', ':'))
+    save_json(distractor_tables, distractors_path(filepath), separators=(',', ':'))
+
+    shard_dir, split_audio, url_prefixes = shard_options(filepath, url_prefixes=DEFAULT_URL_PREFIXES)
+    if shard_dir:
+        write_shards(birds_data, hash_indexes, shard_dir, split_audio, url_prefixes, distractor_tables)
+    return shard_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check birds.json audio URLs and optionally prune dead ones.')
+    parser.add_argument('birds_file', help='Path to birds.json')
+    parser.add_argument('--status', default=DEFAULT_STATUS_CACHE,
+                        help=f'URL status cache (default: $BIRDLE_URL_STATUS or {DEFAULT_STATUS_CACHE})')
+    parser.add_argument('--ttl-days', type=float, default=DEFAULT_TTL / 86400,
+                        help='Re-probe URLs whose last result is older than this (default: 7)')
+    parser.add_argument('--regions', nargs='+', help='Only check these region keys (default: all)')
+    parser.add_argument('--workers', type=int, default=64, help='Concurrent probes (default: 64)')
+    parser.add_argument('--per-host', type=int, default=32, help='Maximum pooled connections per host (default: 32)')
+    parser.add_argument('--timeout', type=float, default=10, help='Per-request timeout in seconds (default: 10)')
+    parser.add_argument('--prune', action='store_true', help='Remove dead URLs from the birds file')
+    parser.add_argument('--output', help='With --prune, write the pruned birds here instead of overwriting birds_file')
+    parser.add_argument('--similar-count', type=int, default=DEFAULT_SIMILAR_COUNT,
+                        help=f'With --prune, ranked similar species per bird in the rebuilt distractor tables (default: {DEFAULT_SIMILAR_COUNT})')
+    args = parser.parse_args()
+
+    try:
+        with open(args.birds_file, 'r', encoding='utf-8') as f:
+            birds_data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"❌ Error reading {args.birds_file}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    cache = UrlStatusCache(args.status, args.ttl_days * 86400)
+    urls = collect_urls(birds_data, args.regions)
+    print(f"📊 {len(urls)} unique URLs, {sum(cache.is_fresh(url) for url in urls)} checked within {args.ttl_days:g} days")
+
+    counts = {'alive': 0, 'dead': 0, 'error': 0}
+
+    def report(url, entry):
+        counts[entry['state']] += 1
+        if entry['state'] != 'alive':
+            print(f"❌ {entry['state']} ({entry.get('status') or entry.get('error')}): {url}")
+
+    start = time.perf_counter()
+    try:
+        probed = check_urls(urls, cache, args.workers, args.per_host, args.timeout, on_result=report)
+    finally:
+        cache.save()
+    elapsed = time.perf_counter() - start
+
+    print("\n📊 Summary:")
+    print(f"   Probed: {len(probed)} in {elapsed:.1f}s ({len(probed) / elapsed if elapsed else 0:.0f}/s)")
+    print(f"   Alive: {counts['alive']}, dead: {counts['dead']}, errors: {counts['error']} (errors are retried next run)")
+    print(f"✅ Status cache saved to {args.status}")
+
+    dead_urls = {url for url in urls if (cache.get(url) or {}).get('state') == 'dead'}
+    print(f"   Dead URLs in {args.birds_file}: {len(dead_urls)}")
+    if not args.prune:
+        return
+
+    removed, dropped = prune_birds(birds_data, dead_urls)
+    output = args.output or args.birds_file
+    shard_dir = save_birds(birds_data, output, args.similar_count)
+    print(f"✅ Removed {removed} dead URL references and {len(dropped)} birds, saved to {output}")
+    print(f"   Rewrote {hash_index_path(output)}, {distractors_path(output)}"
+          + (f" and the shards in {shard_dir}" if shard_dir else ""))
+    for region, bird_id in dropped:
+        print(f"⚠️  Dropped {region}/{bird_id}: no live audio left")
+    if removed:
+        print("   Pass --dead-urls to game-data-generator.py so rebuilds skip them too")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Indexed answer history for the daily generators.
+
+history.json keeps its existing shape ({region: [{date, id, name, subregion?}]}),
+with one extra "day" field per entry holding the date's proleptic Gregorian
+ordinal. Entries that carry "day" are loaded without parsing their date string;
+older entries are parsed once on load.
+
+Each region keeps its entries sorted by ordinal plus a species -> last-seen
+ordinal map, so "was this id used in the last N days" is a dict lookup and the
+recent window is a bisect away.
+"""
+
+from bisect import bisect_right
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional
+
+
+def to_ordinal(value: date) -> int:
+    return value.toordinal()
+
+
+def entry_ordinal(entry: Dict[str, Any]) -> int:
+    day = entry.get('day')
+    if day is not None:
+        return day
+    return date.fromisoformat(entry['date']).toordinal()
+
+
+class RecentWindow:
+    """Read-only view of the ids used in a region within a sliding window of days."""
+
+    def __init__(self, region_history: 'RegionHistory', cutoff: int):
+        self.region_history = region_history
+        self.cutoff = cutoff
+
+    def __contains__(self, bird_id: str) -> bool:
+        last = self.region_history.last_seen.get(bird_id)
+        return last is not None and last > self.cutoff
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ids())
+
+    def __len__(self) -> int:
+        return len(self.ids())
+
+    def __repr__(self) -> str:
+        return repr(self.ids())
+
+    def ids(self) -> set:
+        start = bisect_right(self.region_history.ordinals, self.cutoff)
+        return {entry['id'] for entry in self.region_history.entries[start:]}
+
+
+class RegionHistory:
+    """History entries for one region, ordered by day."""
+
+    def __init__(self, entries: Optional[List[Dict[str, Any]]] = None):
+        self.entries: List[Dict[str, Any]] = []
+        self.ordinals: List[int] = []
+        self.last_seen: Dict[str, int] = {}
+        decorated = sorted(((entry_ordinal(entry), position, entry) for position, entry in enumerate(entries or [])),
+                           key=lambda item: item[:2])
+        for ordinal, _, entry in decorated:
+            entry['day'] = ordinal
+            self.entries.append(entry)
+            self.ordinals.append(ordinal)
+            if self.last_seen.get(entry['id'], ordinal) <= ordinal:
+                self.last_seen[entry['id']] = ordinal
+
+    def add(self, entry: Dict[str, Any], day: date) -> None:
+        ordinal = to_ordinal(day)
+        entry['day'] = ordinal
+        position = bisect_right(self.ordinals, ordinal)
+        self.ordinals.insert(position, ordinal)
+        self.entries.insert(position, entry)
+        if self.last_seen.get(entry['id'], ordinal) <= ordinal:
+            self.last_seen[entry['id']] = ordinal
+
+    def window(self, days: int, current_date: date) -> RecentWindow:
+        """Ids used after current_date - days (the same rule get_recent_answers always used)."""
+        return RecentWindow(self, to_ordinal(current_date) - days)
+
+    def was_used(self, bird_id: str, days: int, current_date: date) -> bool:
+        return bird_id in self.window(days, current_date)
+
+    def remove_day(self, day: date) -> None:
+        ordinal = to_ordinal(day)
+        self._rebuild([entry for entry in self.entries if entry['day'] != ordinal])
+
+    def prune(self, cutoff_date: date) -> None:
+        """Drop entries on or before cutoff_date."""
+        start = bisect_right(self.ordinals, to_ordinal(cutoff_date))
+        if start:
+            self._rebuild(self.entries[start:])
+
+    def _rebuild(self, entries: List[Dict[str, Any]]) -> None:
+        self.entries = entries
+        self.ordinals = [entry['day'] for entry in entries]
+        self.last_seen = {}
+        for entry in entries:
+            self.last_seen[entry['id']] = entry['day']
+
+
+class HistoryIndex:
+    """Per-region indexed history, loaded from and saved to the history.json shape."""
+
+    def __init__(self, data: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        self.regions: Dict[str, RegionHistory] = {
+            region: RegionHistory(entries) for region, entries in (data or {}).items()
+        }
+
+    def region(self, region_id: str) -> RegionHistory:
+        if region_id not in self.regions:
+            self.regions[region_id] = RegionHistory()
+        return self.regions[region_id]
+
+    def to_json(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {region: history.entries for region, history in self.regions.items()}
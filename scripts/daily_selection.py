@@ -0,0 +1,228 @@
+"""
+Weighted, constraint-aware selection of daily answers.
+
+Each region's birds (in birds.json order) form a fixed species index. A
+candidate pool (the whole region, or one subregion) gets a Vose alias table the
+first time it is used, built from per-species weights, so every draw after
+that is O(1) however large the pool. Pools are cached for the whole run, so a
+multi-region, multi-date batch builds each table once.
+
+Constraints are checked per draw against maintained indexes rather than by
+rebuilding filtered lists:
+- species recency: RegionHistory.last_seen (the rule get_recent_answers uses)
+- family spacing: families answered in the last K days, read from the
+  day-sorted history with one bisect
+
+A draw that breaks a constraint is rejected and redrawn. After MAX_REJECTIONS
+the pool is filtered explicitly, which costs O(pool) only for exhausted pools.
+When nothing satisfies every constraint they are relaxed in order: family
+spacing, then species recency, then the subregion.
+
+Weights multiply the factors named in weight_by:
+- frequency: 1 + the species' observation count in the pool's subregion, or
+  across all subregions for the whole region. Counts come from
+  generate-daily-region-data.py --abundance; each listing counts 1 without them.
+- audio: the number of audio clips the species has
+- difficulty: tier_weights[tier] for the species' tier from a difficulty file
+With no factors every species weighs the same, which matches random.choice.
+"""
+
+import random
+from bisect import bisect_right
+from functools import cached_property
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+WEIGHT_FACTORS = ('frequency', 'audio', 'difficulty')
+DEFAULT_TIER_WEIGHTS = {1: 3.0, 2: 2.0, 3: 1.0}
+MAX_REJECTIONS = 64
+
+
+class AliasTable:
+    """Vose's alias method: O(n) to build, O(1) per weighted draw."""
+
+    def __init__(self, items: Sequence[int], weights: Sequence[float]):
+        count = len(items)
+        total = float(sum(weights))
+        if not count or total <= 0:
+            raise ValueError("AliasTable needs at least one positive weight")
+        self.items = list(items)
+        self.probability: Optional[List[float]] = None
+        if min(weights) == max(weights):
+            return  # Uniform: a single randrange per draw, no table needed
+
+        self.probability = [0.0] * count
+        self.alias = list(range(count))
+        scaled = [weight * count / total for weight in weights]
+        small = [column for column, value in enumerate(scaled) if value < 1.0]
+        large = [column for column, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] += scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left is 1 up to rounding error
+        for column in small + large:
+            self.probability[column] = 1.0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def draw(self, rng=random) -> int:
+        column = rng.randrange(len(self.items))
+        if self.probability is None or rng.random() < self.probability[column]:
+            return self.items[column]
+        return self.items[self.alias[column]]
+
+
+class RegionSelector:
+    """Selection over one region's species index, with per-pool alias tables."""
+
+    def __init__(self, birds: List[Dict[str, Any]], presence=None, subregions: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                 weight_by: Iterable[str] = (), tiers: Optional[Dict[str, int]] = None,
+                 tier_weights: Optional[Dict[int, float]] = None, rng=random):
+        self.birds = birds
+        self.presence = presence
+        self.subregions = subregions or {}
+        self.weight_by = tuple(weight_by)
+        self.tiers = tiers or {}
+        self.tier_weights = tier_weights or DEFAULT_TIER_WEIGHTS
+        self.rng = rng
+        self.base_weights = [self.base_weight(bird) for bird in birds] if {'audio', 'difficulty'} & set(self.weight_by) else None
+        self.tables: Dict[Optional[str], Optional[AliasTable]] = {}
+        self.pool_weights: Dict[Optional[str], Tuple[List[int], List[float]]] = {}
+
+    @cached_property
+    def index(self) -> Dict[str, int]:
+        return {bird['id']: position for position, bird in enumerate(self.birds)}
+
+    @cached_property
+    def families(self) -> List[str]:
+        return [bird.get('family', '') for bird in self.birds]
+
+    def base_weight(self, bird: Dict[str, Any]) -> float:
+        weight = 1.0
+        if 'audio' in self.weight_by:
+            weight *= len(bird.get('audioUrl', []))
+        if 'difficulty' in self.weight_by:
+            weight *= self.tier_weights.get(self.tiers.get(bird['id']), 1.0)
+        return weight
+
+    def frequencies(self, subregion: Optional[str]) -> Dict[str, float]:
+        """Observation counts for one subregion, or summed over all of them."""
+        names = [subregion] if subregion else list(self.subregions)
+        counts: Dict[str, float] = {}
+        for name in names:
+            for entry in self.subregions.get(name, []):
+                counts[entry['id']] = counts.get(entry['id'], 0) + entry.get('count', 1)
+        return counts
+
+    def pool(self, subregion: Optional[str]) -> List[int]:
+        if subregion is None:
+            return list(range(len(self.birds)))
+        return self.presence.candidates(subregion).tolist()
+
+    def weights(self, pool: List[int], subregion: Optional[str]) -> List[float]:
+        if self.base_weights is None:
+            weights = [1.0] * len(pool)
+        else:
+            weights = [self.base_weights[position] for position in pool]
+        if 'frequency' in self.weight_by:
+            counts = self.frequencies(subregion)
+            weights = [weight * (1 + counts.get(self.birds[position]['id'], 0))
+                       for weight, position in zip(weights, pool)]
+        return weights
+
+    def table(self, subregion: Optional[str]) -> Optional[AliasTable]:
+        """The pool's alias table, built on first use; None when the pool has no positive weight."""
+        if subregion not in self.tables:
+            pool = self.pool(subregion)
+            weights = self.weights(pool, subregion)
+            self.pool_weights[subregion] = (pool, weights)
+            self.tables[subregion] = AliasTable(pool, weights) if sum(weights) > 0 else None
+        return self.tables[subregion]
+
+    def draw(self, subregion: Optional[str], allowed: Callable[[int], bool]) -> Optional[int]:
+        """A weighted draw from a pool among positions passing allowed, or None if none pass."""
+        table = self.table(subregion)
+        if table is None:
+            return None
+        for _ in range(MAX_REJECTIONS):
+            position = table.draw(self.rng)
+            if allowed(position):
+                return position
+        # Mostly exhausted pool: filter it once instead of rejecting forever
+        pool, weights = self.pool_weights[subregion]
+        candidates = [(position, weight) for position, weight in zip(pool, weights) if weight > 0 and allowed(position)]
+        if not candidates:
+            return None
+        positions, weights = zip(*candidates)
+        return self.rng.choices(positions, weights=weights)[0]
+
+    def select(self, region_history, target_ordinal: int, days: int, family_days: int = 0,
+               subregion: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Pick a bird for the day at target_ordinal, avoiding species used in the
+        last `days` days and families used in the last `family_days` days.
+        """
+        last_seen = region_history.last_seen
+        cutoff = target_ordinal - days
+
+        def fresh_species(position):
+            last = last_seen.get(self.birds[position]['id'])
+            return last is None or last <= cutoff
+
+        recent_families = set()
+        if family_days > 0:
+            start = bisect_right(region_history.ordinals, target_ordinal - family_days)
+            recent_families = {
+                self.families[self.index[entry['id']]]
+                for entry in region_history.entries[start:] if entry['id'] in self.index
+            }
+
+        def fresh_family_and_species(position):
+            return self.families[position] not in recent_families and fresh_species(position)
+
+        constraints = [(fresh_species, "Warning: No birds available that haven't been used recently. Using all birds.")]
+        if recent_families:
+            constraints.insert(0, (fresh_family_and_species, f"Warning: Every candidate shares a family used in the "
+                                                             f"last {family_days} days. Ignoring families."))
+
+        for pool_subregion in ([subregion, None] if subregion else [None]):
+            if self.table(pool_subregion) is None:
+                if pool_subregion is not None:
+                    print("Warning: No birds available in subregion. Using all region birds.")
+                continue
+            for allowed, relaxed in constraints:
+                position = self.draw(pool_subregion, allowed)
+                if position is not None:
+                    return self.birds[position]
+                print(relaxed)
+            return self.birds[self.table(pool_subregion).draw(self.rng)]
+        return None
+
+
+class SelectionEngine:
+    """Per-region selectors for a run, created on first use and kept across dates."""
+
+    def __init__(self, weight_by: Iterable[str] = (), family_days: int = 0,
+                 tiers: Optional[Dict[str, Dict[str, int]]] = None,
+                 tier_weights: Optional[Dict[int, float]] = None, rng=random):
+        unknown = set(weight_by) - set(WEIGHT_FACTORS)
+        if unknown:
+            raise ValueError(f"Unknown weight factor(s): {', '.join(sorted(unknown))}")
+        self.weight_by = tuple(weight_by)
+        self.family_days = family_days
+        self.tiers = tiers or {}
+        self.tier_weights = tier_weights
+        self.rng = rng
+        self.selectors: Dict[str, RegionSelector] = {}
+
+    def selector(self, region_id: str, birds: List[Dict[str, Any]], presence=None,
+                 subregions: Optional[Dict[str, List[Dict[str, Any]]]] = None) -> RegionSelector:
+        if region_id not in self.selectors:
+            self.selectors[region_id] = RegionSelector(
+                birds, presence, subregions, self.weight_by, self.tiers.get(region_id),
+                self.tier_weights, self.rng,
+            )
+        return self.selectors[region_id]
@@ -0,0 +1,101 @@
+"""
+Precomputed distractor tables for the multiple-choice rounds.
+
+game-data-generator.py writes one table per region to birds-distractors.json
+(and into each region shard) so clients pick wrong answers without scanning
+the region's bird list:
+
+    {"version": 1,
+     "families": ["Anatidae (Ducks, Geese, and Waterfowl)", ...],
+     "orders": ["Anseriformes", ...],
+     "species": {"amecro": [family id, order id, position], ...},
+     "familyMembers": [[position, ...], ...],
+     "similar": [[position, ...], ...]}
+
+Positions index the region's list in birds.json. familyMembers lists each
+family's birds in that order, which is what the clients' same-family filter
+produced. similar[position] ranks up to `count` other birds: the same family
+first, then the same order, then any other bird, each tier nearest first in
+birds.json (taxonomic) order. Must stay in sync with generateAnswerOptions in
+src/utils/GameLogic.jsx and src/utils/PracticeGameLogic.jsx.
+"""
+
+from bisect import bisect_left
+from typing import Any, Dict, List, Sequence
+
+DISTRACTOR_VERSION = 1
+DEFAULT_SIMILAR_COUNT = 8
+
+
+def nearest(positions: Sequence[int], position: int, count: int, skip=frozenset()) -> List[int]:
+    """Up to count entries of a sorted position list, nearest to position first, leaving out skip."""
+    found = []
+    right = bisect_left(positions, position)
+    left = right - 1
+    while len(found) < count and (left >= 0 or right < len(positions)):
+        if right >= len(positions) or (left >= 0 and position - positions[left] <= positions[right] - position):
+            candidate, left = positions[left], left - 1
+        else:
+            candidate, right = positions[right], right + 1
+        if candidate != position and candidate not in skip:
+            found.append(candidate)
+    return found
+
+
+def build_distractor_table(birds: List[Dict[str, Any]], count: int = DEFAULT_SIMILAR_COUNT) -> Dict[str, Any]:
+    """Build one region's distractor table from its birds.json list."""
+    families: Dict[str, int] = {}
+    orders: Dict[str, int] = {}
+    family_members: List[List[int]] = []
+    order_members: List[List[int]] = []
+    species = {}
+    for position, bird in enumerate(birds):
+        family_id = families.setdefault(bird.get('family', ''), len(families))
+        order_id = orders.setdefault(bird.get('order', ''), len(orders))
+        if family_id == len(family_members):
+            family_members.append([])
+        if order_id == len(order_members):
+            order_members.append([])
+        family_members[family_id].append(position)
+        order_members[order_id].append(position)
+        species[bird['id']] = [family_id, order_id, position]
+
+    everyone = range(len(birds))
+    similar = []
+    for family_id, order_id, position in species.values():
+        ranked = nearest(family_members[family_id], position, count)
+        if len(ranked) < count:
+            # Later tiers skip everything already ranked; the family is small here, so the sets stay tiny
+            ranked += nearest(order_members[order_id], position, count - len(ranked), set(family_members[family_id]))
+        if len(ranked) < count:
+            ranked += nearest(everyone, position, count - len(ranked), set(order_members[order_id]) | set(ranked))
+        similar.append(ranked)
+
+    return {
+        'version': DISTRACTOR_VERSION,
+        'families': list(families),
+        'orders': list(orders),
+        'species': species,
+        'familyMembers': family_members,
+        'similar': similar,
+    }
+
+
+def build_region_distractor_tables(output_data: Dict[str, List[Dict[str, Any]]],
+                                   count: int = DEFAULT_SIMILAR_COUNT) -> Dict[str, Dict[str, Any]]:
+    return {region_key: build_distractor_table(birds, count) for region_key, birds in output_data.items()}
+
+
+def distractor_candidates(table: Dict[str, Any], bird_id: str) -> List[int]:
+    """
+    Ranked wrong-answer positions for a bird, for server-side round
+    generators: every other member of its family, then the non-family part
+    of its similar list. Empty for unknown ids.
+    """
+    entry = table['species'].get(bird_id)
+    if entry is None:
+        return []
+    family_id, _, position = entry
+    family = [member for member in table['familyMembers'][family_id] if member != position]
+    family_set = set(family)
+    return family + [candidate for candidate in table['similar'][position] if candidate not in family_set]
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Audio Downloader
+
+Mirrors every audioUrl in birds.json into a local content-addressed store
+(see audio_store.py). Downloads run on a bounded worker pool with one pooled
+connection set per host, stream straight to disk, and resume partial files.
+
+Usage:
+    python download-audio.py ./public/data/birds.json --store ./audio/store --workers 16
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from audio_store import AudioStore, HostSessionPool, asset_id_for, collect_urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Download all birds.json audio into a local content-addressed store.')
+    parser.add_argument('birds_file', help='Path to birds.json')
+    parser.add_argument('--store', default='./audio/store', help='Store directory (default: ./audio/store)')
+    parser.add_argument('--regions', nargs='+', help='Only download these region keys (default: all)')
+    parser.add_argument('--workers', type=int, default=16, help='Concurrent downloads (default: 16)')
+    parser.add_argument('--per-host', type=int, default=8, help='Maximum pooled connections per host (default: 8)')
+    parser.add_argument('--save-every', type=int, default=100, help='Write the store index every N downloads (default: 100)')
+    args = parser.parse_args()
+
+    try:
+        with open(args.birds_file, 'r', encoding='utf-8') as f:
+            birds_data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"❌ Error reading {args.birds_file}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    store = AudioStore(args.store)
+    urls = collect_urls(birds_data, args.regions, by_asset=True)
+    todo = [url for url in urls if store.get(asset_id_for(url)) is None]
+    print(f"📊 {len(urls)} unique assets, {len(urls) - len(todo)} already stored, {len(todo)} to download")
+
+    sessions = HostSessionPool(args.per_host)
+    downloaded = failed = total_bytes = 0
+    start = time.perf_counter()
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = {executor.submit(store.download, sessions.get(url), url): url for url in todo}
+            for i, future in enumerate(as_completed(futures), 1):
+                url = futures[future]
+                try:
+                    entry = future.result()
+                    downloaded += 1
+                    total_bytes += entry['bytes']
+                except Exception as e:
+                    failed += 1
+                    print(f"❌ [{i}/{len(todo)}] {url}: {e}")
+                if i % args.save_every == 0:
+                    store.save()
+                    print(f"   [{i}/{len(todo)}] {total_bytes / 1e6:.1f} MB downloaded")
+    finally:
+        store.save()
+        sessions.close()
+
+    elapsed = time.perf_counter() - start
+    print("\n📊 Summary:")
+    print(f"   Downloaded: {downloaded} ({total_bytes / 1e6:.1f} MB in {elapsed:.1f}s)")
+    print(f"   Failed: {failed}")
+    print(f"✅ Store index saved to {store.index_path}")
+
+
+if __name__ == '__main__':
+    main()
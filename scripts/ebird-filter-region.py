@@ -3,51 +3,106 @@ from pathlib import Path
 import argparse
 import sys
 
-def filter_taxonomy(region_file: Path, taxonomy_file: Path, exclude_hybrids: bool = False):
+from pipeline_store import PipelineStore, TaxonomyWriter, add_store_argument, iter_taxonomy_file
+
+def output_path_for(region_file: Path) -> Path:
     # Output file name (e.g., us-taxonomy.json)
     region_name = region_file.stem  # 'us' from 'us.json'
-    output_path = region_file.parent / f"{region_name}-taxonomy.json"
+    return region_file.parent / f"{region_name}-taxonomy.json"
+
+def unique_region_files(region_files):
+    # The same region given twice (even spelled differently) would open two writers on one output
+    unique = {}
+    for region_file in region_files:
+        unique.setdefault(output_path_for(region_file).resolve(), region_file)
+    return list(unique.values())
 
+def load_region_codes(region_file: Path):
     # Load species codes for the region
     try:
         with open(region_file, 'r', encoding='utf-8') as f:
-            region_species_codes = set(json.load(f))
+            return json.load(f)
     except Exception as e:
-        print(f"❌ Error reading region file: {e}", file=sys.stderr)
+        print(f"❌ Error reading region file {region_file}: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # Load full taxonomy
+def filter_taxonomies(region_files, taxonomy_file: Path, exclude_hybrids: bool = False):
+    """
+    Filter the taxonomy for every region file in one pass over the source.
+    The .csv or .json taxonomy is streamed record by record, and each record is
+    written straight to the outputs of the regions that list its code.
+    """
+    writers = {}
+    routes = {}
+    for region_file in unique_region_files(region_files):
+        writer = writers[region_file] = TaxonomyWriter(output_path_for(region_file))
+        for code in set(load_region_codes(region_file)):
+            routes.setdefault(code, []).append(writer)
+
+    scanned = 0
     try:
-        with open(taxonomy_file, 'r', encoding='utf-8') as f:
-            full_taxonomy = json.load(f)
+        for entry in iter_taxonomy_file(str(taxonomy_file)):
+            scanned += 1
+            if exclude_hybrids and entry.get("category") == "hybrid":
+                continue
+            for writer in routes.get(entry.get("speciesCode"), ()):
+                writer.write(entry)
     except Exception as e:
+        for writer in writers.values():
+            writer.discard()
         print(f"❌ Error reading taxonomy file: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # Filter for matching species codes
-    filtered_taxonomy = [
-        entry for entry in full_taxonomy
-        if entry.get("speciesCode") in region_species_codes and
-           (not exclude_hybrids or entry.get("category") != "hybrid")
-    ]
+    for writer in writers.values():
+        writer.close()
+        print(f"✅ Filtered taxonomy saved to {writer.output_path} ({writer.count} species)")
+    print(f"Scanned {scanned} taxonomy records once for {len(writers)} region(s)")
 
-    # Save filtered taxonomy
-    try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(filtered_taxonomy, f, indent=2)
-        print(f"✅ Filtered taxonomy saved to {output_path}")
-    except Exception as e:
-        print(f"❌ Error writing output file: {e}", file=sys.stderr)
-        sys.exit(1)
+def filter_taxonomy(region_file: Path, taxonomy_file: Path, exclude_hybrids: bool = False):
+    filter_taxonomies([region_file], taxonomy_file, exclude_hybrids)
+
+def filter_taxonomy_with_store(region_files, taxonomy_file, store_path: str, exclude_hybrids: bool = False):
+    """Same output as filter_taxonomies, via indexed joins in the pipeline store."""
+    with PipelineStore(store_path) as store:
+        # The taxonomy only needs importing when it changed; otherwise the stored copy is used
+        if taxonomy_file:
+            store.upsert_taxonomy(iter_taxonomy_file(str(taxonomy_file)))
+        for region_file in unique_region_files(region_files):
+            region_name = region_file.stem
+            store.set_region_species(region_name, load_region_codes(region_file))
+            writer = TaxonomyWriter(output_path_for(region_file))
+            for entry in store.iter_taxonomy(region_name, exclude_hybrids):
+                writer.write(entry)
+            writer.close()
+            print(f"✅ Filtered taxonomy saved to {writer.output_path} ({writer.count} species)")
 
 def main():
     parser = argparse.ArgumentParser(description="Filter eBird taxonomy by region species codes.")
-    parser.add_argument("region_file", type=Path, help="Path to region JSON file (e.g. ./data/regions/us.json)")
-    parser.add_argument("taxonomy_file", type=Path, help="Path to ebird-taxonomy.json file")
+    parser.add_argument("region_files", type=Path, nargs="+", metavar="region_file",
+                        help="Path(s) to region JSON files (e.g. ./data/regions/us.json ./data/regions/ca.json), "
+                             "followed by the taxonomy file unless --taxonomy or --store is given")
+    parser.add_argument("--taxonomy", type=Path,
+                        help="Path to ebird-taxonomy.csv or ebird-taxonomy.json; optional with --store once imported")
     parser.add_argument("--exclude-hybrids", action="store_true", help="Exclude hybrid species from output")
+    add_store_argument(parser)
 
     args = parser.parse_args()
-    filter_taxonomy(args.region_file, args.taxonomy_file, exclude_hybrids=args.exclude_hybrids)
+
+    # Without --taxonomy the last positional is the taxonomy, as in the original
+    # `region_file taxonomy_file` form; with --store every positional is a region
+    region_files = list(args.region_files)
+    taxonomy_file = args.taxonomy
+    if taxonomy_file is None and not args.store:
+        taxonomy_file = region_files.pop()
+    if not region_files:
+        parser.error("at least one region file is required")
+
+    if args.store:
+        filter_taxonomy_with_store(region_files, taxonomy_file, args.store, exclude_hybrids=args.exclude_hybrids)
+    elif taxonomy_file:
+        filter_taxonomies(region_files, taxonomy_file, exclude_hybrids=args.exclude_hybrids)
+    else:
+        parser.error("--taxonomy (ebird-taxonomy.csv or .json) is required without --store")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,24 +1,26 @@
-
 import argparse
 import json
-import pandas as pd
-import requests
+import os
+import threading
 import warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
-from bs4 import BeautifulSoup as Soup
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.common import exceptions
-from selenium.webdriver.chrome.service import Service
 
-# ------------- 
+# selenium, bs4 and requests are imported where they are used, so --help and
+# the HTTP-only paths don't pay for loading a browser driver stack
+
+from pipeline_store import PipelineStore, add_store_argument, iter_url_file, page_key
+
+# -------------
 def ConstructRequestUrl(taxonCode:str, tag:str, regionCode:str) -> str:
   baseUrl = 'https://media.ebird.org/catalog?'
   return baseUrl + f'tag={tag}&regionCode={regionCode}&taxonCode={taxonCode}'
 
 def GetMoreResultsButton(browser, cssSelector):
+  from selenium.webdriver.common.by import By
+  from selenium.common import exceptions
   try:
     button = browser.find_element(By.CSS_SELECTOR, cssSelector)
   except exceptions.NoSuchElementException:
@@ -26,53 +28,197 @@ def GetMoreResultsButton(browser, cssSelector):
   else:
     return button
 
-def GetSpeciesNextPagesUrl(driver, reqUrl, speciesCode, maxUrls):
-  df = pd.DataFrame(columns=['code', 'page Url'])
-  driver.get(reqUrl)
-  button = GetMoreResultsButton(driver, '.pagination > button')
-  while button is not None and len(df) < maxUrls:
-    button.click()
+# -------------
+# Page fetchers. Each worker thread gets its own browser (or HTTP session), so
+# several species can be scraped at once without sharing a driver.
+class BrowserFetcher:
+  paginates = True
+
+  def __init__(self, headless=False):
+    self.headless = headless
+    self.local = threading.local()
+    self.drivers = []
+    self.lock = threading.Lock()
+
+  def Driver(self):
+    driver = getattr(self.local, 'driver', None)
+    if driver is None:
+      from selenium import webdriver
+      options = webdriver.ChromeOptions()
+      if self.headless:
+        options.add_argument('--headless=new')
+      driver = webdriver.Chrome(options=options)
+      self.local.driver = driver
+      with self.lock:
+        self.drivers.append(driver)
+    return driver
+
+  def CatalogSource(self, reqUrl, maxUrls):
+    from selenium.webdriver.common.by import By
+    driver = self.Driver()
+    driver.get(reqUrl)
     button = GetMoreResultsButton(driver, '.pagination > button')
-  
-  soup = Soup(driver.page_source, 'lxml')
-  nextPageUrls = soup.find_all('a', class_='ResultsGallery-link')
-  for u in nextPageUrls[:maxUrls]:  # Limit to maxUrls
-    df = pd.concat(
-      [df, pd.DataFrame({
-        'code': speciesCode,
-        'page Url': u.get('href')
-      }, index=[0])],
-      ignore_index=True
-    )
-  return df
-
-def GetSpeciesAudioUrls(driver, reqUrls, speciesCodes):
-  audioUrls = []
-  for reqUrl, code in zip(reqUrls, speciesCodes):
+    while button is not None and len(driver.find_elements(By.CSS_SELECTOR, 'a.ResultsGallery-link')) < maxUrls:
+      button.click()
+      button = GetMoreResultsButton(driver, '.pagination > button')
+    return driver.page_source
+
+  def PageSource(self, reqUrl):
+    driver = self.Driver()
+    driver.get(reqUrl)
+    return driver.page_source
+
+  def Close(self):
+    for driver in self.drivers:
+      driver.quit()
+
+class HttpFetcher:
+  # Plain HTTP sees only the first catalog page; "more results" needs a browser
+  paginates = False
+
+  def __init__(self):
+    self.local = threading.local()
+    self.sessions = []
+    self.lock = threading.Lock()
+
+  def Session(self):
+    session = getattr(self.local, 'session', None)
+    if session is None:
+      import requests
+      session = requests.Session()
+      session.headers.update({'User-Agent': 'Mozilla/5.0 (audio-birdle scraper)'})
+      self.local.session = session
+      with self.lock:
+        self.sessions.append(session)
+    return session
+
+  def CatalogSource(self, reqUrl, maxUrls):
+    return self.PageSource(reqUrl)
+
+  def PageSource(self, reqUrl):
+    res = self.Session().get(reqUrl, timeout=30)
+    res.raise_for_status()
+    return res.text
+
+  def Close(self):
+    for session in self.sessions:
+      session.close()
+
+# -------------
+# HTML parsing runs in a separate process pool, off the browser threads.
+def ParseCatalogLinks(pageSource, maxUrls):
+  """Return up to maxUrls asset page links, and whether the page offers more results"""
+  from bs4 import BeautifulSoup as Soup
+  soup = Soup(pageSource, 'lxml')
+  links = [u.get('href') for u in soup.find_all('a', class_='ResultsGallery-link')[:maxUrls]]
+  return links, soup.select_one('.pagination > button') is not None
+
+def ParseMediaSource(pageSource):
+  from bs4 import BeautifulSoup as Soup
+  soup = Soup(pageSource, 'lxml')
+  for kind in ('audio', 'video'):
+    tag = soup.find(kind)
+    if tag is not None:
+      return kind, tag.get('src')
+  return None, None
+
+def GetSpeciesNextPagesUrl(fetcher, parsePool, reqUrl, maxUrls):
+  pageSource = fetcher.CatalogSource(reqUrl, maxUrls)
+  links, hasMore = parsePool.submit(ParseCatalogLinks, pageSource, maxUrls).result()
+  if hasMore and len(links) < maxUrls and not fetcher.paginates:
+    print(f"⚠️  Only {len(links)} of --max-urls {maxUrls} on the first catalog page of {reqUrl}; "
+          f"--backend http cannot load more results, use --backend chrome")
+  return links
+
+def GetSpeciesAudioUrls(fetcher, parsePool, reqUrls, speciesCode, writer):
+  # Fetch pages back to back and let the parse pool catch up behind the browser
+  pending = []
+  for reqUrl in reqUrls:
+    try:
+      pending.append((reqUrl, parsePool.submit(ParseMediaSource, fetcher.PageSource(reqUrl))))
+    except Exception as e:
+      pending.append((reqUrl, e))
+
+  found = 0
+  for reqUrl, parsed in pending:
+    audioUrl = None
     try:
-      driver.get(reqUrl)
-      soup = Soup(driver.page_source, 'lxml')
-      if soup.find('audio') is not None:
-        audioUrls.append(soup.find('audio').get('src'))
-        print(f"✅ Found audio for {code}: {reqUrl}")
-      elif soup.find('video') is not None:
-        audioUrls.append(soup.find('video').get('src'))
-        print(f"✅ Found video for {code}: {reqUrl}")
+      if isinstance(parsed, Exception):
+        raise parsed
+      kind, src = parsed.result()
+      if kind is not None:
+        audioUrl = src
+        found += 1
+        print(f"✅ Found {kind} for {speciesCode}: {reqUrl}")
       else:
-        audioUrls.append(None)  # No audio/video found
-        print(f"⚠️  No audio/video found for {code}: {reqUrl}")
+        print(f"⚠️  No audio/video found for {speciesCode}: {reqUrl}")
     except Exception as e:
-      audioUrls.append(None)  # Error occurred
-      print(f"❌ Error processing {code} ({reqUrl}): {e}")
-  return audioUrls
+      print(f"❌ Error processing {speciesCode} ({reqUrl}): {e}")
+    writer.Write({'code': speciesCode, 'page Url': reqUrl, 'audio Url': audioUrl})
+  return found
+
+def ScrapeSpecies(fetcher, parsePool, writer, speciesCode, tag, region, maxUrls, seenPages):
+  reqUrl = ConstructRequestUrl(speciesCode, tag, region)
+  pageUrls = GetSpeciesNextPagesUrl(fetcher, parsePool, reqUrl, maxUrls)
+  # Pages recorded by an earlier, interrupted run are not fetched again
+  newPageUrls = [u for u in pageUrls if page_key(u) not in seenPages]
+  print(f"   Found {len(pageUrls)} page URLs for {speciesCode} ({len(newPageUrls)} new)")
+  return GetSpeciesAudioUrls(fetcher, parsePool, newPageUrls, speciesCode, writer)
+
+# -------------
+# Output is a JSON Lines stream: one {code, page Url, audio Url} record per
+# asset page, appended as soon as it is resolved.
+class RecordWriter:
+  def __init__(self, outputFile):
+    self.file = open(outputFile, 'a', encoding='utf-8')
+    self.lock = threading.Lock()
+    self.total = 0
+    self.successful = 0
+
+  def Write(self, record):
+    line = json.dumps(record) + '\n'
+    with self.lock:
+      self.file.write(line)
+      self.file.flush()
+      self.total += 1
+      if record['audio Url']:
+        self.successful += 1
+
+  def Close(self):
+    os.fsync(self.file.fileno())
+    self.file.close()
+
+def LoadScrapedRecords(outputFile):
+  """Stream an existing output file, returning audio URL counts and seen page keys per species"""
+  audioCounts = {}
+  seenPages = {}
+  if outputFile.exists():
+    with open(outputFile, 'r', encoding='utf-8') as f:
+      for line in f:
+        line = line.strip()
+        if not line:
+          continue
+        try:
+          record = json.loads(line)
+        except json.JSONDecodeError:
+          continue  # Partially written line from an interrupted run
+        code = record['code']
+        # Pages that failed or had no media are retried on the next run
+        if record.get('audio Url'):
+          seenPages.setdefault(code, set()).add(page_key(record['page Url']))
+          audioCounts[code] = audioCounts.get(code, 0) + 1
+  return audioCounts, seenPages
 
 def DownloadAudio(speciesCode, url):
   filename = f'{speciesCode}_ML' + url.split('/')[6] + '.mp3'
   filePath = Path.cwd().joinpath('audio', 'eBird', f'{filename}')
-  res = requests.get(url)
-  with open(filePath, 'wb') as f:
-    for data in res.iter_content(1024):
-      f.write(data)
+  # For bulk mirroring use download-audio.py (concurrent, resumable, deduplicated)
+  import requests
+  with requests.get(url, stream=True, timeout=60) as res:
+    res.raise_for_status()
+    with open(filePath, 'wb') as f:
+      for data in res.iter_content(64 * 1024):
+        f.write(data)
 
 # -------------
 def main():
@@ -81,71 +227,71 @@ def main():
     parser.add_argument("--max-urls", type=int, default=10, help="Maximum number of audio URLs to get per species (default: 10)")
     parser.add_argument("--region", type=str, default="US", help="Region code (default: US)")
     parser.add_argument("--tag", type=str, default="song", help="Media tag (default: song)")
+    parser.add_argument("--workers", type=int, default=4, help="Number of species scraped in parallel, one browser each (default: 4)")
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count(), help="Processes used to parse page HTML (default: CPU count)")
+    parser.add_argument("--backend", choices=["chrome", "http"], default="chrome",
+                        help="Fetch pages with Chrome or plain HTTP; http reads only the first catalog page (default: chrome)")
+    parser.add_argument("--headless", action="store_true", help="Run Chrome headless")
+    add_store_argument(parser)
 
     args = parser.parse_args()
 
-    # Set up Chrome driver
-    service = Service(Path.cwd().joinpath('chromedriver'))
-    chromedriver_loc = '/opt/homebrew/bin/chromedriver'
-    driver = webdriver.Chrome()
-
-    urlDF = pd.DataFrame(columns=['code', 'page Url'])
-
     # Load taxonomy JSON and extract speciesCode
     try:
         with open(args.taxonomy_file, 'r', encoding='utf-8') as f:
             taxonomy = json.load(f)
     except Exception as e:
         print(f"Error loading taxonomy file: {e}")
-        driver.quit()
         return
 
-    print(f"📊 Processing {len(taxonomy)} species...")
-    
-    for i, entry in enumerate(taxonomy, 1):
-        species_code = entry.get("speciesCode")
-        if not species_code:
-            continue
-
-        print(f"🔍 [{i}/{len(taxonomy)}] Processing species: {species_code}")
-        reqUrl = ConstructRequestUrl(species_code, args.tag, args.region)
-        tempDF = GetSpeciesNextPagesUrl(driver, reqUrl, species_code, args.max_urls)
-        print(f"   Found {len(tempDF)} page URLs for {species_code}")
-        urlDF = pd.concat([urlDF, tempDF], ignore_index=True)
-
-    print(f"\n📋 Total page URLs collected: {len(urlDF)}")
-    print("🎵 Fetching audio URLs...")
-    
-    # Download and save audio, and save its URL
-    audioUrls = GetSpeciesAudioUrls(driver, urlDF['page Url'], urlDF['code'])
-    
-    # Ensure lengths match (should now be guaranteed)
-    if len(audioUrls) != len(urlDF):
-        print(f"⚠️  Warning: Length mismatch - {len(audioUrls)} audio URLs vs {len(urlDF)} page URLs")
-        # Pad with None if needed
-        while len(audioUrls) < len(urlDF):
-            audioUrls.append(None)
-    
-    urlDF['audio Url'] = audioUrls
+    speciesCodes = [entry.get("speciesCode") for entry in taxonomy if entry.get("speciesCode")]
 
     # Generate output filename based on input filename
     input_stem = args.taxonomy_file.stem
-    output_file = args.taxonomy_file.parent / f"{input_stem}-urls.json"
-    
-    # Save to JSON file
-    urlDF.to_json(output_file, orient='records', indent=2)
-    
+    output_file = args.taxonomy_file.parent / f"{input_stem}-urls.jsonl"
+
+    # Skip species that already reached --max-urls in a previous run
+    audioCounts, seenPages = LoadScrapedRecords(output_file)
+    todo = [code for code in speciesCodes if audioCounts.get(code, 0) < args.max_urls]
+
+    print(f"📊 Processing {len(speciesCodes)} species ({len(speciesCodes) - len(todo)} already complete in {output_file})...")
+
+    fetcher = BrowserFetcher(args.headless) if args.backend == "chrome" else HttpFetcher()
+    writer = RecordWriter(output_file)
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.parse_workers) as parsePool, \
+             ThreadPoolExecutor(max_workers=args.workers) as scrapePool:
+            futures = {
+                scrapePool.submit(ScrapeSpecies, fetcher, parsePool, writer, code, args.tag, args.region,
+                                  args.max_urls, seenPages.get(code, set())): code
+                for code in todo
+            }
+            for i, future in enumerate(as_completed(futures), 1):
+                code = futures[future]
+                try:
+                    found = future.result()
+                except Exception as e:
+                    print(f"❌ [{i}/{len(todo)}] Failed species {code}: {e}")
+                    continue
+                print(f"🔍 [{i}/{len(todo)}] Finished species: {code} ({found} new audio URLs)")
+    finally:
+        # Close browsers / sessions and the output stream
+        fetcher.Close()
+        writer.Close()
+
     # Print summary
-    successful_urls = urlDF['audio Url'].notna().sum()
-    total_urls = len(urlDF)
     print(f"\n📊 Summary:")
-    print(f"   Total page URLs: {total_urls}")
-    print(f"   Successful audio URLs: {successful_urls}")
-    print(f"   Failed/missing: {total_urls - successful_urls}")
+    print(f"   Page URLs scraped this run: {writer.total}")
+    print(f"   Successful audio URLs: {writer.successful}")
+    print(f"   Failed/missing: {writer.total - writer.successful}")
     print(f"✅ Audio URLs saved to {output_file}")
 
-    # Close Chrome
-    driver.quit()
+    # Stored pages are kept unless this run's retry found audio for a failed one
+    if args.store:
+        with PipelineStore(args.store) as store:
+            added = store.add_media_urls(iter_url_file(str(output_file)))
+        print(f"✅ {added} URL records added or filled in store {args.store}")
 
 if __name__ == '__main__':
     main()
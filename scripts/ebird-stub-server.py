@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+eBird API Stub Server
+
+Serves deterministic fake responses for the eBird API endpoints used by the
+pipeline scripts, plus Range-capable fake media under /api/v2/asset/<id>/<ext>,
+so they can be exercised offline.
+
+Usage:
+    python ebird-stub-server.py --port 8765 --taxonomy ./data/regions/us-taxonomy.json
+    EBIRD_API_KEY=stub python generate-daily-region-data.py --all \
+        --api-base http://127.0.0.1:8765/v2 ./data/regions/us-subregions.json out.json
+"""
+
+import argparse
+import array
+import hashlib
+import io
+import json
+import math
+import random
+import re
+import time
+import wave
+from datetime import date, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+DEFAULT_SPECIES = [
+    'amecro', 'amegfi', 'amerob', 'bkcchi', 'blujay', 'carwre', 'chispa', 'comgra',
+    'daejun', 'dowwoo', 'eastow', 'eursta', 'houfin', 'houspa', 'houwre', 'killde',
+    'mallar3', 'moudov', 'norcar', 'normoc', 'rebwoo', 'rewbla', 'sonspa', 'tuftit',
+]
+
+OBS_RECENT = re.compile(r'^/v2/data/obs/(?P<region>[^/]+)/recent/?$')
+TAXONOMY = re.compile(r'^/v2/ref/taxonomy/ebird/?$')
+SPECIES_LIST = re.compile(r'^/v2/product/spplist/(?P<region>[^/]+)/?$')
+SUBNATIONAL1 = re.compile(r'^/v2/ref/region/list/subnational1/(?P<region>[^/]+)/?$')
+ASSET = re.compile(r'^/api/v2/asset/(?P<asset>\d+)/(?P<ext>\w+)(/\w+)?$')
+RANGE = re.compile(r'^bytes=(?P<start>\d+)-(?P<end>\d*)$')
+
+
+def make_observations(region_code, species, count, back=14):
+    """
+    Build a deterministic list of observations for a region code. Each species
+    was last seen 0-29 days ago; only those within `back` days are returned, so
+    short incremental windows get proportionally smaller responses.
+    """
+    rng = random.Random(region_code)
+    picked = rng.sample(species, min(count, len(species)))
+    today = date.today()
+    observations = []
+    for code in picked:
+        days_ago = rng.randrange(30)
+        observation = {
+            'speciesCode': code,
+            'comName': code,
+            'locId': f'L{rng.randrange(10**6)}',
+            'obsDt': f'{today - timedelta(days=days_ago)} 08:00',
+            'howMany': rng.randint(1, 20),
+        }
+        if days_ago < back:
+            observations.append(observation)
+    return observations
+
+
+def make_asset(asset_id, size):
+    """Build deterministic fake media bytes for an asset id"""
+    rng = random.Random(int(asset_id))
+    return rng.randbytes(size)
+
+
+@lru_cache(maxsize=256)
+def make_wav_asset(asset_id, seconds, rate=16000):
+    """Build a mono 16-bit WAV tone whose pitch depends on the asset id"""
+    frequency = 400 + int(asset_id) % 4000
+    samples = array.array('h', (
+        int(12000 * math.sin(2 * math.pi * frequency * n / rate))
+        for n in range(int(seconds * rate))
+    ))
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def make_reference(path, species):
+    """Build deterministic reference data for the taxonomy / species list / subregion endpoints"""
+    if TAXONOMY.match(path):
+        return [
+            {'sciName': f'Avis {code}', 'comName': code, 'speciesCode': code, 'category': 'species',
+             'taxonOrder': float(position), 'order': 'Passeriformes',
+             'familyCode': f'fam{position % 12}', 'familyComName': f'Family {position % 12}',
+             'familySciName': f'Familia{position % 12}'}
+            for position, code in enumerate(species, 1)
+        ]
+    match = SPECIES_LIST.match(path)
+    if match:
+        return list(species)
+    match = SUBNATIONAL1.match(path)
+    if match:
+        country = match.group('region')
+        return [{'code': f'{country}-S{n:02d}', 'name': f'{country} Subregion {n}'} for n in range(1, 11)]
+    return None
+
+
+def make_handler(species, count, latency, fail_rate, asset_size, asset_format='random', asset_seconds=30.0,
+                 dead_rate=0.0, ignore_if_range=False):
+    def asset_is_dead(asset_id):
+        # Deterministic per asset, so repeated checks agree
+        return random.Random(f'dead-{asset_id}').random() < dead_rate
+
+    def asset_body(asset_id):
+        if asset_format == 'wav':
+            return make_wav_asset(asset_id, asset_seconds)
+        return make_asset(asset_id, asset_size)
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+
+            if fail_rate and random.random() < fail_rate:
+                self.send_json(503, {'error': 'stub failure'})
+                return
+
+            path, _, query = self.path.partition('?')
+            match = OBS_RECENT.match(path)
+            if match:
+                back = int(parse_qs(query).get('back', ['14'])[0])
+                self.send_json(200, make_observations(match.group('region'), species, count, back))
+                return
+
+            match = ASSET.match(path)
+            if match:
+                if asset_is_dead(match.group('asset')):
+                    self.send_json(404, {'error': 'asset not found'})
+                    return
+                self.send_asset(asset_body(match.group('asset')))
+                return
+
+            reference = make_reference(path, species)
+            if reference is not None:
+                self.send_reference(reference)
+                return
+
+            self.send_json(404, {'error': f'unknown endpoint {path}'})
+
+        def send_reference(self, payload):
+            # Reference data never changes, so answer conditional requests with 304
+            body = json.dumps(payload).encode('utf-8')
+            etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_asset(self, body):
+            # Honour "bytes=N-" and "bytes=N-M" ranges so downloaders can resume and checkers can probe;
+            # a Range whose If-Range doesn't match the ETag gets the whole body, as on a real CDN
+            # (unless ignore_if_range mimics a server that serves the Range regardless)
+            start, end = 0, len(body) - 1
+            etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+            match = RANGE.match(self.headers.get('Range', ''))
+            if_range = self.headers.get('If-Range')
+            if match and if_range is not None and if_range != etag and not ignore_if_range:
+                match = None
+            if match:
+                start = int(match.group('start'))
+                if match.group('end'):
+                    end = min(int(match.group('end')), end)
+                if start >= len(body):
+                    self.send_response(416)
+                    self.send_header('Content-Range', f'bytes */{len(body)}')
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{len(body)}')
+            else:
+                self.send_response(200)
+            self.send_header('Content-Type', 'audio/wav' if asset_format == 'wav' else 'audio/mpeg')
+            self.send_header('Content-Length', str(end + 1 - start))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('ETag', etag)
+            self.end_headers()
+            if self.command != 'HEAD':
+                self.wfile.write(body[start:end + 1])
+
+        def do_HEAD(self):
+            path = self.path.split('?', 1)[0]
+            match = ASSET.match(path)
+            if match and not asset_is_dead(match.group('asset')):
+                self.send_asset(asset_body(match.group('asset')))
+            else:
+                self.send_response(404)
+                self.end_headers()
+
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve fake eBird API responses for offline testing.')
+    parser.add_argument('--host', default='127.0.0.1', help='Host to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port to bind (default: 8765)')
+    parser.add_argument('--taxonomy', help='Taxonomy JSON file to draw species codes from (default: built-in list)')
+    parser.add_argument('--species-per-region', type=int, default=200, help='Species returned per region (default: 200)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds of artificial latency per request')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 503')
+    parser.add_argument('--asset-size', type=int, default=64 * 1024, help='Bytes served for /api/v2/asset/<id>/<ext> (default: 65536)')
+    parser.add_argument('--asset-format', choices=['random', 'wav'], default='random', help='Serve random bytes or WAV tone fixtures as media (default: random)')
+    parser.add_argument('--asset-seconds', type=float, default=30.0, help='Length of WAV fixtures in seconds (default: 30)')
+    parser.add_argument('--dead-rate', type=float, default=0.0, help='Fraction of asset ids answered with HTTP 404 (default: 0)')
+    parser.add_argument('--ignore-if-range', action='store_true', help='Serve Range requests without checking If-Range')
+    args = parser.parse_args()
+
+    species = DEFAULT_SPECIES
+    if args.taxonomy:
+        with open(args.taxonomy, 'r', encoding='utf-8') as f:
+            species = [entry['speciesCode'] for entry in json.load(f) if entry.get('speciesCode')]
+
+    handler = make_handler(species, args.species_per_region, args.latency, args.fail_rate,
+                           args.asset_size, args.asset_format, args.asset_seconds, args.dead_rate,
+                           args.ignore_if_range)
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"🦜 eBird stub server listening on http://{args.host}:{args.port}/v2")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,10 @@
-import os
-from dotenv import load_dotenv
-import requests
+import shutil
 import argparse
 
-def fetch_taxonomy(version, category='all', fmt='json', species=None):
-    # Get the API key from the environment variable
-    load_dotenv()
-    api_key = os.getenv('EBIRD_API_KEY')
-    if not api_key:
-        raise ValueError("API key not found. Please set the EBIRD_API_KEY environment variable.")
+from ebird_client import add_client_arguments, client_from_args
+from http_cache import add_cache_arguments, cache_from_args
 
-    # Define the URL and headers
-    url = 'https://api.ebird.org/v2/ref/taxonomy/ebird'
-    headers = {
-        'X-eBirdApiToken': api_key
-    }
-    
+def fetch_taxonomy(client, version, category='all', fmt='json', species=None):
     # Prepare parameters, only include if specified
     params = {}
     
@@ -28,18 +17,11 @@ def fetch_taxonomy(version, category='all', fmt='json', species=None):
     if species:
         params['species'] = species
 
-    # Make the request
-    response = requests.get(url, headers=headers, params=params)
-
-    # Check for a successful response
-    if response.status_code == 200:
-        return response.content  # Return raw content for saving
-    else:
-        response.raise_for_status()
+    # Make the request (or reuse the cached response), streamed to a file on disk
+    return client.fetch_to_file('ref/taxonomy/ebird', params=params)
 
-def save_to_file(data, output_file):
-    with open(output_file, 'wb') as f:
-        f.write(data)
+def save_to_file(data_path, output_file):
+    shutil.copyfile(data_path, output_file)
     print(f"Data saved to {output_file}")
 
 if __name__ == "__main__":
@@ -51,17 +33,21 @@ if __name__ == "__main__":
     parser.add_argument('--fmt', choices=['csv', 'json'], help='Format of the response.')
     parser.add_argument('--locale', default='en', help='Locale for common names.')
     parser.add_argument('--output', help='File to save the output data.')
+    add_cache_arguments(parser)
+    add_client_arguments(parser)
 
     args = parser.parse_args()
 
     # Fetch the taxonomy data
     try:
-        data = fetch_taxonomy(args.version, args.category, args.fmt, args.species)
+        with client_from_args(args, cache=cache_from_args(args)) as client:
+            data = fetch_taxonomy(client, args.version, args.category, args.fmt, args.species)
         
         # If an output file is specified, save the data
         if args.output:
             save_to_file(data, args.output)
         else:
-            print(data.decode('utf-8'))  # Print the data if no output file is specified
+            with open(data, 'r', encoding='utf-8') as f:
+                print(f.read())  # Print the data if no output file is specified
     except Exception as e:
         print(f"Error: {e}")
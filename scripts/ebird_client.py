@@ -0,0 +1,249 @@
+"""
+Shared eBird API client.
+
+One pooled keep-alive session per client, a token-bucket rate limiter shared by
+every thread using it, jittered exponential retries on 429/5xx and connection
+errors (honouring Retry-After), and per-endpoint request/latency/byte counters.
+Latency is timed per attempt around the HTTP call only; rate-limit waits are
+counted separately and retry backoff is left out.
+Reference downloads can go through an http_cache.HttpCache, and an asyncio
+interface runs requests on worker threads.
+
+    client = EBirdClient()
+    observations = client.get_json(f'data/obs/{code}/recent', endpoint='data/obs/recent')
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+DEFAULT_API_BASE = 'https://api.ebird.org/v2'
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class EBirdApiError(RuntimeError):
+    """Raised when a request still fails after all retries."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class EBirdClient:
+    def __init__(self, api_key: Optional[str] = None, api_base: Optional[str] = None,
+                 pool_size: int = 8, rate: float = 5.0, burst: float = 10.0,
+                 max_retries: int = 5, backoff: float = 0.5, max_backoff: float = 30.0,
+                 timeout: float = 30.0, cache=None):
+        if api_key is None:
+            load_dotenv()
+            api_key = os.getenv('EBIRD_API_KEY')
+        if not api_key and not (cache is not None and cache.offline):
+            raise ValueError("API key not found. Please set the EBIRD_API_KEY environment variable.")
+
+        self.api_base = (api_base or os.getenv('EBIRD_API_BASE') or DEFAULT_API_BASE).rstrip('/')
+        self.limiter = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.cache = cache
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if api_key:
+            self.session.headers.update({'X-eBirdApiToken': api_key})
+
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self.stats_lock = threading.Lock()
+
+    # -- context manager -------------------------------------------------
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+
+    # -- requests --------------------------------------------------------
+    def url(self, path: str) -> str:
+        return f"{self.api_base}/{path.lstrip('/')}"
+
+    def endpoint_stats(self, endpoint: str) -> Dict[str, float]:
+        # Callers hold stats_lock
+        return self.stats.setdefault(endpoint, {
+            'requests': 0, 'errors': 0, 'retries': 0, 'bytes': 0,
+            'seconds': 0.0, 'maxSeconds': 0.0, 'waitSeconds': 0.0,
+        })
+
+    def record_attempt(self, endpoint: str, seconds: float, waited: float) -> None:
+        with self.stats_lock:
+            stats = self.endpoint_stats(endpoint)
+            stats['seconds'] += seconds
+            stats['maxSeconds'] = max(stats['maxSeconds'], seconds)
+            stats['waitSeconds'] += waited
+
+    def record(self, endpoint: str, size: int, retries: int, error: bool) -> None:
+        with self.stats_lock:
+            stats = self.endpoint_stats(endpoint)
+            stats['requests'] += 1
+            stats['errors'] += int(error)
+            stats['retries'] += retries
+            stats['bytes'] += size
+
+    def record_bytes(self, endpoint: str, size: int) -> None:
+        with self.stats_lock:
+            self.endpoint_stats(endpoint)['bytes'] += size
+
+    def count_streamed_bytes(self, endpoint: str, response: requests.Response) -> None:
+        """Add a streamed response's body bytes to the counters when the caller closes it."""
+        close = response.close
+        counted = False
+
+        def close_and_count():
+            nonlocal counted
+            if not counted:
+                counted = True
+                self.record_bytes(endpoint, response.raw.tell())
+            close()
+
+        response.close = close_and_count
+
+    def retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        # Full jitter: uniform over [0, backoff * 2^attempt]
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+            stream: bool = False, timeout: Optional[float] = None, endpoint: Optional[str] = None) -> requests.Response:
+        """
+        Rate-limited GET with retries. Mirrors requests.Session.get, so the
+        client can be handed to HttpCache.fetch in place of a session.
+        Non-retryable error responses are returned for the caller to inspect.
+        With stream=True the latency is time to headers, and the body bytes are
+        counted when the caller closes the response.
+        """
+        endpoint = endpoint or url.replace(self.api_base, '').strip('/')
+        for attempt in range(self.max_retries + 1):
+            waited = self.limiter.acquire()
+            response = None
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, headers=headers, stream=stream,
+                                            timeout=timeout or self.timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    if not stream:
+                        response.content  # Read the body inside the timed attempt
+                    self.record_attempt(endpoint, time.perf_counter() - start, waited)
+                    self.record(endpoint, 0 if stream else len(response.content), attempt,
+                                response.status_code >= 400)
+                    if stream:
+                        self.count_streamed_bytes(endpoint, response)
+                    return response
+                response.close()
+                failure = f"HTTP {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                failure = str(e)
+            self.record_attempt(endpoint, time.perf_counter() - start, waited)
+            if attempt < self.max_retries:
+                time.sleep(self.retry_delay(attempt, response))
+
+        self.record(endpoint, 0, self.max_retries, True)
+        raise EBirdApiError(f"GET {url} failed after {self.max_retries + 1} attempts: {failure}")
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None, endpoint: Optional[str] = None) -> Any:
+        response = self.get(self.url(path), params=params, endpoint=endpoint)
+        if response.status_code != 200:
+            raise EBirdApiError(f"Failed to fetch data from eBird API: {response.status_code} {response.text}")
+        return response.json()
+
+    def fetch_to_file(self, path: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Download a (rarely changing) reference resource through the HTTP cache; returns the file path."""
+        if self.cache is None:
+            raise ValueError("fetch_to_file requires a client created with cache=HttpCache(...)")
+        return self.cache.fetch(self, self.url(path), params=params, timeout=self.timeout)
+
+    # -- asyncio interface -----------------------------------------------
+    # asyncio is imported in the coroutines: it is already loaded by the time
+    # one runs, and the synchronous scripts skip its ~40 ms import
+    async def aget_json(self, path: str, params: Optional[Dict[str, Any]] = None, endpoint: Optional[str] = None) -> Any:
+        import asyncio
+        return await asyncio.to_thread(self.get_json, path, params, endpoint)
+
+    async def agather_json(self, paths: Iterable[str], endpoint: Optional[str] = None,
+                           concurrency: int = 8, return_exceptions: bool = True) -> List[Any]:
+        """Fetch many paths concurrently, at most `concurrency` at a time, in input order."""
+        import asyncio
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(path):
+            async with semaphore:
+                return await self.aget_json(path, endpoint=endpoint)
+
+        return await asyncio.gather(*(fetch(path) for path in paths), return_exceptions=return_exceptions)
+
+    # -- metrics ---------------------------------------------------------
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Per-endpoint counters; meanSeconds is the mean latency of one attempt (retries included)."""
+        with self.stats_lock:
+            return {endpoint: {**stats, 'meanSeconds': mean_attempt_seconds(stats)}
+                    for endpoint, stats in self.stats.items()}
+
+    def print_metrics(self) -> None:
+        for endpoint, stats in sorted(self.metrics().items()):
+            print(f"   {endpoint}: {stats['requests']} requests, {stats['errors']} errors, "
+                  f"{stats['retries']} retries, {stats['bytes'] / 1e3:.1f} kB, "
+                  f"mean {stats['meanSeconds'] * 1000:.0f} ms, max {stats['maxSeconds'] * 1000:.0f} ms, "
+                  f"rate-limit wait {stats['waitSeconds']:.1f} s")
+
+
+def mean_attempt_seconds(stats: Dict[str, float]) -> float:
+    attempts = stats['requests'] + stats['retries']
+    return stats['seconds'] / attempts if attempts else 0.0
+
+
+def add_client_arguments(parser) -> None:
+    """Add the shared --api-base / --rate / --max-retries options to an argparse parser."""
+    parser.add_argument('--api-base', default=None,
+                        help=f'eBird API base URL, e.g. a local stub server (default: $EBIRD_API_BASE or {DEFAULT_API_BASE})')
+    parser.add_argument('--rate', type=float, default=5.0, help='Maximum eBird API requests per second (default: 5)')
+    parser.add_argument('--max-retries', type=int, default=5, help='Retries on 429/5xx/connection errors (default: 5)')
+
+
+def client_from_args(args, cache=None, pool_size: int = 8) -> EBirdClient:
+    return EBirdClient(api_base=args.api_base, rate=args.rate, burst=max(1.0, args.rate * 2),
+                       max_retries=args.max_retries, pool_size=pool_size, cache=cache)
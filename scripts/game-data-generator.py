@@ -7,26 +7,25 @@ with bird information organized by region.
 
 Usage:
     python bird_json_generator.py --region US --taxonomy taxonomy.json --urls urls.json --output birds.json
+    python bird_json_generator.py --build US us-taxonomy.json us-urls.jsonl --build EU eu-taxonomy.json eu-urls.jsonl --output birds.json
 """
 
 import json
 import argparse
+import hashlib
 import os
-from typing import Dict, List, Any
+from typing import Dict, FrozenSet, List, Any, Iterable, Iterator, Optional, Tuple
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
+from bird_hash import HashCollisionError, build_hash_index
+from bird_shards import DEFAULT_URL_PREFIXES, distractors_path, hash_index_path, shard_options, write_shards
+from distractors import DEFAULT_SIMILAR_COUNT, build_region_distractor_tables
+from pipeline_store import PipelineStore, add_store_argument, iter_url_file
 
-def load_json_file(filepath: str) -> List[Dict[str, Any]]:
-    """Load and return JSON data from a file."""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print(f"Error: File '{filepath}' not found.")
-        exit(1)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in file '{filepath}': {e}")
-        exit(1)
+# Bump when the shape of a bird entry changes so old build manifests are ignored
+MANIFEST_VERSION = 1
 
 
 def load_existing_output(filepath: str) -> Dict[str, Any]:
@@ -40,54 +39,99 @@ def load_existing_output(filepath: str) -> Dict[str, Any]:
     return {}
 
 
-def group_urls_by_code(urls_data: List[Dict[str, Any]]) -> Dict[str, List[str]]:
-    """Group audio URLs by species code."""
+@lru_cache(maxsize=None)
+def load_taxonomy(filepath: str) -> List[Dict[str, Any]]:
+    """Load a taxonomy file once per process; regions sharing a taxonomy reuse it."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in file '{filepath}': {e}") from e
+
+
+def group_urls_by_code(urls_data: Iterable[Dict[str, Any]],
+                       dead_urls: FrozenSet[str] = frozenset()) -> Dict[str, List[str]]:
+    """Group audio URLs by species code, leaving out URLs known to be dead."""
     url_groups = defaultdict(list)
     
     for entry in urls_data:
         code = entry.get('code', '')
         audio_url = entry.get('audio Url', '')
         
-        if code and audio_url:
+        if code and audio_url and audio_url not in dead_urls:
             url_groups[code].append(audio_url)
     
     return dict(url_groups)
 
 
-def process_taxonomy_data(taxonomy_data: List[Dict[str, Any]], 
-                         url_groups: Dict[str, List[str]]) -> List[Dict[str, Any]]:
-    """Process taxonomy data and match with audio URLs."""
-    birds = []
-    
+TAXONOMY_FIELDS = ('speciesCode', 'comName', 'sciName', 'order', 'familyComName', 'familySciName')
+
+
+def make_bird_entry(bird: Dict[str, Any], audio_urls: List[str]) -> Dict[str, Any]:
+    """Build one birds.json entry from a taxonomy record and its audio URLs."""
+    family_com_name = bird.get('familyComName', '')
+    family_sci_name = bird.get('familySciName', '')
+    family = family_sci_name + ' (' + family_com_name + ')' if family_com_name else family_sci_name
+    return {
+        "id": bird.get('speciesCode', ''),
+        "name": bird.get('comName', ''),
+        "scientificName": bird.get('sciName', ''),
+        "order": bird.get('order', ''),
+        "family": family,
+        "audioUrl": audio_urls
+    }
+
+
+def is_complete(bird: Dict[str, Any]) -> bool:
+    """True when a taxonomy record has the fields every bird entry needs."""
+    return all([bird.get('speciesCode'), bird.get('comName'), bird.get('sciName')])
+
+
+def iter_playable_birds(taxonomy_data: List[Dict[str, Any]],
+                        url_groups: Dict[str, List[str]]) -> Iterator[Tuple[Dict[str, Any], List[str]]]:
+    """Yield (taxonomy record, audio URLs) for every complete record that has audio."""
     for bird in taxonomy_data:
-        species_code = bird.get('speciesCode', '')
-        com_name = bird.get('comName', '')
-        sci_name = bird.get('sciName', '')
-        order = bird.get('order', '')
-        family_com_name = bird.get('familyComName', '')
-        family_sci_name = bird.get('familySciName', '')
-        family = family_sci_name + ' (' + family_com_name + ')' if family_com_name else family_sci_name
-        
         # Skip if essential data is missing
-        if not all([species_code, com_name, sci_name]):
+        if not is_complete(bird):
             continue
         
-        # Get audio URLs for this species
-        audio_urls = url_groups.get(species_code, [])
-        
         # Only include birds that have audio URLs
+        audio_urls = url_groups.get(bird['speciesCode'], [])
         if audio_urls:
-            bird_entry = {
-                "id": species_code,
-                "name": com_name,
-                "scientificName": sci_name,
-                "order": order,
-                "family": family,
-                "audioUrl": audio_urls
-            }
-            birds.append(bird_entry)
-    
-    return birds
+            yield bird, audio_urls
+
+
+def process_taxonomy_data(taxonomy_data: List[Dict[str, Any]], 
+                         url_groups: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    """Process taxonomy data and match with audio URLs."""
+    return [make_bird_entry(bird, audio_urls) for bird, audio_urls in iter_playable_birds(taxonomy_data, url_groups)]
+
+
+def species_content_hash(bird: Dict[str, Any], audio_urls: List[str]) -> str:
+    """Hash of everything a bird entry is built from."""
+    fields = [bird.get(field, '') for field in TAXONOMY_FIELDS]
+    canonical = json.dumps([fields, audio_urls], separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def process_taxonomy_data_incremental(playable_birds: Iterable[Tuple[Dict[str, Any], List[str]]],
+                                      previous_hashes: Dict[str, str]) -> Tuple[List[str], Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """
+    Like process_taxonomy_data, but takes (taxonomy record, audio URLs) pairs
+    and only builds entries whose content hash differs from previous_hashes.
+    Returns (ordered ids, changed entries by id, content hash by id).
+    """
+    ids = []
+    changed = {}
+    hashes = {}
+    for bird, audio_urls in playable_birds:
+        species_code = bird['speciesCode']
+        content_hash = species_content_hash(bird, audio_urls)
+        ids.append(species_code)
+        hashes[species_code] = content_hash
+        if previous_hashes.get(species_code) != content_hash:
+            changed[species_code] = make_bird_entry(bird, audio_urls)
+    return ids, changed, hashes
 
 
 def save_json_file(data: Dict[str, Any], filepath: str) -> None:
@@ -101,42 +145,258 @@ def save_json_file(data: Dict[str, Any], filepath: str) -> None:
         exit(1)
 
 
+def save_compact_json_file(data: Dict[str, Any], filepath: str) -> None:
+    """Save data to JSON file without whitespace."""
+    try:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'), ensure_ascii=False)
+        print(f"Successfully saved data to '{filepath}'")
+    except IOError as e:
+        print(f"Error: Could not write to file '{filepath}': {e}")
+        exit(1)
+
+
+def build_region_hash_indexes(output_data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Dict[str, int]]:
+    """Build the answer hash -> bird position lookup for every region, failing on collisions."""
+    indexes = {}
+    for region_key, birds in output_data.items():
+        try:
+            indexes[region_key] = build_hash_index([bird['id'] for bird in birds])
+        except HashCollisionError as e:
+            print(f"Error: Region '{region_key}': {e}")
+            exit(1)
+    return indexes
+
+
+def build_region(region_key: str, taxonomy_path: str, urls_path: str, previous_hashes: Dict[str, str],
+                 store_path: Optional[str] = None, dead_urls: FrozenSet[str] = frozenset()):
+    """
+    Build one region's changed bird entries and hash index. Runs in a worker
+    process. Reads the taxonomy and URL files, or streams the region's species
+    from the pipeline store when store_path is given. URLs in dead_urls are
+    dropped, and species left without audio are skipped. Errors are raised
+    for the parent to report, since exiting here would only end the worker.
+    Returns (region key, ordered ids, changed entries, content hashes, hash index).
+    """
+    if store_path:
+        with PipelineStore(store_path, readonly=True) as store:
+            playable_birds = (
+                (bird, [url for url in urls if url not in dead_urls])
+                for bird, urls in store.iter_region_birds(region_key) if is_complete(bird)
+            )
+            playable_birds = ((bird, urls) for bird, urls in playable_birds if urls)
+            ids, changed, hashes = process_taxonomy_data_incremental(playable_birds, previous_hashes)
+    else:
+        url_groups = group_urls_by_code(iter_url_file(urls_path), dead_urls)
+        playable_birds = iter_playable_birds(load_taxonomy(taxonomy_path), url_groups)
+        ids, changed, hashes = process_taxonomy_data_incremental(playable_birds, previous_hashes)
+    hash_index = build_hash_index(ids)
+    return region_key, ids, changed, hashes, hash_index
+
+
+def build_regions(jobs: List[Tuple[Any, ...]], workers: int) -> Tuple[List[Tuple[Any, ...]], Dict[str, Exception]]:
+    """
+    Build every (region key, taxonomy, urls, previous hashes, store, dead URLs)
+    job, in parallel when there is more than one. Returns the results of the
+    regions that built, in job order, and {region key: error} for the rest.
+    """
+    results = []
+    errors = {}
+    if workers <= 1 or len(jobs) == 1:
+        for job in jobs:
+            try:
+                results.append(build_region(*job))
+            except Exception as e:
+                errors[job[0]] = e
+        return results, errors
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        futures = [(job[0], executor.submit(build_region, *job)) for job in jobs]
+        for region_key, future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                errors[region_key] = e
+    return results, errors
+
+
+def file_digest(filepath: str) -> str:
+    """sha256 of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    try:
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        print(f"Error: File '{filepath}' not found.")
+        exit(1)
+    return digest.hexdigest()
+
+
+def load_build_manifest(filepath: str) -> Dict[str, Any]:
+    """Load the build manifest, ignoring it if missing, unreadable or from another MANIFEST_VERSION."""
+    manifest = load_existing_output(filepath)
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {'version': MANIFEST_VERSION, 'regions': {}}
+    return manifest
+
+
+def write_regions_json(regions: Iterable[Tuple[str, List[Dict[str, Any]]]], filepath: str) -> None:
+    """
+    Stream {region: birds} to filepath one region at a time, producing the same
+    text as save_json_file. Written to a temporary file and swapped in at the end.
+    """
+    encoder = json.JSONEncoder(indent=2, ensure_ascii=False)
+    tmp_path = filepath + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('{')
+            first = True
+            for region_key, birds in regions:
+                f.write('\n  ' if first else ',\n  ')
+                f.write(json.dumps(region_key, ensure_ascii=False) + ': ')
+                # Literal newlines only occur between tokens, so re-indenting chunks is safe
+                for chunk in encoder.iterencode(birds):
+                    f.write(chunk.replace('\n', '\n  '))
+                first = False
+            f.write('\n}' if not first else '}')
+        os.replace(tmp_path, filepath)
+        print(f"Successfully saved data to '{filepath}'")
+    except IOError as e:
+        print(f"Error: Could not write to file '{filepath}': {e}")
+        exit(1)
+
+
+def build_manifest_path(output_path: str) -> str:
+    """Path of the build manifest written next to the output file (birds.json -> birds-build-manifest.json)."""
+    root, ext = os.path.splitext(output_path)
+    return f"{root}-build-manifest{ext or '.json'}"
+
+
 def main():
     parser = argparse.ArgumentParser(description='Generate bird data JSON from taxonomy and URL files')
-    parser.add_argument('--region', required=True, help='Region code (e.g., US, EU)')
-    parser.add_argument('--taxonomy', required=True, help='Path to taxonomy JSON file')
-    parser.add_argument('--urls', required=True, help='Path to URLs JSON file')
+    parser.add_argument('--region', help='Region code (e.g., US, EU)')
+    parser.add_argument('--taxonomy', help='Path to taxonomy JSON file')
+    parser.add_argument('--urls', help='Path to URLs file (.jsonl stream from ebird-songdownload.py, or a JSON array)')
+    parser.add_argument('--build', nargs=3, action='append', default=[], metavar=('REGION', 'TAXONOMY', 'URLS'),
+                        help='Build a region from a taxonomy and URLs file; repeat for several regions')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Processes used to build regions in parallel (default: CPU count)')
     parser.add_argument('--output', required=True, help='Output JSON file path')
+    parser.add_argument('--manifest', help='Build manifest path (default: <output>-build-manifest.json next to the output)')
+    parser.add_argument('--full', action='store_true', help='Ignore the build manifest for the regions being built and rebuild all their species')
+    parser.add_argument('--shard-dir', help='Also write compact, content-hashed per-region shards and a manifest.json here '
+                             '(default: update <output dir>/birds when its manifest.json exists)')
+    parser.add_argument('--split-audio', action='store_true', help='With --shard-dir, keep audio URL lists in separate per-region shards')
+    parser.add_argument('--url-prefix', action='append', default=[], help='Extra audio URL prefix to intern in shards (repeatable)')
+    parser.add_argument('--dead-urls', metavar='STATUS_FILE',
+                        help='Leave out audio URLs that check-audio-urls.py recorded as dead in this status cache')
+    parser.add_argument('--similar-count', type=int, default=DEFAULT_SIMILAR_COUNT,
+                        help=f'Ranked similar species per bird in the distractor tables (default: {DEFAULT_SIMILAR_COUNT})')
+    add_store_argument(parser)
     
     args = parser.parse_args()
+
+    jobs = [tuple(build) for build in args.build]
+    if args.store:
+        # Taxonomy and URLs come from the pipeline store (see pipeline_store.py)
+        if not args.region or args.taxonomy or args.urls or jobs:
+            parser.error('--store takes only --region')
+        jobs.append((args.region, None, None))
+    elif args.region or args.taxonomy or args.urls:
+        if not (args.region and args.taxonomy and args.urls):
+            parser.error('--region, --taxonomy and --urls must be given together')
+        jobs.insert(0, (args.region, args.taxonomy, args.urls))
+    if not jobs:
+        parser.error('give --region/--taxonomy/--urls or at least one --build')
     
-    # Load input files
-    print(f"Loading taxonomy data from '{args.taxonomy}'...")
-    taxonomy_data = load_json_file(args.taxonomy)
-    
-    print(f"Loading URLs data from '{args.urls}'...")
-    urls_data = load_json_file(args.urls)
-    
-    # Load existing output file if it exists
+    # Load existing output file once; regions that are not rebuilt are carried over
     print(f"Checking for existing output file '{args.output}'...")
     output_data = load_existing_output(args.output)
+
+    # The build manifest records input file digests and per-species content hashes
+    manifest_path = args.manifest or build_manifest_path(args.output)
+    manifest = load_build_manifest(manifest_path)
+    if args.full:
+        # Forget only the rebuilt regions; the others keep their hashes for later incremental runs
+        for region, _, _ in jobs:
+            manifest['regions'].pop(region.lower(), None)
+
+    dead_urls = frozenset()
+    if args.dead_urls:
+        from url_check import load_dead_urls  # pulls in requests, which plain builds don't need
+        dead_urls = frozenset(load_dead_urls(args.dead_urls))
+    if dead_urls:
+        print(f"Skipping {len(dead_urls)} dead audio URLs from '{args.dead_urls}'")
+    dead_digest = hashlib.sha256('\n'.join(sorted(dead_urls)).encode('utf-8')).hexdigest()
+
+    build_jobs = []
+    for region, taxonomy_path, urls_path in jobs:
+        region_key = region.lower()
+        if args.store:
+            with PipelineStore(args.store, readonly=True) as store:
+                inputs = {'store': store.media_digest(region_key)}
+        else:
+            inputs = {'taxonomy': file_digest(taxonomy_path), 'urls': file_digest(urls_path)}
+        if dead_urls:
+            inputs['deadUrls'] = dead_digest
+        previous = manifest['regions'].get(region_key, {})
+        existing_ids = {bird['id'] for bird in output_data.get(region_key, [])}
+
+        if previous.get('inputs') == inputs and existing_ids == set(previous.get('species', {})):
+            print(f"Region '{region_key.upper()}' inputs unchanged, keeping {len(existing_ids)} birds")
+            continue
+
+        # Only trust hashes for species that are actually present in the existing output
+        previous_hashes = {code: content_hash for code, content_hash in previous.get('species', {}).items()
+                           if code in existing_ids}
+        manifest['regions'][region_key] = {'inputs': inputs}
+        build_jobs.append((region_key, taxonomy_path, urls_path, previous_hashes, args.store, dead_urls))
     
-    # Group URLs by species code
-    print("Processing URL data...")
-    url_groups = group_urls_by_code(urls_data)
-    
-    # Process taxonomy data and match with URLs
-    print("Processing taxonomy data and matching with audio URLs...")
-    birds = process_taxonomy_data(taxonomy_data, url_groups)
-    
-    # Update the output data for the specified region
-    region_key = args.region.lower()
-    output_data[region_key] = birds
-    
-    print(f"Found {len(birds)} birds with audio URLs for region '{args.region}'")
+    # Group URLs, match them with taxonomy data and hash answers, one region per process
+    print(f"Building {len(build_jobs)} region(s) with up to {max(1, min(args.workers, len(build_jobs)))} worker(s)...")
+    results, errors = build_regions(build_jobs, args.workers)
+    if errors:
+        # Nothing is written, so the existing output and build manifest stay consistent
+        for region_key, error in errors.items():
+            print(f"Error: Region '{region_key}': {error}")
+        exit(1)
+
+    hash_indexes = {}
+    for region_key, ids, changed, hashes, hash_index in results:
+        existing = {bird['id']: bird for bird in output_data.get(region_key, [])}
+        output_data[region_key] = [changed[code] if code in changed else existing[code] for code in ids]
+        hash_indexes[region_key] = hash_index
+        manifest['regions'][region_key]['species'] = hashes
+        removed = len(existing.keys() - hashes.keys())
+        print(f"Found {len(ids)} birds with audio URLs for region '{region_key.upper()}' "
+              f"({len(changed)} rebuilt, {removed} removed)")
     
-    # Save the updated data
-    save_json_file(output_data, args.output)
+    # Precompute answer hashes so clients resolve the daily bird with one lookup
+    print("Building answer hash index...")
+    carried_over = {key: birds for key, birds in output_data.items() if key not in hash_indexes}
+    hash_indexes.update(build_region_hash_indexes(carried_over))
+    hash_indexes = {key: hash_indexes[key] for key in output_data}
+
+    # Family index and ranked similar species so clients pick wrong answers without scanning the region
+    print("Building distractor tables...")
+    distractor_tables = build_region_distractor_tables(output_data, args.similar_count)
+
+    # Save the updated data in one streaming pass; the text matches a full rebuild
+    write_regions_json(output_data.items(), args.output)
+    save_compact_json_file(hash_indexes, hash_index_path(args.output))
+    save_compact_json_file(distractor_tables, distractors_path(args.output))
+    save_compact_json_file(manifest, manifest_path)
+
+    # An existing shard manifest next to the output is kept in step, since the client prefers shards
+    shard_dir, split_audio, url_prefixes = shard_options(args.output, args.shard_dir, args.split_audio,
+                                                         DEFAULT_URL_PREFIXES + args.url_prefix)
+    if shard_dir:
+        shards = write_shards(output_data, hash_indexes, shard_dir, split_audio, url_prefixes, distractor_tables)
+        for region_key, region in shards['regions'].items():
+            sizes = ', '.join(f"{kind} {size['raw'] / 1e3:.1f} kB ({size['.gz'] / 1e3:.1f} kB gz)"
+                              for kind, size in region['bytes'].items())
+            print(f"Shards for region '{region_key.upper()}': {sizes}")
+        print(f"Successfully saved shard manifest to '{os.path.join(shard_dir, 'manifest.json')}'")
     
     print("Processing complete!")
 
@@ -15,27 +15,11 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import sys
 
-# Salt for hashing (must match JavaScript implementation)
-SECRET_SALT = "birdle-salt-2025"
-
-def hash_bird_id(bird_id):
-    """
-    Hash a bird ID with the secret salt using the same algorithm as JavaScript
-    """
-    combined = f"{bird_id}-{SECRET_SALT}"
-    hash_value = 0
-    
-    for char in combined:
-        char_code = ord(char)
-        hash_value = ((hash_value << 5) - hash_value) + char_code
-        # Convert to 32-bit signed integer
-        hash_value = hash_value & 0xFFFFFFFF
-        if hash_value >= 0x80000000:
-            hash_value -= 0x100000000
-    
-    # Convert to hex and take first 8 characters
-    hex_hash = format(hash_value & 0xFFFFFFFF, '08x')
-    return hex_hash[:8]
+from bird_hash import hash_bird_id
+from daily_history import HistoryIndex, to_ordinal
+from daily_selection import WEIGHT_FACTORS, SelectionEngine
+from instrumentation import add_metrics_arguments, run_main, start_run
+from pipeline_store import PipelineStore, add_store_argument
 
 def load_json_file(file_path):
     """Load JSON file with error handling"""
@@ -54,34 +38,48 @@ def save_json_file(file_path, data):
     with open(file_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
 
-def get_recent_answers(history, region, days, current_date):
-    """Get bird IDs that were answers in the last X days for a region"""
-    recent_answers = set()
-    cutoff_date = current_date - timedelta(days=days)
+def write_daily_shards(shard_dir, daily_entries):
+    """
+    Publish one daily/<YYYY-MM-DD>.json per scheduled date plus daily/index.json.
+    Existing shards are only rewritten when their content changed (e.g. --force),
+    so a routine run adds one file and leaves cached days untouched.
+    Returns the list of dates whose shard was written.
+    """
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    by_date = {}
+    for entry in daily_entries:
+        by_date.setdefault(entry['date'], []).append(entry)
     
-    region_history = history.get(region, [])
-    for entry in region_history:
-        entry_date = datetime.strptime(entry['date'], '%Y-%m-%d').date()
-        if entry_date > cutoff_date:
-            recent_answers.add(entry['id'])
+    written = []
+    for date_str, entries in by_date.items():
+        shard_path = shard_dir / f'{date_str}.json'
+        if shard_path.exists() and load_json_file(shard_path) == entries:
+            continue
+        save_json_file(shard_path, entries)
+        written.append(date_str)
     
-    return recent_answers
+    # Index every published date, including past days kept for late or offline clients
+    dates = sorted(path.stem for path in shard_dir.glob('????-??-??.json'))
+    save_json_file(shard_dir / 'index.json', {
+        'first': dates[0] if dates else None,
+        'last': dates[-1] if dates else None,
+        'dates': dates
+    })
+    return written
+
+def get_recent_answers(history, region, days, current_date):
+    """
+    Get bird IDs that were answers in the last X days for a region.
+    Returns a window over the HistoryIndex with O(1) membership checks.
+    """
+    return history.region(region).window(days, current_date)
 
-def get_subregion_for_date(subregions_data, region_id, target_date):
+def choose_subregion_for_date(subregion_names, region_id, target_date):
     """
-    Select a subregion for the given date and region.
+    Select a subregion name for the given date and region.
     This could be random or based on some deterministic logic.
     For now, using a simple hash-based selection for consistency.
     """
-    region_subregions = subregions_data.get(region_id, {})
-    if not region_subregions:
-        return None, []
-    
-    # Get list of available subregions
-    subregion_names = list(region_subregions.keys())
-    if not subregion_names:
-        return None, []
-    
     # Use date as seed for consistent daily selection
     date_seed = target_date.strftime('%Y-%m-%d') + region_id
     random.seed(hash(date_seed))
@@ -90,42 +88,19 @@ def get_subregion_for_date(subregions_data, region_id, target_date):
     # Reset random seed to system time for other randomness
     random.seed()
     
-    # Get bird IDs for this subregion
-    subregion_bird_ids = set()
-    for bird_entry in region_subregions[selected_subregion]:
-        subregion_bird_ids.add(bird_entry['id'])
-    
-    return selected_subregion, subregion_bird_ids
+    return selected_subregion
 
-def filter_birds_by_subregion(birds, subregion_bird_ids):
-    """Filter birds list to only include birds from the subregion"""
-    if not subregion_bird_ids:
-        return birds
-    
-    filtered_birds = [bird for bird in birds if bird['id'] in subregion_bird_ids]
-    return filtered_birds
-
-def select_bird_for_region(birds, recent_answers, subregion_bird_ids=None):
-    """Select a random bird that hasn't been used recently, optionally filtered by subregion"""
-    # First filter by subregion if provided
-    if subregion_bird_ids:
-        birds = filter_birds_by_subregion(birds, subregion_bird_ids)
-        if not birds:
-            print("Warning: No birds available in subregion. Using all region birds.")
-            # Fall back to all birds in region if subregion filtering yields no results
-            return None
-    
-    # Then filter by recent answers
-    available_birds = [bird for bird in birds if bird['id'] not in recent_answers]
-    
-    if not available_birds:
-        print("Warning: No birds available that haven't been used recently. Using all birds.")
-        available_birds = birds
-    
-    if not available_birds:
-        return None
-        
-    return random.choice(available_birds)
+def get_region_presence(presence_cache, subregions_data, region_id, region_birds):
+    """Build (once per run) the presence matrix for a region over its birds.json order"""
+    if region_id not in presence_cache:
+        # Imported on first use: numpy is only needed once a region has subregion data
+        from subregion_presence import SubregionPresence
+        region_subregions = subregions_data.get(region_id, {})
+        presence_cache[region_id] = (
+            SubregionPresence(region_subregions, [bird['id'] for bird in region_birds])
+            if region_subregions else None
+        )
+    return presence_cache[region_id]
 
 def update_history(history, daily_data, current_date):
     """Update history with yesterday's answers from daily.json"""
@@ -143,67 +118,34 @@ def update_history(history, daily_data, current_date):
     
     return history
 
-def main():
-    parser = argparse.ArgumentParser(description='Generate daily bird answers')
-    parser.add_argument('--days', type=int, default=7, 
-                       help='Number of days to avoid repeating birds (default: 7)')
-    parser.add_argument('--date', type=str, 
-                       help='Date to generate for (YYYY-MM-DD, default: today)')
-    parser.add_argument('--subregions', type=str,
-                       help='Path to subregions JSON file for filtering birds by state/province')
-    
-    args = parser.parse_args()
-    
-    # Set up paths
-    base_path = Path('./public/data')
-    regions_path = base_path / 'regions.json'
-    birds_path = base_path / 'birds.json'
-    history_path = base_path / 'history.json'
-    daily_path = base_path / 'daily.json'
-    
-    # Parse target date
-    if args.date:
-        try:
-            target_date = datetime.strptime(args.date, '%Y-%m-%d').date()
-        except ValueError:
-            print("Error: Date must be in YYYY-MM-DD format")
-            sys.exit(1)
-    else:
-        target_date = datetime.now().date()
-    
+def parse_date(value, flag):
+    """Parse a YYYY-MM-DD command-line date, exiting with an error message if invalid"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        print(f"Error: {flag} must be in YYYY-MM-DD format")
+        sys.exit(1)
+
+def generate_daily_entries(regions, birds_data, subregions_data, history, target_date, days, presence_cache=None,
+                           engine=None):
+    """
+    Select one bird per region for target_date.
+    Appends each selection to history (in memory) and returns the new daily entries.
+    presence_cache holds per-region SubregionPresence matrices across calls, and
+    engine (a daily_selection.SelectionEngine, uniform by default) its alias tables.
+    """
+    if presence_cache is None:
+        presence_cache = {}
+    if engine is None:
+        engine = SelectionEngine()
     target_date_str = target_date.strftime('%Y-%m-%d')
-    
-    print(f"Generating daily birds for {target_date_str}")
-    print(f"Avoiding repeats within {args.days} days")
-    
-    # Load subregions data if provided
-    subregions_data = {}
-    if args.subregions:
-        subregions_path = Path(args.subregions)
-        if subregions_path.exists():
-            subregions_data = load_json_file(subregions_path)
-            print(f"Loaded subregions data from {args.subregions}")
-        else:
-            print(f"Warning: Subregions file {args.subregions} not found, proceeding without subregion filtering")
-    
-    # Load data files
-    regions = load_json_file(regions_path)
-    birds_data = load_json_file(birds_path)
-    history = load_json_file(history_path)
-    current_daily = load_json_file(daily_path)
-    
-    # Update history with yesterday's data (if we can determine the bird IDs)
-    # Note: This is simplified - in practice you might want to store bird IDs in daily.json
-    history = update_history(history, current_daily, target_date)
-    
-    # Generate new daily answers
     new_daily = []
     
     for region in regions:
         region_id = region['id']
         region_name = region['name']
         
-        print(f"\nProcessing region: {region_name} ({region_id})")
+        print(f"\nProcessing region: {region_name} ({region_id}) for {target_date_str}")
         
         # Get birds for this region
         region_birds = birds_data.get(region_id, [])
@@ -215,32 +157,27 @@ def main():
         
         # Get subregion filtering if available
         selected_subregion = None
-        subregion_bird_ids = set()
+        presence = None
         
         if subregions_data:
-            selected_subregion, subregion_bird_ids = get_subregion_for_date(
-                subregions_data, region_id, target_date
-            )
+            presence = get_region_presence(presence_cache, subregions_data, region_id, region_birds)
             
-            if selected_subregion:
+            if presence is not None:
+                selected_subregion = choose_subregion_for_date(presence.subregion_names, region_id, target_date)
                 print(f"Selected subregion: {selected_subregion}")
-                print(f"Subregion has {len(subregion_bird_ids)} bird species")
-                
-                # Filter region birds by subregion
-                subregion_filtered_birds = filter_birds_by_subregion(region_birds, subregion_bird_ids)
-                print(f"After subregion filtering: {len(subregion_filtered_birds)} birds available")
+                print(f"Subregion has {len(subregions_data[region_id][selected_subregion])} bird species")
+                print(f"After subregion filtering: {int(presence.mask(selected_subregion).sum())} birds available")
             else:
                 print("No subregion data available for this region")
         
         # Get recent answers for this region
-        recent_answers = get_recent_answers(history, region_id, args.days, target_date)
+        recent_answers = get_recent_answers(history, region_id, days, target_date)
         print(f"Recent answers to avoid: {recent_answers}")
         
         # Select a bird
-        selected_bird = select_bird_for_region(
-            region_birds, recent_answers, 
-            subregion_bird_ids if selected_subregion else None
-        )
+        selector = engine.selector(region_id, region_birds, presence, subregions_data.get(region_id) if subregions_data else None)
+        selected_bird = selector.select(history.region(region_id), to_ordinal(target_date), days,
+                                        engine.family_days, selected_subregion)
         
         if not selected_bird:
             print(f"Error: Could not select a bird for region {region_id}")
@@ -263,10 +200,6 @@ def main():
         
         new_daily.append(daily_entry)
         
-        # Update history for future runs
-        if region_id not in history:
-            history[region_id] = []
-        
         # Add today's selection to history (for future reference)
         history_entry = {
             'date': target_date_str,
@@ -277,20 +210,182 @@ def main():
         if selected_subregion:
             history_entry['subregion'] = selected_subregion
             
-        history[region_id].append(history_entry)
+        history.region(region_id).add(history_entry, target_date)
+    
+    return new_daily
+
+def prune_history(history, cutoff_date):
+    """Drop history entries on or before cutoff_date"""
+    for region_history in history.regions.values():
+        region_history.prune(cutoff_date)
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate daily bird answers')
+    parser.add_argument('--days', type=int, default=7, 
+                       help='Number of days to avoid repeating birds (default: 7)')
+    parser.add_argument('--date', type=str, 
+                       help='Date to generate for (YYYY-MM-DD, default: today)')
+    parser.add_argument('--start', type=str,
+                       help='First date of a batch to generate (YYYY-MM-DD, requires --end)')
+    parser.add_argument('--end', type=str,
+                       help='Last date of a batch to generate, inclusive (YYYY-MM-DD, requires --start)')
+    parser.add_argument('--days-ahead', type=int, default=0,
+                       help='Also generate this many days after --date (default: 0)')
+    parser.add_argument('--force', action='store_true',
+                       help='Regenerate dates that are already scheduled in daily.json')
+    parser.add_argument('--subregions', type=str,
+                       help='Path to subregions JSON file for filtering birds by state/province')
+    parser.add_argument('--weight-by', nargs='+', choices=WEIGHT_FACTORS, default=[],
+                       help='Weight draws by observation frequency, audio clip count and/or difficulty tier (default: uniform)')
+    parser.add_argument('--family-days', type=int, default=0,
+                       help='Avoid repeating a bird family within this many days (default: 0, off)')
+    parser.add_argument('--difficulty', type=str,
+                       help='JSON file of {region: {bird id: tier}} for --weight-by difficulty')
+    parser.add_argument('--tier-weights', type=float, nargs='+',
+                       help='Weight of tier 1, 2, ... for --weight-by difficulty (default: 3 2 1)')
+    add_store_argument(parser)
+    add_metrics_arguments(parser)
+    
+    args = parser.parse_args()
+    if 'difficulty' in args.weight_by and not args.difficulty:
+        parser.error('--weight-by difficulty requires --difficulty')
+    metrics = start_run('generate-daily-birds', args)
+    
+    # Set up paths
+    base_path = Path('./public/data')
+    regions_path = base_path / 'regions.json'
+    birds_path = base_path / 'birds.json'
+    history_path = base_path / 'history.json'
+    daily_path = base_path / 'daily.json'
+    daily_shard_dir = base_path / 'daily'
+    
+    # Work out the dates to generate
+    if args.start or args.end:
+        if not (args.start and args.end):
+            print("Error: --start and --end must be used together")
+            sys.exit(1)
+        if args.date or args.days_ahead:
+            print("Error: --start/--end cannot be combined with --date/--days-ahead")
+            sys.exit(1)
+        start_date = parse_date(args.start, '--start')
+        end_date = parse_date(args.end, '--end')
+    else:
+        start_date = parse_date(args.date, '--date') if args.date else datetime.now().date()
+        end_date = start_date + timedelta(days=args.days_ahead)
+    
+    if end_date < start_date:
+        print("Error: End date must not be before start date")
+        sys.exit(1)
+    
+    target_dates = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+    
+    if len(target_dates) == 1:
+        print(f"Generating daily birds for {start_date}")
+    else:
+        print(f"Generating daily birds for {start_date} to {end_date} ({len(target_dates)} days)")
+    print(f"Avoiding repeats within {args.days} days")
+    
+    with metrics.span('load'):
+        # History and subregion observations can come from the pipeline store
+        store = PipelineStore(args.store) if args.store else None
         
-        # Keep only recent history (optional cleanup)
-        cutoff_date = target_date - timedelta(days=args.days * 2)  # Keep double the avoidance period
-        history[region_id] = [
-            entry for entry in history[region_id]
-            if datetime.strptime(entry['date'], '%Y-%m-%d').date() > cutoff_date
-        ]
+        # Load subregions data if provided
+        subregions_data = {}
+        if args.subregions:
+            subregions_path = Path(args.subregions)
+            if subregions_path.exists():
+                subregions_data = load_json_file(subregions_path)
+                metrics.file_read(subregions_path)
+                print(f"Loaded subregions data from {args.subregions}")
+            else:
+                print(f"Warning: Subregions file {args.subregions} not found, proceeding without subregion filtering")
+        elif store:
+            subregions_data = store.load_subregions()
+            if subregions_data:
+                print(f"Loaded subregions data from store {args.store}")
+        
+        # Load data files once for the whole batch
+        regions = load_json_file(regions_path)
+        birds_data = load_json_file(birds_path)
+        stored_history = store.load_history() if store else {}
+        if stored_history:
+            print(f"Loaded history from store {args.store}")
+        history = HistoryIndex(stored_history or load_json_file(history_path))
+        current_daily = load_json_file(daily_path)
+        for path in (regions_path, birds_path, daily_path) + (() if stored_history else (history_path,)):
+            metrics.file_read(path)
+    
+    # Update history with yesterday's data (if we can determine the bird IDs)
+    # Note: This is simplified - in practice you might want to store bird IDs in daily.json
+    history = update_history(history, current_daily, start_date)
+    
+    # Entries already scheduled (e.g. pre-staged by an earlier batch) are kept unless --force
+    scheduled = {(entry['date'], entry['region']) for entry in current_daily}
+    presence_cache = {}
+    tiers = load_json_file(args.difficulty) if args.difficulty else {}
+    tier_weights = {tier: weight for tier, weight in enumerate(args.tier_weights, 1)} if args.tier_weights else None
+    engine = SelectionEngine(args.weight_by, args.family_days, tiers, tier_weights)
+    if args.weight_by or args.family_days:
+        print(f"Weighting by {', '.join(args.weight_by) or 'nothing'}, "
+              f"avoiding repeated families within {args.family_days} days")
+    generated = set()
+    new_daily = []
+    
+    with metrics.span('select'):
+        for target_date in target_dates:
+            target_date_str = target_date.strftime('%Y-%m-%d')
+            pending_regions = [
+                region for region in regions
+                if args.force or (target_date_str, region['id']) not in scheduled
+            ]
+            if not pending_regions:
+                print(f"\n{target_date_str} already scheduled, skipping (use --force to regenerate)")
+                continue
+        
+            if args.force:
+                # Forget earlier selections for this date so they don't count as recent
+                for region in pending_regions:
+                    history.region(region['id']).remove_day(target_date)
+        
+            with metrics.span(target_date_str):
+                entries = generate_daily_entries(
+                    pending_regions, birds_data, subregions_data, history, target_date, args.days, presence_cache,
+                    engine
+                )
+            generated.update((entry['date'], entry['region']) for entry in entries)
+            new_daily.extend(entries)
+    
+    # Keep still-upcoming scheduled entries that were not regenerated
+    start_date_str = start_date.strftime('%Y-%m-%d')
+    kept_daily = [
+        entry for entry in current_daily
+        if entry['date'] >= start_date_str and (entry['date'], entry['region']) not in generated
+    ]
+    region_order = {region['id']: position for position, region in enumerate(regions)}
+    new_daily = sorted(
+        kept_daily + new_daily,
+        key=lambda entry: (entry['date'], region_order.get(entry['region'], len(region_order)))
+    )
+    
+    # Keep only recent history (optional cleanup)
+    cutoff_date = start_date - timedelta(days=args.days * 2)  # Keep double the avoidance period
+    prune_history(history, cutoff_date)
     
     # Save updated files
-    save_json_file(daily_path, new_daily)
-    save_json_file(history_path, history)
+    with metrics.span('save'):
+        save_json_file(daily_path, new_daily)
+        save_json_file(history_path, history.to_json())
+        if store:
+            store.replace_history(history.to_json())
+            store.close()
+        written_shards = write_daily_shards(daily_shard_dir, new_daily)
+        for path in [daily_path, history_path] + [daily_shard_dir / f'{date_str}.json' for date_str in written_shards]:
+            metrics.file_written(path)
+    metrics.count('entriesGenerated', len(generated))
+    metrics.count('shardsWritten', len(written_shards))
     
-    print(f"\n✓ Generated daily.json with {len(new_daily)} entries")
+    print(f"\n✓ Generated daily.json with {len(new_daily)} entries ({len(generated)} new)")
+    print(f"✓ Wrote {len(written_shards)} daily shard(s) to {daily_shard_dir}")
     print(f"✓ Updated history.json")
     print(f"✓ Files saved to {base_path}")
     
@@ -301,4 +396,4 @@ def main():
         print(f"  {entry['region']}: {entry['answerHash']} ({entry['date']}){subregion_info}")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    run_main(main)
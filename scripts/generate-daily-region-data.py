@@ -2,66 +2,188 @@ import os
 import json
 import random
 import argparse
-import requests
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from functools import partial
 
-def main():
-    # Load API key from .env
-    load_dotenv()
-    api_key = os.getenv('EBIRD_API_KEY')
-    if not api_key:
-        raise ValueError("EBIRD_API_KEY not found in .env")
+from ebird_client import add_client_arguments, client_from_args
+from instrumentation import add_metrics_arguments, run_main, start_run
+from observation_store import DEFAULT_WINDOW_DAYS, ObservationStore
+from pipeline_store import PipelineStore, add_store_argument
+
+def region_prefix_for(subregions_file):
+    """Infer the top-level region key (e.g. 'us') from a '<region>-subregions.json' filename"""
+    return os.path.basename(subregions_file).split('-')[0].lower()
+
+def load_subregions(subregions_file):
+    with open(subregions_file, 'r') as f:
+        subregions = json.load(f)
+
+    if not subregions:
+        raise ValueError(f"Subregions list in {subregions_file} is empty.")
+
+    return subregions
+
+def fetch_observations(client, region_code, back=None):
+    """Fetch the latest observation of each species seen in a subregion in the last `back` days (API default 14)"""
+    params = {'back': back} if back else None
+    return client.get_json(f'data/obs/{region_code}/recent', params=params, endpoint='data/obs/{region}/recent')
+
+def fetch_species_ids(client, region_code):
+    """Fetch recent observations for a subregion and return its sorted unique species codes"""
+    return sorted({obs['speciesCode'] for obs in fetch_observations(client, region_code)})
+
+def fetch_subregion_species(client, prefix, subregion):
+    return fetch_species_ids(client, subregion['code'])
 
+def fetch_subregion_observations(observation_store, today, client, prefix, subregion):
+    """Fetch only the days since the subregion's last sync in the observation store"""
+    back = observation_store.back_days(prefix, subregion['code'], today)
+    return fetch_observations(client, subregion['code'], back)
+
+def fetch_all_subregions(client, jobs, workers, fetch=fetch_subregion_species, label='species'):
+    """
+    Fetch every (region_prefix, subregion) job concurrently with
+    fetch(client, prefix, subregion), by default the sorted species ids;
+    label names what fetch returns in the progress log.
+    Returns {region_prefix: {subregion_name: result}} in input order,
+    skipping subregions whose request failed.
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(fetch, client, prefix, subregion): (prefix, subregion)
+            for prefix, subregion in jobs
+        }
+        for future in as_completed(futures):
+            prefix, subregion = futures[future]
+            try:
+                results[(prefix, subregion['name'])] = future.result()
+                print(f"✅ {subregion['name']} ({subregion['code']}): {len(results[(prefix, subregion['name'])])} {label}")
+            except Exception as e:
+                print(f"❌ {subregion['name']} ({subregion['code']}): {e}")
+
+    # Rebuild in the original subregion order so the output is stable between runs
+    merged = {}
+    for prefix, subregion in jobs:
+        key = (prefix, subregion['name'])
+        if key in results:
+            merged.setdefault(prefix, {})[subregion['name']] = results[key]
+    return merged
+
+def fetched_count(output):
+    return sum(len(subregions) for subregions in output.values())
+
+def main():
     # Parse CLI arguments
-    parser = argparse.ArgumentParser(description='Fetch recent eBird observations for a random subregion.')
-    parser.add_argument('subregions_file', help='Path to the subregions JSON file')
+    parser = argparse.ArgumentParser(description='Fetch recent eBird observations for a random subregion, or for every subregion with --all.')
+    parser.add_argument('subregions_files', nargs='+', metavar='subregions_file', help='Path(s) to subregions JSON files (e.g. us-subregions.json)')
     parser.add_argument('output_file', help='Path to save the output JSON file')
+    parser.add_argument('--all', action='store_true', help='Fetch every subregion in every subregions file instead of one random subregion')
+    parser.add_argument('--workers', type=int, default=8, help='Number of concurrent requests (default: 8)')
+    add_client_arguments(parser)
+    parser.add_argument('--observations', metavar='PATH',
+                        help='Rolling observation store: fetch only the days since each subregion\'s last sync and merge them in')
+    parser.add_argument('--window-days', type=int, default=DEFAULT_WINDOW_DAYS,
+                        help=f'With --observations, keep observations this many days (default: {DEFAULT_WINDOW_DAYS})')
+    parser.add_argument('--abundance', action='store_true',
+                        help='With --observations, add lastSeen and count to each species in the output')
+    parser.add_argument('--date', help='With --observations, the sync date (YYYY-MM-DD, default: today)')
+    add_store_argument(parser)
+    add_metrics_arguments(parser)
     args = parser.parse_args()
+    if (args.abundance or args.date) and not args.observations:
+        parser.error('--abundance and --date require --observations')
+    metrics = start_run('generate-daily-region-data', args)
 
-    # Infer top-level region from filename
-    region_prefix = os.path.basename(args.subregions_file).split('-')[0].lower()
+    # Build the (region_prefix, subregion) jobs to fetch
+    jobs = []
+    all_subregions = []
+    with metrics.span('load'):
+        for subregions_file in args.subregions_files:
+            prefix = region_prefix_for(subregions_file)
+            subregions = load_subregions(subregions_file)
+            metrics.file_read(subregions_file)
+            all_subregions.extend((prefix, subregion) for subregion in subregions)
 
-    # Load subregions
-    with open(args.subregions_file, 'r') as f:
-        subregions = json.load(f)
+            if args.all:
+                jobs.extend((prefix, subregion) for subregion in subregions)
+            else:
+                # Pick a random subregion
+                selected = random.choice(subregions)
+                print(f"Selected subregion: {selected['name']} ({selected['code']})")
+                jobs.append((prefix, selected))
 
-    if not subregions:
-        raise ValueError("Subregions list is empty.")
+    observation_store = None
+    fetch, label = fetch_subregion_species, 'species'
+    if args.observations:
+        observation_store = ObservationStore(args.observations, args.window_days)
+        today = date.fromisoformat(args.date) if args.date else date.today()
+        fetch, label = partial(fetch_subregion_observations, observation_store, today), 'observations'
 
-    # Pick a random subregion
-    selected = random.choice(subregions)
-    region_code = selected['code']
-    subregion_name = selected['name']
+    print(f"Fetching {len(jobs)} subregion(s) with {min(args.workers, len(jobs))} worker(s)...")
 
-    print(f"Selected subregion: {subregion_name} ({region_code})")
+    # One pooled, rate-limited client shared by every worker (API key loaded from .env)
+    with metrics.span('fetch'), client_from_args(args, pool_size=args.workers) as client:
+        metrics.attach_http(client)
+        fetched = fetch_all_subregions(client, jobs, args.workers, fetch, label)
+    metrics.count('subregionsRequested', len(jobs))
+    metrics.count('subregionsFetched', fetched_count(fetched))
 
-    # Query eBird API
-    url = f'https://api.ebird.org/v2/data/obs/{region_code}/recent'
-    headers = {'X-eBirdApiToken': api_key}
-    response = requests.get(url, headers=headers)
+    print("eBird API usage:")
+    client.print_metrics()
 
-    if response.status_code != 200:
-        raise RuntimeError(f"Failed to fetch data from eBird API: {response.status_code} {response.text}")
+    if not fetched:
+        raise RuntimeError("Failed to fetch observations for every requested subregion.")
 
-    observations = response.json()
+    if observation_store:
+        # Merge the deltas, age out old days, and publish every synced subregion
+        with metrics.span('merge'):
+            codes = {(prefix, subregion['name']): subregion['code'] for prefix, subregion in jobs}
+            added = sum(
+                observation_store.merge(prefix, codes[(prefix, name)], name, observations, today)
+                for prefix, subregions in fetched.items()
+                for name, observations in subregions.items()
+            )
+            expired = observation_store.expire(today)
+            output = observation_store.to_subregion_birds(all_subregions, args.abundance)
+        stats = observation_store.stats()
+        metrics.count('speciesDaysAdded', added)
+        metrics.count('speciesDaysExpired', expired)
+        print(f"Merged {added} new species-days, expired {expired} older than {args.window_days} days "
+              f"({stats['species']} species across {stats['subregions']} subregions)")
+    else:
+        # Build output structure
+        output = {
+            prefix: {
+                subregion_name: [
+                    {'id': species_id} for species_id in unique_ids
+                ]
+                for subregion_name, unique_ids in subregions.items()
+            }
+            for prefix, subregions in fetched.items()
+        }
 
-    # Extract unique species codes
-    unique_ids = sorted({obs['speciesCode'] for obs in observations})
+    # Update the output subregions in the pipeline store
+    with metrics.span('save'):
+        if observation_store:
+            observation_store.save()
+            metrics.file_written(args.observations)
+            print(f"Observation store saved to {args.observations}")
 
-    # Build output structure
-    output = {
-        region_prefix: {
-            subregion_name: [
-                {'id': species_id} for species_id in unique_ids
-            ]
-        }
-    }
+        if args.store:
+            with PipelineStore(args.store) as store:
+                for prefix, subregions in output.items():
+                    for subregion_name, species in subregions.items():
+                        store.set_subregion_species(prefix, subregion_name, [entry['id'] for entry in species])
+            print(f"Updated {fetched_count(output)} subregions in store {args.store}")
 
-    # Save to output file
-    with open(args.output_file, 'w') as out_f:
-        json.dump(output, out_f, indent=2)
+        # Save to output file
+        with open(args.output_file, 'w') as out_f:
+            json.dump(output, out_f, indent=2)
+        metrics.file_written(args.output_file)
 
-    print(f"Output written to {args.output_file}")
+    print(f"Output written to {args.output_file} ({fetched_count(fetched)}/{len(jobs)} subregions fetched)")
 
 if __name__ == '__main__':
-    main()
+    run_main(main)
@@ -0,0 +1,119 @@
+"""
+On-disk HTTP cache for the eBird reference-data scripts.
+
+Responses are keyed by URL and query parameters (never by headers, so the API
+token is not part of the key) and streamed to <cache_dir>/<key>.body, with
+validators and fetch time in <cache_dir>/<key>.json. Entries younger than the
+TTL are served without touching the network; older ones are revalidated with
+If-None-Match / If-Modified-Since, and a 304 just refreshes the fetch time.
+In offline mode any cached entry is served regardless of age.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_CACHE_DIR = os.getenv('EBIRD_CACHE_DIR', '.cache/ebird')
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+class CacheMiss(LookupError):
+    """Raised in offline mode when a response is not cached."""
+
+
+def cache_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    canonical = json.dumps([url, sorted((params or {}).items())], separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class HttpCache:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl: float = DEFAULT_TTL, offline: bool = False):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.offline = offline
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def paths(self, key: str):
+        return os.path.join(self.cache_dir, f'{key}.body'), os.path.join(self.cache_dir, f'{key}.json')
+
+    def load_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        body_path, meta_path = self.paths(key)
+        if not (os.path.exists(body_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_meta(self, key: str, meta: Dict[str, Any]) -> None:
+        _, meta_path = self.paths(key)
+        tmp_path = meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, meta_path)
+
+    def fetch(self, session, url: str, params: Optional[Dict[str, Any]] = None,
+              headers: Optional[Dict[str, str]] = None, timeout: float = 60) -> str:
+        """
+        Return the path of a file holding the response body for url + params,
+        fetching or revalidating through session (a requests.Session) as needed.
+        """
+        key = cache_key(url, params)
+        body_path, _ = self.paths(key)
+        meta = self.load_meta(key)
+
+        if meta is not None and (self.offline or time.time() - meta['fetchedAt'] < self.ttl):
+            self.stats['hits'] += 1
+            return body_path
+        if self.offline:
+            raise CacheMiss(f"{url} is not cached in {self.cache_dir} (offline mode)")
+
+        request_headers = dict(headers or {})
+        if meta is not None:
+            if meta.get('etag'):
+                request_headers['If-None-Match'] = meta['etag']
+            if meta.get('lastModified'):
+                request_headers['If-Modified-Since'] = meta['lastModified']
+
+        with session.get(url, params=params, headers=request_headers, stream=True, timeout=timeout) as response:
+            if response.status_code == 304 and meta is not None:
+                self.stats['revalidated'] += 1
+                meta['fetchedAt'] = time.time()
+                self.save_meta(key, meta)
+                return body_path
+
+            response.raise_for_status()
+            tmp_path = body_path + '.tmp'
+            size = 0
+            with open(tmp_path, 'wb') as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    size += len(chunk)
+            os.replace(tmp_path, body_path)
+
+            self.stats['misses'] += 1
+            self.save_meta(key, {
+                'url': url,
+                'params': params or {},
+                'etag': response.headers.get('ETag'),
+                'lastModified': response.headers.get('Last-Modified'),
+                'contentType': response.headers.get('Content-Type'),
+                'bytes': size,
+                'fetchedAt': time.time(),
+            })
+        return body_path
+
+
+def add_cache_arguments(parser) -> None:
+    """Add the shared --cache-dir / --cache-ttl / --offline options to an argparse parser."""
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f'Directory for cached API responses (default: $EBIRD_CACHE_DIR or {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL / 3600,
+                        help='Hours before a cached response is revalidated (default: 168)')
+    parser.add_argument('--offline', action='store_true', help='Only use cached responses, never the network')
+
+
+def cache_from_args(args) -> HttpCache:
+    return HttpCache(args.cache_dir, args.cache_ttl * 3600, args.offline)
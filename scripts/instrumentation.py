@@ -0,0 +1,231 @@
+"""
+Lightweight run instrumentation shared by the pipeline scripts.
+
+    metrics = start_run('generate-daily-birds', args)   # after parse_args()
+    with metrics.span('load'):
+        data = load_json_file(path)
+        metrics.file_read(path)
+    metrics.attach_http(client)                          # report EBirdClient counters
+
+    if __name__ == '__main__':
+        run_main(main)                                   # records how main() exits
+
+With --metrics PATH (or $BIRDLE_METRICS_DIR, which gets <script>.json), a JSON
+report is written when the process exits, including exits through sys.exit
+(with their exit code), uncaught exceptions and SIGTERM (e.g. the workflow
+timeout). The report holds:
+- timed spans, nested by name path (e.g. "select/us")
+- counters
+- bytes read and written
+- eBird API request counts and latencies
+- peak RSS
+
+--profile PATH also dumps a cProfile of the whole run for snakeviz/pstats.
+Without either flag nothing is written, and a span costs a couple of microseconds.
+"""
+
+import atexit
+import json
+import os
+import signal
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # not available on Windows; peak RSS is then omitted
+    resource = None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class RunMetrics:
+    def __init__(self, script: str, metrics_path: Optional[str] = None, profile_path: Optional[str] = None):
+        self.script = script
+        self.metrics_path = metrics_path
+        self.profile_path = profile_path
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.stack: List[Tuple[str, float]] = []
+        self.counters: Dict[str, float] = {}
+        self.io = {'bytesRead': 0, 'bytesWritten': 0, 'filesRead': 0, 'filesWritten': 0}
+        self.clients = []
+        self.status = 'running'
+        self.error: Optional[str] = None
+        self.profiler = None
+        self.finished = False
+
+        if profile_path:
+            import cProfile  # Only profiled runs pay for the import
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time a stage; nested spans are recorded as "outer/inner"."""
+        path = '/'.join([outer for outer, _ in self.stack] + [name])
+        start = time.perf_counter()
+        self.stack.append((path, start))
+        try:
+            yield
+        finally:
+            self.stack.pop()
+            self.spans.append(self.span_record(path, start))
+
+    def span_record(self, path: str, start: float, finished: bool = True) -> Dict[str, Any]:
+        record = {
+            'name': path,
+            'start': round(start - self.start, 6),
+            'seconds': round(time.perf_counter() - start, 6),
+        }
+        if not finished:
+            record['finished'] = False
+        return record
+
+    def count(self, name: str, value: float = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def file_read(self, path) -> None:
+        if os.path.exists(path):
+            self.io['bytesRead'] += os.path.getsize(path)
+            self.io['filesRead'] += 1
+
+    def file_written(self, path) -> None:
+        if os.path.exists(path):
+            self.io['bytesWritten'] += os.path.getsize(path)
+            self.io['filesWritten'] += 1
+
+    def attach_http(self, client) -> None:
+        """
+        Include an EBirdClient's per-endpoint request/retry/byte/latency counters.
+        They are read when the report is written, so a run cut short mid-fetch
+        still reports the requests it made.
+        """
+        self.clients.append(client)
+
+    def http_report(self) -> Dict[str, Any]:
+        merged: Dict[str, Any] = {}
+        for client in self.clients:
+            for endpoint, stats in client.metrics().items():
+                totals = merged.setdefault(endpoint, {'requests': 0, 'errors': 0, 'retries': 0, 'bytes': 0,
+                                                      'seconds': 0.0, 'maxSeconds': 0.0, 'waitSeconds': 0.0})
+                for key in ('requests', 'errors', 'retries', 'bytes', 'seconds', 'waitSeconds'):
+                    totals[key] += stats[key]
+                totals['maxSeconds'] = max(totals['maxSeconds'], stats['maxSeconds'])
+        for totals in merged.values():
+            attempts = totals['requests'] + totals['retries']
+            totals['meanSeconds'] = totals['seconds'] / attempts if attempts else 0.0
+        return merged
+
+    def report(self) -> Dict[str, Any]:
+        # Spans still open (SIGTERM or an exception mid-stage) are reported up to now
+        spans = self.spans + [self.span_record(path, start, finished=False) for path, start in self.stack]
+        totals: Dict[str, float] = {}
+        for span in spans:
+            totals[span['name']] = round(totals.get(span['name'], 0.0) + span['seconds'], 6)
+        return {
+            'script': self.script,
+            'status': self.status,
+            'error': self.error,
+            'startedAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.started)),
+            'seconds': round(time.perf_counter() - self.start, 6),
+            'peakRssBytes': peak_rss_bytes(),
+            'stageSeconds': totals,
+            'spans': sorted(spans, key=lambda span: span['start']),
+            'counters': self.counters,
+            'io': self.io,
+            'http': self.http_report(),
+            'argv': sys.argv[1:],
+        }
+
+    def finish(self, status: str = 'ok', error: Optional[str] = None) -> None:
+        """Write the metrics report and profile once; later calls are ignored."""
+        if self.finished:
+            return
+        self.finished = True
+        self.status = status
+        self.error = error
+
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profile_path)
+            print(f"cProfile written to {self.profile_path}", file=sys.stderr)
+
+        if self.metrics_path:
+            directory = os.path.dirname(self.metrics_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.metrics_path, 'w', encoding='utf-8') as f:
+                json.dump(self.report(), f, indent=2)
+            print(f"Metrics written to {self.metrics_path}", file=sys.stderr)
+
+
+def add_metrics_arguments(parser) -> None:
+    """Add the shared --metrics / --profile options to an argparse parser."""
+    parser.add_argument('--metrics', help='Write a JSON report of stage timings, I/O, HTTP and peak RSS here '
+                                          '(default: $BIRDLE_METRICS_DIR/<script>.json when set)')
+    parser.add_argument('--profile', help='Dump a cProfile of the run to this file')
+
+
+# The run started by start_run(), for run_main() to record its exit in
+current_run: Optional[RunMetrics] = None
+
+
+def start_run(script: str, args=None) -> RunMetrics:
+    """Create the run's metrics and arrange for the report to be written however the process exits."""
+    metrics_path = getattr(args, 'metrics', None)
+    if not metrics_path and os.getenv('BIRDLE_METRICS_DIR'):
+        metrics_path = os.path.join(os.getenv('BIRDLE_METRICS_DIR'), f'{script}.json')
+    metrics = RunMetrics(script, metrics_path, getattr(args, 'profile', None))
+    global current_run
+    current_run = metrics
+
+    previous_hook = sys.excepthook
+
+    def excepthook(exc_type, exc, tb):
+        metrics.finish('error', f'{exc_type.__name__}: {exc}')
+        previous_hook(exc_type, exc, tb)
+
+    def on_sigterm(signum, frame):
+        metrics.finish('terminated', f'signal {signum}')
+        sys.exit(128 + signum)
+
+    sys.excepthook = excepthook
+    signal.signal(signal.SIGTERM, on_sigterm)
+    # Normal returns; run_main() has already written the report for every other exit
+    atexit.register(metrics.finish)
+    return metrics
+
+
+def run_main(main: Callable[[], Any]) -> None:
+    """
+    Call a script's main() and record how it ended in the current run's
+    report: sys.exit codes, exceptions and Ctrl-C. atexit hooks cannot see the
+    exit code, so instrumented scripts call this from their __main__ block.
+    """
+    try:
+        main()
+    except SystemExit as e:
+        if current_run is not None:
+            if e.code in (None, 0):
+                current_run.finish()
+            else:
+                current_run.finish('error', f'exit code {e.code}')
+        raise
+    except KeyboardInterrupt:
+        if current_run is not None:
+            current_run.finish('terminated', 'KeyboardInterrupt')
+        raise
+    except BaseException as e:
+        if current_run is not None:
+            current_run.finish('error', f'{type(e).__name__}: {e}')
+        raise
@@ -0,0 +1,149 @@
+"""
+Rolling-window store of recent observations per subregion.
+
+generate-daily-region-data.py --observations keeps this file between runs so
+each night only the days since a subregion's last sync are requested (the
+API's `back` parameter), merged in, and aged out after `window_days`:
+
+    {"version": 1, "windowDays": 14,
+     "regions": {"us": {"US-CA": {"name": "California", "lastSync": "2026-10-17",
+                                  "species": {"amecro": {"2026-10-15": 3, "2026-10-16": 12}}}}}}
+
+Each species maps observation dates to the highest `howMany` reported for that
+day, so refetching an overlapping day is idempotent. The species' abundance is
+the sum over its days and its last-seen date is the latest one. The file is
+written one species per line to keep nightly diffs small.
+"""
+
+import json
+import os
+from datetime import date
+from typing import Any, Dict, Iterable, List, Tuple
+
+STORE_VERSION = 1
+DEFAULT_WINDOW_DAYS = 14
+MAX_BACK_DAYS = 30  # eBird's limit for data/obs/{region}/recent
+
+
+class ObservationStore:
+    def __init__(self, path: str, window_days: int = DEFAULT_WINDOW_DAYS):
+        self.path = path
+        self.window_days = window_days
+        self.regions: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == STORE_VERSION:
+                self.regions = data.get('regions', {})
+
+    def subregion(self, prefix: str, code: str, name: str) -> Dict[str, Any]:
+        entry = self.regions.setdefault(prefix, {}).setdefault(code, {'name': name, 'lastSync': None, 'species': {}})
+        entry['name'] = name
+        return entry
+
+    def back_days(self, prefix: str, code: str, today: date) -> int:
+        """
+        Days to request for a subregion: everything since its last sync plus
+        one day of overlap for late-submitted checklists, or the whole window
+        on the first sync.
+        """
+        last_sync = self.regions.get(prefix, {}).get(code, {}).get('lastSync')
+        if not last_sync:
+            return min(self.window_days, MAX_BACK_DAYS)
+        days = (today - date.fromisoformat(last_sync)).days + 1
+        return max(1, min(days, self.window_days, MAX_BACK_DAYS))
+
+    def merge(self, prefix: str, code: str, name: str, observations: Iterable[Dict[str, Any]], today: date) -> int:
+        """Merge fetched observations into a subregion. Returns the number of new species-days."""
+        entry = self.subregion(prefix, code, name)
+        added = 0
+        for observation in observations:
+            day = observation['obsDt'][:10]
+            # howMany is absent when observers only record presence ("X")
+            count = observation.get('howMany') or 1
+            days = entry['species'].setdefault(observation['speciesCode'], {})
+            if day not in days:
+                added += 1
+            days[day] = max(days.get(day, 0), count)
+        entry['lastSync'] = today.isoformat()
+        return added
+
+    def expire(self, today: date) -> int:
+        """Drop species-days older than the window, and species left without any. Returns days dropped."""
+        cutoff = date.fromordinal(today.toordinal() - self.window_days).isoformat()
+        dropped = 0
+        for subregions in self.regions.values():
+            for entry in subregions.values():
+                for species_code in list(entry['species']):
+                    days = entry['species'][species_code]
+                    for day in [day for day in days if day <= cutoff]:
+                        del days[day]
+                        dropped += 1
+                    if not days:
+                        del entry['species'][species_code]
+        return dropped
+
+    def species(self, prefix: str, code: str) -> List[Dict[str, Any]]:
+        """A subregion's species sorted by code, with last-seen date and summed count."""
+        days_by_species = self.regions.get(prefix, {}).get(code, {}).get('species', {})
+        return [
+            {'id': species_code, 'lastSeen': max(days), 'count': sum(days.values())}
+            for species_code, days in sorted(days_by_species.items())
+        ]
+
+    def to_subregion_birds(self, subregions: Iterable[Tuple[str, Dict[str, str]]],
+                           abundance: bool = False) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+        """
+        The daily-subregion-birds.json shape for (prefix, {code, name}) pairs, in
+        that order, skipping subregions never synced. With abundance, species
+        entries also carry lastSeen and count.
+        """
+        output: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        for prefix, subregion in subregions:
+            if not self.regions.get(prefix, {}).get(subregion['code'], {}).get('lastSync'):
+                continue
+            output.setdefault(prefix, {})[subregion['name']] = [
+                species if abundance else {'id': species['id']}
+                for species in self.species(prefix, subregion['code'])
+            ]
+        return output
+
+    def save(self) -> None:
+        """Atomically write the store, one species per line."""
+        lines = ['{', f'  "version": {STORE_VERSION},', f'  "windowDays": {self.window_days},', '  "regions": {']
+        for region_index, (prefix, subregions) in enumerate(sorted(self.regions.items())):
+            lines.append(f'    {json.dumps(prefix)}: {{')
+            for subregion_index, (code, entry) in enumerate(sorted(subregions.items())):
+                lines.append(f'      {json.dumps(code)}: {{')
+                lines.append(f'        "name": {json.dumps(entry["name"], ensure_ascii=False)},')
+                lines.append(f'        "lastSync": {json.dumps(entry["lastSync"])},')
+                species = sorted(entry['species'].items())
+                if species:
+                    lines.append('        "species": {')
+                    lines.extend(
+                        f'          {json.dumps(species_code)}: {json.dumps(dict(sorted(days.items())), separators=(", ", ": "))}'
+                        + (',' if index < len(species) - 1 else '')
+                        for index, (species_code, days) in enumerate(species)
+                    )
+                    lines.append('        }')
+                else:
+                    lines.append('        "species": {}')
+                lines.append('      }' + (',' if subregion_index < len(subregions) - 1 else ''))
+            lines.append('    }' + (',' if region_index < len(self.regions) - 1 else ''))
+        lines.extend(['  }', '}'])
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> Dict[str, int]:
+        subregions = [entry for region in self.regions.values() for entry in region.values()]
+        return {
+            'subregions': len(subregions),
+            'species': sum(len(entry['species']) for entry in subregions),
+            'speciesDays': sum(len(days) for entry in subregions for days in entry['species'].values()),
+        }
@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""
+Local SQLite store for the data pipeline.
+
+Holds the intermediates the scripts otherwise pass around as whole JSON
+documents, in indexed tables that can be updated in place:
+
+    taxonomy           full eBird taxonomy (the original record is kept as JSON)
+    region_species     region -> species codes (us.json)
+    media_urls         scraped {code, page Url, audio Url} records (-urls.jsonl)
+    history            past daily answers (history.json)
+    subregion_species  recent species per subregion (daily-subregion-birds.json)
+
+Imports are upserts, and reads are streamed from cursors in taxonomy order.
+The published JSON files are produced by the export commands (or by the
+scripts' --store options), so they stay byte-compatible with what the client
+reads today.
+
+Usage:
+    python pipeline_store.py --db ./data/pipeline.sqlite import-taxonomy ./data/ebird-taxonomy.csv
+    python pipeline_store.py --db ./data/pipeline.sqlite import-region us ./data/regions/us.json
+    python pipeline_store.py --db ./data/pipeline.sqlite import-urls ./data/regions/us-taxonomy-urls.jsonl
+    python pipeline_store.py --db ./data/pipeline.sqlite export-taxonomy us ./data/regions/us-taxonomy.json
+    python pipeline_store.py --db ./data/pipeline.sqlite stats
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import date
+from itertools import groupby, islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Next to the scripts rather than the working directory, so every script finds the same store
+DEFAULT_STORE_PATH = os.getenv('BIRDLE_STORE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'pipeline.sqlite'))
+BATCH_SIZE = 5000
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS taxonomy (
+    species_code    TEXT PRIMARY KEY,
+    sci_name        TEXT NOT NULL,
+    com_name        TEXT NOT NULL,
+    category        TEXT,
+    taxon_order     REAL,
+    "order"         TEXT,
+    family_com_name TEXT,
+    family_sci_name TEXT,
+    record          TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS taxonomy_by_order ON taxonomy (taxon_order);
+
+CREATE TABLE IF NOT EXISTS region_species (
+    region       TEXT NOT NULL,
+    species_code TEXT NOT NULL,
+    PRIMARY KEY (region, species_code)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS media_urls (
+    id           INTEGER PRIMARY KEY,
+    species_code TEXT NOT NULL,
+    page_key     TEXT NOT NULL,
+    page_url     TEXT NOT NULL,
+    audio_url    TEXT NOT NULL,
+    UNIQUE (species_code, page_key)
+);
+
+CREATE TABLE IF NOT EXISTS history (
+    id           INTEGER PRIMARY KEY,
+    region       TEXT NOT NULL,
+    day          INTEGER NOT NULL,
+    date         TEXT NOT NULL,
+    species_code TEXT NOT NULL,
+    name         TEXT,
+    subregion    TEXT
+);
+CREATE INDEX IF NOT EXISTS history_by_day ON history (region, day);
+
+CREATE TABLE IF NOT EXISTS subregion_species (
+    region       TEXT NOT NULL,
+    subregion    TEXT NOT NULL,
+    position     INTEGER NOT NULL,
+    species_code TEXT NOT NULL,
+    PRIMARY KEY (region, subregion, species_code)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS subregions (
+    region    TEXT NOT NULL,
+    subregion TEXT NOT NULL,
+    position  INTEGER NOT NULL,
+    PRIMARY KEY (region, subregion)
+) WITHOUT ROWID;
+'''
+
+# ebird-taxonomy.csv column -> taxonomy JSON key, in the key order the eBird API returns
+CSV_FIELDS = {
+    'SCIENTIFIC_NAME': 'sciName',
+    'COMMON_NAME': 'comName',
+    'SPECIES_CODE': 'speciesCode',
+    'CATEGORY': 'category',
+    'TAXON_ORDER': 'taxonOrder',
+    'BANDING_CODES': 'bandingCodes',
+    'COM_NAME_CODES': 'comNameCodes',
+    'SCI_NAME_CODES': 'sciNameCodes',
+    'ORDER': 'order',
+    'FAMILY_CODE': 'familyCode',
+    'FAMILY_COM_NAME': 'familyComName',
+    'FAMILY_SCI_NAME': 'familySciName',
+    'REPORT_AS': 'reportAs',
+    'EXTINCT': 'extinct',
+    'EXTINCT_YEAR': 'extinctYear',
+}
+CSV_LIST_FIELDS = {'comNameCodes', 'sciNameCodes', 'bandingCodes'}
+
+
+def csv_row_to_record(row: Dict[str, str]) -> Dict[str, Any]:
+    """Convert an ebird-taxonomy.csv row into the JSON taxonomy record shape, dropping empty fields."""
+    record = {}
+    for column, key in CSV_FIELDS.items():
+        value = row.get(column, '')
+        if key in CSV_LIST_FIELDS:
+            record[key] = value.split() if value else []
+        elif key == 'taxonOrder' and value:
+            record[key] = float(value)
+        elif key == 'extinctYear' and value:
+            record[key] = int(value)
+        elif key == 'extinct' and value:
+            record[key] = value.lower() == 'true'
+        elif value:
+            record[key] = value
+    return record
+
+
+def iter_json_array(f, chunk_size: int = 64 * 1024) -> Iterator[Any]:
+    """
+    Yield the items of a top-level JSON array one at a time from a text file,
+    holding at most one item plus one read chunk in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    eof = False
+
+    while True:
+        # Skip whitespace, the opening bracket and separators
+        while position < len(buffer):
+            char = buffer[position]
+            if char == '[' and not started:
+                started = True
+            elif not (char.isspace() or (char == ',' and started)):
+                break
+            position += 1
+        if position < len(buffer) and buffer[position] == ']' and started:
+            return
+        if position < len(buffer):
+            if not started:
+                raise ValueError('Expected a JSON array')
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # A number cut off by the chunk boundary (e.g. "2." of "2.5") decodes short,
+                # so only accept one that is followed by a delimiter
+                if not isinstance(item, (int, float)) or eof or (end < len(buffer) and buffer[end] in ' \t\r\n,]'):
+                    yield item
+                    position = end
+                    continue
+        if eof:
+            raise ValueError('Unterminated JSON array')
+
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def iter_taxonomy_file(filepath: str) -> Iterator[Dict[str, Any]]:
+    """Stream taxonomy records from an eBird taxonomy .csv or .json file."""
+    if filepath.endswith('.csv'):
+        with open(filepath, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                yield csv_row_to_record(row)
+    else:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            yield from iter_json_array(f)
+
+
+def iter_url_file(filepath: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream scraped URL records from a JSON Lines stream or a JSON array file.
+    Invalid lines (e.g. the last line of an interrupted scrape) are skipped with a warning.
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        if not filepath.endswith('.jsonl'):
+            yield from iter_json_array(f)
+            return
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Warning: Skipping invalid line {line_number} in '{filepath}': {e}")
+
+
+def page_key(page_url: str) -> str:
+    """Stable identity of a catalog page; asset page URLs carry per-session tracking parameters."""
+    return page_url.split('?', 1)[0]
+
+
+def region_key(region: str) -> str:
+    """Store key for a region code or region file stem ('US' and 'us.json' both map to 'us')."""
+    return region.lower()
+
+
+def batched(iterable: Iterable[Any], size: int = BATCH_SIZE) -> Iterator[List[Any]]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class PipelineStore:
+    def __init__(self, path: str = DEFAULT_STORE_PATH, readonly: bool = False):
+        self.path = path
+        if readonly:
+            self.db = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.db = sqlite3.connect(path)
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute('PRAGMA synchronous=NORMAL')
+            self.db.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.db.commit()
+        self.close()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def commit(self) -> None:
+        self.db.commit()
+
+    # -- taxonomy --------------------------------------------------------
+    def upsert_taxonomy(self, records: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        for batch in batched(records):
+            self.db.executemany('''
+                INSERT INTO taxonomy (species_code, sci_name, com_name, category, taxon_order, "order",
+                                      family_com_name, family_sci_name, record)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (species_code) DO UPDATE SET
+                    sci_name = excluded.sci_name, com_name = excluded.com_name, category = excluded.category,
+                    taxon_order = excluded.taxon_order, "order" = excluded."order",
+                    family_com_name = excluded.family_com_name, family_sci_name = excluded.family_sci_name,
+                    record = excluded.record
+                WHERE record != excluded.record
+            ''', [
+                (record['speciesCode'], record.get('sciName', ''), record.get('comName', ''), record.get('category'),
+                 record.get('taxonOrder'), record.get('order'), record.get('familyComName'),
+                 record.get('familySciName'), json.dumps(record, ensure_ascii=False))
+                for record in batch
+            ])
+            count += len(batch)
+        self.db.commit()
+        return count
+
+    def iter_taxonomy(self, region: Optional[str] = None, exclude_hybrids: bool = False) -> Iterator[Dict[str, Any]]:
+        """Stream taxonomy records in taxonomic order, optionally joined to a region's species list."""
+        query = 'SELECT t.record FROM taxonomy t'
+        params: List[Any] = []
+        if region is not None:
+            query += ' JOIN region_species r ON r.species_code = t.species_code AND r.region = ?'
+            params.append(region_key(region))
+        if exclude_hybrids:
+            query += " WHERE t.category IS NOT 'hybrid'"
+        query += ' ORDER BY t.taxon_order, t.species_code'
+        for (record,) in self.db.execute(query, params):
+            yield json.loads(record)
+
+    # -- region species lists --------------------------------------------
+    def set_region_species(self, region: str, species_codes: Iterable[str]) -> int:
+        """Replace a region's species list."""
+        region = region_key(region)
+        self.db.execute('DELETE FROM region_species WHERE region = ?', (region,))
+        self.db.executemany('INSERT OR IGNORE INTO region_species (region, species_code) VALUES (?, ?)',
+                            ((region, code) for code in species_codes))
+        self.db.commit()
+        return self.db.execute('SELECT COUNT(*) FROM region_species WHERE region = ?', (region,)).fetchone()[0]
+
+    # -- media URLs ------------------------------------------------------
+    def add_media_urls(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Insert scraped records; a stored page only changes when a retry found its audio. Returns rows changed."""
+        before = self.db.total_changes
+        for batch in batched(records):
+            self.db.executemany('''
+                INSERT INTO media_urls (species_code, page_key, page_url, audio_url)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (species_code, page_key) DO UPDATE SET
+                    page_url = excluded.page_url, audio_url = excluded.audio_url
+                WHERE media_urls.audio_url = '' AND excluded.audio_url != ''
+            ''', [
+                (record['code'], page_key(record.get('page Url', '')), record.get('page Url', ''),
+                 record.get('audio Url') or '')
+                for record in batch if record.get('code')
+            ])
+        self.db.commit()
+        return self.db.total_changes - before
+
+    def iter_region_birds(self, region: str) -> Iterator[Tuple[Dict[str, Any], List[str]]]:
+        """
+        Stream (taxonomy record, audio URLs) for every species of a region that
+        has audio, in taxonomic order, with one indexed join.
+        """
+        rows = self.db.execute('''
+            SELECT t.record, m.audio_url
+            FROM region_species r
+            JOIN taxonomy t ON t.species_code = r.species_code
+            JOIN media_urls m ON m.species_code = r.species_code
+            WHERE r.region = ? AND m.audio_url != ''
+            ORDER BY t.taxon_order, t.species_code, m.id
+        ''', (region_key(region),))
+        for record, group in groupby(rows, key=lambda row: row[0]):
+            yield json.loads(record), [audio_url for _, audio_url in group]
+
+    def media_digest(self, region: str) -> str:
+        """
+        sha256 over everything iter_region_birds reads for a region, so builds
+        can skip a region whose store rows are unchanged without decoding them.
+        """
+        digest = hashlib.sha256()
+        rows = self.db.execute('''
+            SELECT t.record, m.audio_url
+            FROM region_species r
+            JOIN taxonomy t ON t.species_code = r.species_code
+            JOIN media_urls m ON m.species_code = r.species_code
+            WHERE r.region = ? AND m.audio_url != ''
+            ORDER BY t.taxon_order, t.species_code, m.id
+        ''', (region_key(region),))
+        for record, audio_url in rows:
+            digest.update(record.encode('utf-8') + b'\0' + audio_url.encode('utf-8') + b'\n')
+        return digest.hexdigest()
+
+    # -- history ---------------------------------------------------------
+    def replace_history(self, history: Dict[str, List[Dict[str, Any]]]) -> int:
+        """Replace the stored history with the history.json shape."""
+        self.db.execute('DELETE FROM history')
+        count = 0
+        for region, entries in history.items():
+            self.db.executemany('''
+                INSERT INTO history (region, day, date, species_code, name, subregion) VALUES (?, ?, ?, ?, ?, ?)
+            ''', [
+                (region, entry.get('day') or date.fromisoformat(entry['date']).toordinal(), entry['date'],
+                 entry['id'], entry.get('name'), entry.get('subregion'))
+                for entry in entries
+            ])
+            count += len(entries)
+        self.db.commit()
+        return count
+
+    def load_history(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Load history in the history.json shape (entries ordered by day)."""
+        history: Dict[str, List[Dict[str, Any]]] = {}
+        rows = self.db.execute('SELECT region, day, date, species_code, name, subregion FROM history ORDER BY region, day, id')
+        for region, day, date_str, species_code, name, subregion in rows:
+            entry = {'date': date_str, 'id': species_code, 'name': name}
+            if subregion is not None:
+                entry['subregion'] = subregion
+            entry['day'] = day
+            history.setdefault(region, []).append(entry)
+        return history
+
+    # -- subregion observations ------------------------------------------
+    def set_subregion_species(self, region: str, subregion: str, species_codes: Iterable[str]) -> None:
+        """Replace one subregion's recent species (keeps the other subregions)."""
+        position = self.db.execute('SELECT COALESCE(MAX(position) + 1, 0) FROM subregions WHERE region = ?',
+                                   (region,)).fetchone()[0]
+        self.db.execute('INSERT OR IGNORE INTO subregions (region, subregion, position) VALUES (?, ?, ?)',
+                        (region, subregion, position))
+        self.db.execute('DELETE FROM subregion_species WHERE region = ? AND subregion = ?', (region, subregion))
+        self.db.executemany('''
+            INSERT OR IGNORE INTO subregion_species (region, subregion, position, species_code) VALUES (?, ?, ?, ?)
+        ''', ((region, subregion, rank, code) for rank, code in enumerate(species_codes)))
+
+    def replace_subregions(self, data: Dict[str, Dict[str, List[Dict[str, str]]]]) -> int:
+        """Replace every region in data with the daily-subregion-birds.json shape."""
+        count = 0
+        for region, subregions in data.items():
+            self.db.execute('DELETE FROM subregions WHERE region = ?', (region,))
+            self.db.execute('DELETE FROM subregion_species WHERE region = ?', (region,))
+            for subregion, entries in subregions.items():
+                self.set_subregion_species(region, subregion, (entry['id'] for entry in entries))
+                count += 1
+        self.db.commit()
+        return count
+
+    def load_subregions(self) -> Dict[str, Dict[str, List[Dict[str, str]]]]:
+        """Load subregion observations in the daily-subregion-birds.json shape."""
+        data: Dict[str, Dict[str, List[Dict[str, str]]]] = {}
+        for region, subregion in self.db.execute('SELECT region, subregion FROM subregions ORDER BY region, position'):
+            data.setdefault(region, {})[subregion] = []
+        rows = self.db.execute('SELECT region, subregion, species_code FROM subregion_species ORDER BY region, subregion, position')
+        for region, subregion, species_code in rows:
+            data[region][subregion].append({'id': species_code})
+        return data
+
+    # -- summary ---------------------------------------------------------
+    def stats(self) -> Dict[str, int]:
+        tables = ['taxonomy', 'region_species', 'media_urls', 'history', 'subregions', 'subregion_species']
+        return {table: self.db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] for table in tables}
+
+
+def add_store_argument(parser) -> None:
+    """Add the shared --store option to an argparse parser."""
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_PATH, default=None,
+                        help=f'Use the SQLite pipeline store (default path: $BIRDLE_STORE or {DEFAULT_STORE_PATH})')
+
+
+class TaxonomyWriter:
+    """Writes one region's filtered taxonomy record by record, in json.dump(indent=2) format."""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.tmp_path = f'{output_path}.tmp'
+        self.file = open(self.tmp_path, 'w', encoding='utf-8')
+        self.encoder = json.JSONEncoder(indent=2)
+        self.count = 0
+
+    def write(self, record):
+        self.file.write('[\n  ' if self.count == 0 else ',\n  ')
+        # Literal newlines only occur between tokens, so re-indenting chunks is safe
+        for chunk in self.encoder.iterencode(record):
+            self.file.write(chunk.replace('\n', '\n  '))
+        self.count += 1
+
+    def close(self):
+        self.file.write('\n]' if self.count else '[]')
+        self.file.close()
+        os.replace(self.tmp_path, self.output_path)
+
+    def discard(self):
+        self.file.close()
+        os.remove(self.tmp_path)
+
+
+def save_json(data: Any, filepath: str) -> None:
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import pipeline data into, or export it from, the SQLite store.')
+    parser.add_argument('--db', default=DEFAULT_STORE_PATH, help=f'Store path (default: $BIRDLE_STORE or {DEFAULT_STORE_PATH})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('import-taxonomy', help='Upsert an eBird taxonomy .csv or .json file')
+    command.add_argument('taxonomy_file')
+    command = commands.add_parser('import-region', help='Replace a region species list (e.g. us.json)')
+    command.add_argument('region')
+    command.add_argument('region_file')
+    command = commands.add_parser('import-urls', help='Add scraped URL records (.jsonl or JSON array)')
+    command.add_argument('urls_file')
+    command = commands.add_parser('import-history', help='Replace history from history.json')
+    command.add_argument('history_file')
+    command = commands.add_parser('import-subregions', help='Replace subregion observations from daily-subregion-birds.json')
+    command.add_argument('subregions_file')
+    command = commands.add_parser('export-taxonomy', help='Write a region taxonomy JSON (e.g. us-taxonomy.json)')
+    command.add_argument('region')
+    command.add_argument('output_file')
+    command.add_argument('--exclude-hybrids', action='store_true', help='Exclude hybrid species from output')
+    command = commands.add_parser('export-history', help='Write history.json')
+    command.add_argument('output_file')
+    command = commands.add_parser('export-subregions', help='Write daily-subregion-birds.json')
+    command.add_argument('output_file')
+    commands.add_parser('stats', help='Show row counts')
+    args = parser.parse_args()
+
+    with PipelineStore(args.db) as store:
+        if args.command == 'import-taxonomy':
+            print(f"Upserted {store.upsert_taxonomy(iter_taxonomy_file(args.taxonomy_file))} taxonomy records")
+        elif args.command == 'import-region':
+            with open(args.region_file, 'r', encoding='utf-8') as f:
+                print(f"Stored {store.set_region_species(args.region, json.load(f))} species for '{args.region}'")
+        elif args.command == 'import-urls':
+            print(f"Added {store.add_media_urls(iter_url_file(args.urls_file))} new URL records")
+        elif args.command == 'import-history':
+            with open(args.history_file, 'r', encoding='utf-8') as f:
+                print(f"Stored {store.replace_history(json.load(f))} history entries")
+        elif args.command == 'import-subregions':
+            with open(args.subregions_file, 'r', encoding='utf-8') as f:
+                print(f"Stored {store.replace_subregions(json.load(f))} subregions")
+        elif args.command == 'export-taxonomy':
+            writer = TaxonomyWriter(args.output_file)
+            try:
+                for record in store.iter_taxonomy(args.region, args.exclude_hybrids):
+                    writer.write(record)
+            except BaseException:
+                writer.discard()
+                raise
+            writer.close()
+            print(f"Wrote {writer.count} taxonomy records to {args.output_file}")
+        elif args.command == 'export-history':
+            save_json(store.load_history(), args.output_file)
+            print(f"Wrote history to {args.output_file}")
+        elif args.command == 'export-subregions':
+            save_json(store.load_subregions(), args.output_file)
+            print(f"Wrote subregions to {args.output_file}")
+        elif args.command == 'stats':
+            for table, count in store.stats().items():
+                print(f"  {table}: {count}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Daily Schedule Simulator
+
+Monte Carlo replay of generate-daily-birds.py's selection for tuning the
+no-repeat window (--days) and family spacing (--family-days) before a region or
+taxonomy change. Thousands of independent schedules (seeds) are advanced one
+day at a time as NumPy arrays, following the same rules as daily_selection.py:
+- a subregion is picked uniformly per day (the workflow's hash-seeded choice),
+  falling back to the whole region when it has no candidates
+- draws come from the pool's alias table (so --weight-by is honoured), and a
+  draw that breaks a window is rejected and redrawn
+- when nothing in the pool satisfies the windows they are relaxed in order:
+  family spacing, then species recency
+
+The output covers repeat intervals, how often each fallback fires, family and
+species coverage, and the subregions that most often run out of fresh birds.
+Schedules start from an empty history.
+
+Usage:
+    python scripts/simulate-schedules.py --days 30 60 90 --subregions public/data/daily-subregion-birds.json
+    python scripts/simulate-schedules.py --regions us --days 60 --family-days 7 --seeds 5000 --years 5 --output sim.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from daily_selection import WEIGHT_FACTORS, RegionSelector
+from subregion_presence import SubregionPresence
+
+NEVER = -(1 << 30)  # last-seen day for species and families not yet answered
+REJECTION_ROUNDS = 8  # vectorized redraws before the remaining seeds filter their pool exactly
+
+
+class PoolArrays:
+    """
+    A region's candidate pools as padded arrays: one row per subregion, then a
+    last row for the whole region. Built from RegionSelector so pools and
+    weights match the generator's.
+    """
+
+    def __init__(self, selector: RegionSelector, subregion_names: List[str]):
+        names: List[Optional[str]] = list(subregion_names) + [None]
+        tables = [selector.table(name) for name in names]
+        if tables[-1] is None:
+            raise ValueError("no bird in the region has a positive weight")
+
+        width = max(len(table) for table in tables if table is not None)
+        self.items = np.zeros((len(names), width), dtype=np.int64)
+        self.probability = np.ones((len(names), width))
+        self.alias = np.zeros((len(names), width), dtype=np.int64)
+        self.weights = np.zeros((len(names), width))
+        self.sizes = np.zeros(len(names), dtype=np.int64)
+        for row, (name, table) in enumerate(zip(names, tables)):
+            if table is None:
+                continue
+            size = len(table)
+            pool, weights = selector.pool_weights[name]
+            self.items[row, :size] = table.items
+            self.weights[row, :size] = weights
+            self.sizes[row] = size
+            if table.probability is not None:
+                self.probability[row, :size] = table.probability
+                self.alias[row, :size] = table.alias
+            else:
+                self.alias[row, :size] = np.arange(size)
+        # Subregions without candidates use the region pool, as the generator does
+        self.empty = np.array([table is None for table in tables[:-1]], dtype=bool)
+        self.resolve = np.where(self.empty, len(names) - 1, np.arange(len(names) - 1))
+        self.region_row = len(names) - 1
+
+    def draw(self, rng: np.random.Generator, rows: np.ndarray) -> np.ndarray:
+        """One alias-table draw per entry of rows (pool row indices)."""
+        columns = (rng.random(len(rows)) * self.sizes[rows]).astype(np.int64)
+        keep = rng.random(len(rows)) < self.probability[rows, columns]
+        return np.where(keep, self.items[rows, columns], self.items[rows, self.alias[rows, columns]])
+
+
+def weighted_pick(rng: np.random.Generator, weights: np.ndarray) -> np.ndarray:
+    """Row-wise weighted column choice; -1 for rows whose weights are all zero."""
+    cumulative = np.cumsum(weights, axis=1)
+    totals = cumulative[:, -1]
+    targets = rng.random(len(weights)) * totals
+    picks = (cumulative <= targets[:, None]).sum(axis=1)
+    return np.where(totals > 0, np.minimum(picks, weights.shape[1] - 1), -1)
+
+
+def simulate_region(birds: List[Dict[str, Any]], subregions: Dict[str, List[Dict[str, Any]]], days: int,
+                    family_days: int, seeds: int, horizon: int, weight_by=(), tiers=None, tier_weights=None,
+                    seed: int = 0) -> Dict[str, Any]:
+    """Simulate `seeds` independent schedules of `horizon` days for one region and summarize them."""
+    presence = SubregionPresence(subregions, [bird['id'] for bird in birds]) if subregions else None
+    selector = RegionSelector(birds, presence, subregions, weight_by, tiers, tier_weights)
+    subregion_names = presence.subregion_names if presence else []
+    pools = PoolArrays(selector, subregion_names)
+
+    family_names = sorted({bird.get('family', '') for bird in birds})
+    family_index = {name: position for position, name in enumerate(family_names)}
+    species_family = np.array([family_index[bird.get('family', '')] for bird in birds], dtype=np.int64)
+
+    rng = np.random.default_rng(seed)
+    last_seen = np.full((seeds, len(birds)), NEVER, dtype=np.int64)
+    family_last = np.full((seeds, len(family_names)), NEVER, dtype=np.int64)
+    seed_rows = np.arange(seeds)
+    intervals = np.zeros(horizon + 1, dtype=np.int64)
+    picks_per_species = np.zeros(len(birds), dtype=np.int64)
+    chosen_subregions = np.zeros(max(1, len(subregion_names)), dtype=np.int64)
+    recency_fallbacks = np.zeros_like(chosen_subregions)
+    family_fallbacks = np.zeros_like(chosen_subregions)
+    empty_days = 0
+
+    for day in range(horizon):
+        if subregion_names:
+            subregion = rng.integers(len(subregion_names), size=seeds)
+            rows = pools.resolve[subregion]
+            empty_days += int(pools.empty[subregion].sum())
+        else:
+            subregion = np.zeros(seeds, dtype=np.int64)
+            rows = np.full(seeds, pools.region_row)
+        species_cutoff = day - days
+        family_cutoff = day - family_days
+
+        def allowed(seed_index, species, check_family=True):
+            fresh = last_seen[seed_index, species] <= species_cutoff
+            if check_family and family_days > 0:
+                fresh &= family_last[seed_index, species_family[species]] <= family_cutoff
+            return fresh
+
+        # Rejection sampling for most seeds
+        picked = np.full(seeds, -1, dtype=np.int64)
+        pending = seed_rows
+        for _ in range(REJECTION_ROUNDS):
+            candidates = pools.draw(rng, rows[pending])
+            accepted = allowed(pending, candidates)
+            picked[pending[accepted]] = candidates[accepted]
+            pending = pending[~accepted]
+            if not pending.size:
+                break
+
+        # Exact filtering for the rest, relaxing family spacing and then species recency
+        if pending.size:
+            pool_rows = rows[pending]
+            columns = pools.items[pool_rows]
+            base = pools.weights[pool_rows]
+            levels = [True, False] if family_days > 0 else [False]
+            for check_family in levels:
+                mask = allowed(pending[:, None], columns, check_family)
+                chosen = weighted_pick(rng, base * mask)
+                found = chosen >= 0
+                picked[pending[found]] = columns[found, chosen[found]]
+                if check_family:
+                    np.add.at(family_fallbacks, subregion[pending[~found]], 1)
+                else:
+                    np.add.at(recency_fallbacks, subregion[pending[~found]], 1)
+                pending, pool_rows, columns, base = pending[~found], pool_rows[~found], columns[~found], base[~found]
+                if not pending.size:
+                    break
+            if pending.size:
+                picked[pending] = pools.draw(rng, pool_rows)
+
+        previous = last_seen[seed_rows, picked]
+        repeated = previous != NEVER
+        intervals += np.bincount(day - previous[repeated], minlength=horizon + 1)
+        last_seen[seed_rows, picked] = day
+        family_last[seed_rows, species_family[picked]] = day
+        picks_per_species += np.bincount(picked, minlength=len(birds))
+        if subregion_names:
+            chosen_subregions += np.bincount(subregion, minlength=len(subregion_names))
+
+    return summarize(birds, family_names, species_family, subregion_names, pools, last_seen, family_last,
+                     intervals, picks_per_species, chosen_subregions, recency_fallbacks, family_fallbacks,
+                     empty_days, seeds, horizon)
+
+
+def percentile_of_counts(counts: np.ndarray, fraction: float) -> Optional[int]:
+    """Value at a cumulative fraction of a histogram of non-negative integers."""
+    total = counts.sum()
+    if not total:
+        return None
+    return int(np.searchsorted(np.cumsum(counts), fraction * total))
+
+
+def summarize(birds, family_names, species_family, subregion_names, pools, last_seen, family_last, intervals,
+              picks_per_species, chosen_subregions, recency_fallbacks, family_fallbacks, empty_days, seeds,
+              horizon) -> Dict[str, Any]:
+    draws = seeds * horizon
+    repeats = int(intervals.sum())
+    species_covered = (last_seen != NEVER).mean(axis=1)
+    families_covered = (family_last != NEVER).mean(axis=0)
+
+    family_species = np.bincount(species_family, minlength=len(family_names))
+    family_picks = np.bincount(species_family, weights=picks_per_species, minlength=len(family_names))
+    family_rows = [
+        {
+            'family': name,
+            'species': int(family_species[position]),
+            'answerShare': float(family_picks[position] / draws),
+            'speciesShare': float(family_species[position] / len(birds)),
+            'seedsCovered': float(families_covered[position]),
+        }
+        for position, name in enumerate(family_names)
+    ]
+    family_rows.sort(key=lambda row: (row['seedsCovered'], row['answerShare']))
+
+    subregion_rows = [
+        {
+            'subregion': name,
+            'pool': int(pools.sizes[pools.resolve[position]]),
+            'empty': bool(pools.empty[position]),
+            'chosen': int(chosen_subregions[position]),
+            'recencyFallbackRate': float(recency_fallbacks[position] / chosen_subregions[position]) if chosen_subregions[position] else 0.0,
+            'familyFallbackRate': float(family_fallbacks[position] / chosen_subregions[position]) if chosen_subregions[position] else 0.0,
+        }
+        for position, name in enumerate(subregion_names)
+    ]
+    subregion_rows.sort(key=lambda row: (-row['recencyFallbackRate'], -row['familyFallbackRate'], row['pool']))
+
+    return {
+        'species': len(birds),
+        'families': len(family_names),
+        'subregions': len(subregion_names),
+        'repeatInterval': {
+            'repeatsPerSeedYear': repeats / seeds / horizon * 365,
+            'min': int(np.flatnonzero(intervals)[0]) if repeats else None,
+            'p5': percentile_of_counts(intervals, 0.05),
+            'median': percentile_of_counts(intervals, 0.5),
+            'mean': float((intervals * np.arange(len(intervals))).sum() / repeats) if repeats else None,
+        },
+        'fallbacks': {
+            'emptySubregion': empty_days / draws,
+            'family': int(family_fallbacks.sum()) / draws,
+            'recency': int(recency_fallbacks.sum()) / draws,
+        },
+        'coverage': {
+            'speciesMean': float(species_covered.mean()),
+            'speciesMin': float(species_covered.min()),
+            'familiesAlwaysCovered': int((families_covered == 1).sum()),
+            'familiesNeverCovered': int((families_covered == 0).sum()),
+        },
+        'familyCoverage': family_rows,
+        'subregionStarvation': subregion_rows,
+    }
+
+
+def print_report(region: str, days: int, result: Dict[str, Any], top: int):
+    interval = result['repeatInterval']
+    fallbacks = result['fallbacks']
+    coverage = result['coverage']
+    print(f"\n📊 {region} --days {days}: {result['species']} species, {result['families']} families, "
+          f"{result['subregions']} subregions")
+    if interval['min'] is None:
+        print("   Repeats: none")
+    else:
+        print(f"   Repeats: {interval['repeatsPerSeedYear']:.1f}/year, interval min {interval['min']}, "
+              f"p5 {interval['p5']}, median {interval['median']}, mean {interval['mean']:.1f} days")
+    print(f"   Fallbacks: recency {fallbacks['recency']:.2%}, family {fallbacks['family']:.2%}, "
+          f"empty subregion {fallbacks['emptySubregion']:.2%} of days")
+    print(f"   Species answered at least once: mean {coverage['speciesMean']:.1%}, worst seed {coverage['speciesMin']:.1%}")
+    print(f"   Families answered in every seed: {coverage['familiesAlwaysCovered']}/{result['families']}, "
+          f"in none: {coverage['familiesNeverCovered']}")
+    for row in result['familyCoverage'][:top]:
+        print(f"      {row['family'] or '(no family)'}: {row['species']} species, in {row['seedsCovered']:.1%} of seeds, "
+              f"{row['answerShare']:.2%} of answers vs {row['speciesShare']:.2%} of species")
+    starved = [row for row in result['subregionStarvation']
+               if row['recencyFallbackRate'] or row['familyFallbackRate'] or row['empty']]
+    if starved:
+        print(f"   Subregions running out of fresh birds: {len(starved)}/{result['subregions']}")
+        for row in starved[:top]:
+            note = ' (empty, uses the region)' if row['empty'] else ''
+            print(f"      {row['subregion']}: pool {row['pool']}{note}, fallback on {row['recencyFallbackRate']:.1%} "
+                  f"(recency) and {row['familyFallbackRate']:.1%} (family) of its days")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate daily schedules to tune the no-repeat windows.')
+    parser.add_argument('--birds', default='public/data/birds.json',
+                        help='Path to birds.json (default: public/data/birds.json, run from the repository root)')
+    parser.add_argument('--subregions', help='Path to daily-subregion-birds.json (default: no subregion filtering)')
+    parser.add_argument('--regions', nargs='+', help='Region keys to simulate (default: all in birds.json)')
+    parser.add_argument('--days', type=int, nargs='+', default=[60],
+                        help='No-repeat windows to compare, as generate-daily-birds.py --days (default: 60)')
+    parser.add_argument('--family-days', type=int, default=0, help='Family spacing, as generate-daily-birds.py (default: 0)')
+    parser.add_argument('--weight-by', nargs='+', choices=WEIGHT_FACTORS, default=[], help='Weight draws, as generate-daily-birds.py')
+    parser.add_argument('--difficulty', help='JSON file of {region: {bird id: tier}} for --weight-by difficulty')
+    parser.add_argument('--tier-weights', type=float, nargs='+', help='Weight of tier 1, 2, ... (default: 3 2 1)')
+    parser.add_argument('--seeds', type=int, default=2000, help='Independent schedules per region (default: 2000)')
+    parser.add_argument('--years', type=float, default=3, help='Length of each schedule in years (default: 3)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--top', type=int, default=5, help='Families and subregions to list per report (default: 5)')
+    parser.add_argument('--output', help='Write the full results as JSON')
+    args = parser.parse_args()
+    if 'difficulty' in args.weight_by and not args.difficulty:
+        parser.error('--weight-by difficulty requires --difficulty')
+
+    try:
+        with open(args.birds, 'r', encoding='utf-8') as f:
+            birds_data = json.load(f)
+        subregions_data = {}
+        if args.subregions:
+            with open(args.subregions, 'r', encoding='utf-8') as f:
+                subregions_data = json.load(f)
+        tiers = {}
+        if args.difficulty:
+            with open(args.difficulty, 'r', encoding='utf-8') as f:
+                tiers = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"❌ Error reading input: {e}", file=sys.stderr)
+        sys.exit(1)
+    tier_weights = {tier: weight for tier, weight in enumerate(args.tier_weights, 1)} if args.tier_weights else None
+
+    regions = args.regions or list(birds_data)
+    missing = [region for region in regions if region not in birds_data]
+    if missing:
+        parser.error(f"region(s) not in {args.birds}: {', '.join(missing)}")
+    horizon = int(args.years * 365)
+    print(f"Simulating {args.seeds} schedules of {horizon} days per region")
+
+    results = {}
+    for region in regions:
+        for days in args.days:
+            start = time.perf_counter()
+            try:
+                result = simulate_region(birds_data[region], subregions_data.get(region, {}), days, args.family_days,
+                                         args.seeds, horizon, args.weight_by, tiers.get(region), tier_weights, args.seed)
+            except ValueError as e:
+                print(f"⚠️  {region}: {e}, skipping")
+                break
+            result['seconds'] = time.perf_counter() - start
+            results.setdefault(region, {})[str(days)] = result
+            print_report(region, days, result, args.top)
+            print(f"   ({result['seconds']:.1f}s)")
+
+    if len(args.days) > 1:
+        print(f"\n{'region':<10} {'days':>5} {'min gap':>8} {'median':>7} {'recency fb':>11} {'family fb':>10} {'species seen':>13}")
+        for region, by_days in results.items():
+            for days, result in by_days.items():
+                interval = result['repeatInterval']
+                print(f"{region:<10} {days:>5} {interval['min'] if interval['min'] is not None else '-':>8} "
+                      f"{interval['median'] if interval['median'] is not None else '-':>7} "
+                      f"{result['fallbacks']['recency']:>11.2%} {result['fallbacks']['family']:>10.2%} "
+                      f"{result['coverage']['speciesMean']:>13.1%}")
+
+    if args.output:
+        output = {
+            'parameters': {
+                'days': args.days, 'familyDays': args.family_days, 'weightBy': args.weight_by,
+                'seeds': args.seeds, 'horizonDays': horizon, 'seed': args.seed,
+            },
+            'regions': results,
+        }
+        Path(args.output).write_text(json.dumps(output, indent=2) + '\n', encoding='utf-8')
+        print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
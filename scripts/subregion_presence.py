@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Species x subregion presence matrix.
+
+Compiles one region of daily-subregion-birds.json ({subregion: [{id}, ...]})
+into a boolean NumPy matrix over a fixed species index (normally the order of
+the region's birds in birds.json), so subregion filtering is a boolean mask
+instead of a list scan.
+
+Usage (analytics):
+    python subregion_presence.py ./public/data/daily-subregion-birds.json --region us --species amerob
+"""
+
+import argparse
+import json
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class SubregionPresence:
+    """Boolean presence matrix: rows are subregions, columns are species."""
+
+    def __init__(self, subregions: Dict[str, List[Dict[str, str]]], species_ids: Optional[Sequence[str]] = None):
+        if species_ids is None:
+            species_ids = sorted({entry['id'] for entries in subregions.values() for entry in entries})
+        self.species_ids = list(species_ids)
+        self.species_index = {species_id: column for column, species_id in enumerate(self.species_ids)}
+        self.subregion_names = list(subregions)
+        self.subregion_index = {name: row for row, name in enumerate(self.subregion_names)}
+
+        self.matrix = np.zeros((len(self.subregion_names), len(self.species_ids)), dtype=bool)
+        for row, name in enumerate(self.subregion_names):
+            columns = [self.species_index[entry['id']] for entry in subregions[name] if entry['id'] in self.species_index]
+            self.matrix[row, columns] = True
+
+    def mask(self, subregion: str) -> np.ndarray:
+        """Columns present in a subregion."""
+        return self.matrix[self.subregion_index[subregion]]
+
+    def candidates(self, subregion: str) -> np.ndarray:
+        """Column indices present in a subregion."""
+        return np.flatnonzero(self.mask(subregion))
+
+    def subregions_with(self, species_id: str) -> List[str]:
+        """Subregions where a species is currently present."""
+        column = self.species_index.get(species_id)
+        if column is None:
+            return []
+        return [self.subregion_names[row] for row in np.flatnonzero(self.matrix[:, column])]
+
+    def species_counts(self) -> np.ndarray:
+        """Number of subregions each species is present in."""
+        return self.matrix.sum(axis=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query species presence across subregions.')
+    parser.add_argument('subregions_file', help='Path to daily-subregion-birds.json')
+    parser.add_argument('--region', default='us', help='Region key (default: us)')
+    parser.add_argument('--species', nargs='*', default=[], help='Species codes to report subregions for')
+    parser.add_argument('--top', type=int, default=10, help='Show the N most widespread species (default: 10)')
+    args = parser.parse_args()
+
+    with open(args.subregions_file, 'r', encoding='utf-8') as f:
+        subregions = json.load(f).get(args.region, {})
+
+    presence = SubregionPresence(subregions)
+    print(f"{len(presence.subregion_names)} subregions x {len(presence.species_ids)} species")
+
+    for species_id in args.species:
+        names = presence.subregions_with(species_id)
+        print(f"{species_id}: {len(names)} subregions {names}")
+
+    counts = presence.species_counts()
+    for column in np.argsort(-counts, kind='stable')[:args.top]:
+        print(f"  {presence.species_ids[column]}: {counts[column]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Shared helpers for the pipeline script tests.
+
+The scripts import each other as top-level modules and several have hyphenated
+names, so tests put the scripts directory on sys.path and load scripts by path.
+Network tests run against ebird-stub-server.py on a free local port.
+"""
+
+import contextlib
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+
+def load_script(filename):
+    """Import a script (e.g. 'transcode-audio.py') as a module without running main()."""
+    name = os.path.splitext(filename)[0].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPTS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_script(filename, *args, env=None):
+    """Run a script in a fresh interpreter; returns the CompletedProcess, output captured as text."""
+    return subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, filename), *map(str, args)],
+                          cwd=SCRIPTS_DIR, capture_output=True, text=True, timeout=120,
+                          env={**os.environ, **(env or {})})
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def stub_server(*options):
+    """Run ebird-stub-server.py with extra CLI options for the block; yields its base URL (no /v2)."""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(SCRIPTS_DIR, 'ebird-stub-server.py'), '--port', str(port), *map(str, options)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError('ebird-stub-server.py did not start')
+                time.sleep(0.05)
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def local_birds(base_url, regions):
+    """A small birds.json document whose audio URLs point at the stub server's asset endpoint."""
+    return {
+        region: [
+            {'id': f'{region}{index:03d}', 'name': f'Bird {index}', 'scientificName': f'Avis {index}',
+             'family': f'Family {index // 3}', 'order': f'Order {index // 6}',
+             'audioUrl': [f'{base_url}/api/v2/asset/{asset}/mp3' for asset in assets]}
+            for index, assets in enumerate(species)
+        ]
+        for region, species in regions.items()
+    }
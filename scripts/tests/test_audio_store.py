@@ -0,0 +1,83 @@
+"""audio_store.py resumed downloads, against the stub server."""
+
+import os
+import tempfile
+import unittest
+
+import requests
+
+from support import stub_server
+
+from audio_store import AudioStore, asset_id_for
+
+
+class RecordingSession(requests.Session):
+    """A session that remembers the request headers and status code of every GET."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        response = super().get(url, **kwargs)
+        self.calls.append((kwargs.get('headers') or {}, response.status_code))
+        return response
+
+
+class PartialDownloadCase(unittest.TestCase):
+    server_options = ()
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workdir.cleanup)
+        server = stub_server('--asset-size', 100000, *self.server_options)
+        self.url = self.enterContext(server) + '/api/v2/asset/424242/mp3'
+        response = requests.get(self.url)
+        self.body, self.etag = response.content, response.headers['ETag']
+
+    def download_with_partial(self, partial_bytes, validator):
+        store = AudioStore(self.workdir.name)
+        asset_id = asset_id_for(self.url)
+        with open(store.partial_path(asset_id), 'wb') as f:
+            f.write(partial_bytes)
+        if validator is not None:
+            with open(store.validator_path(asset_id), 'w', encoding='utf-8') as f:
+                f.write(validator)
+        with RecordingSession() as session:
+            entry = store.download(session, self.url)
+        with open(store.object_path(entry['sha256'], entry['ext']), 'rb') as f:
+            self.assertEqual(f.read(), self.body)
+        self.assertEqual(os.listdir(os.path.join(self.workdir.name, 'partial')), [])
+        return session.calls
+
+
+class ResumeTest(PartialDownloadCase):
+    def test_resumes_with_if_range_when_the_file_is_unchanged(self):
+        calls = self.download_with_partial(self.body[:30000], self.etag)
+        self.assertEqual(calls, [({'Range': 'bytes=30000-', 'If-Range': self.etag}, 206)])
+
+    def test_restarts_from_zero_when_the_file_changed(self):
+        calls = self.download_with_partial(b'x' * 30000, '"stale"')
+        self.assertEqual(calls, [({'Range': 'bytes=30000-', 'If-Range': '"stale"'}, 200)])
+
+    def test_partial_without_validator_is_not_trusted(self):
+        calls = self.download_with_partial(b'x' * 30000, None)
+        self.assertEqual(calls, [({}, 200)])
+
+    def test_complete_partial_is_accepted_on_416(self):
+        calls = self.download_with_partial(self.body, self.etag)
+        self.assertEqual(calls, [({'Range': 'bytes=100000-', 'If-Range': self.etag}, 416)])
+
+
+class IgnoredIfRangeTest(PartialDownloadCase):
+    """A server that ignores If-Range answers 416 for a stale partial longer than the asset."""
+
+    server_options = ('--ignore-if-range',)
+
+    def test_restarts_when_416_length_differs_from_the_partial(self):
+        calls = self.download_with_partial(b'x' * 120000, '"stale"')
+        self.assertEqual(calls, [({'Range': 'bytes=120000-', 'If-Range': '"stale"'}, 416), ({}, 200)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""check-audio-urls.py probing and --prune, against the stub server's dead assets."""
+
+import json
+import os
+import random
+import tempfile
+import unittest
+
+from support import load_script, local_birds, run_script, stub_server
+
+from bird_hash import hash_bird_id
+from bird_shards import load_manifest, write_shards
+from url_check import UrlStatusCache, check_urls
+
+check_audio_urls = load_script('check-audio-urls.py')
+
+DEAD_RATE = 0.5
+
+
+def is_dead(asset_id):
+    # Mirrors ebird-stub-server.py --dead-rate, which is deterministic per asset
+    return random.Random(f'dead-{asset_id}').random() < DEAD_RATE
+
+
+def pick_assets(dead, count, start=2000):
+    picked = []
+    asset_id = start
+    while len(picked) < count:
+        if is_dead(asset_id) == dead:
+            picked.append(asset_id)
+        asset_id += 1
+    return picked
+
+
+def load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class CheckUrlsTest(unittest.TestCase):
+    def test_probes_concurrently_and_caches_results(self):
+        dead = pick_assets(True, 5)
+        live = pick_assets(False, 15)
+        options = ('--dead-rate', DEAD_RATE, '--latency', 0.1)
+        with tempfile.TemporaryDirectory() as workdir, stub_server(*options) as base_url:
+            urls = [f'{base_url}/api/v2/asset/{asset}/mp3' for asset in dead + live]
+            cache = UrlStatusCache(os.path.join(workdir, 'status.json'))
+            probed = check_urls(urls, cache, workers=20, per_host=20, timeout=5)
+            cache.save()
+            self.assertEqual(sorted(probed), sorted(urls))
+
+            cache = UrlStatusCache(os.path.join(workdir, 'status.json'))
+            states = {url: cache.get(url)['state'] for url in urls}
+            self.assertEqual({url for url, state in states.items() if state == 'dead'}, set(urls[:len(dead)]))
+            self.assertTrue(all(cache.get(url)['status'] in (200, 206) for url in urls[len(dead):]))
+            self.assertEqual(check_urls(urls, cache, workers=20, per_host=20), [])  # All fresh
+
+
+class PruneTest(unittest.TestCase):
+    def test_prune_drops_dead_urls_and_silent_birds_and_rewrites_shards(self):
+        dead = pick_assets(True, 3)
+        live = pick_assets(False, 4)
+        with tempfile.TemporaryDirectory() as workdir, stub_server('--dead-rate', DEAD_RATE) as base_url:
+            birds = local_birds(base_url, {
+                'us': [[live[0], dead[0]], [dead[1]], [live[1]], [dead[2], live[2]]],
+                'uk': [[dead[1]], [live[3]]],
+            })
+            birds_file = os.path.join(workdir, 'birds.json')
+            with open(birds_file, 'w', encoding='utf-8') as f:
+                json.dump(birds, f)
+            shard_dir = os.path.join(workdir, 'birds')
+            write_shards(birds, {}, shard_dir)
+
+            status_file = os.path.join(workdir, 'status.json')
+            result = run_script('check-audio-urls.py', birds_file, '--status', status_file, '--prune')
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertIn('Removed 4 dead URL references and 2 birds', result.stdout)
+
+            pruned = load_json(birds_file)
+            self.assertEqual([bird['id'] for bird in pruned['us']], ['us000', 'us002', 'us003'])
+            self.assertEqual([bird['id'] for bird in pruned['uk']], ['uk001'])
+            dead_urls = {url for region in birds.values() for bird in region for url in bird['audioUrl']
+                         if int(url.split('/')[-2]) in dead}
+            for region in pruned.values():
+                for bird in region:
+                    self.assertTrue(bird['audioUrl'])
+                    self.assertFalse(dead_urls & set(bird['audioUrl']))
+
+            # Positions shifted, so the hash index and distractor tables were rebuilt for the new lists
+            hash_indexes = load_json(os.path.join(workdir, 'birds-hash-index.json'))
+            distractors = load_json(os.path.join(workdir, 'birds-distractors.json'))
+            for region, region_birds in pruned.items():
+                for position, bird in enumerate(region_birds):
+                    self.assertEqual(hash_indexes[region][hash_bird_id(bird['id'])], position)
+                    self.assertEqual(distractors[region]['species'][bird['id']][2], position)
+
+            manifest = load_manifest(shard_dir)
+            self.assertEqual({region: entry['count'] for region, entry in manifest['regions'].items()},
+                             {'us': 3, 'uk': 1})
+            shard = load_json(os.path.join(shard_dir, manifest['regions']['us']['birds']))
+            self.assertEqual([bird['id'] for bird in shard['birds']], ['us000', 'us002', 'us003'])
+            self.assertEqual(shard['hashIndex'], hash_indexes['us'])
+
+            # A second run finds every URL fresh in the status cache
+            result = run_script('check-audio-urls.py', birds_file, '--status', status_file)
+            self.assertIn('Probed: 0', result.stdout)
+
+    def test_prune_birds_keeps_order(self):
+        birds = {'us': [{'id': 'a', 'audioUrl': ['x', 'y']}, {'id': 'b', 'audioUrl': ['y']},
+                        {'id': 'c', 'audioUrl': ['z']}]}
+        removed, dropped = check_audio_urls.prune_birds(birds, {'y'})
+        self.assertEqual((removed, dropped), (2, [('us', 'b')]))
+        self.assertEqual(birds, {'us': [{'id': 'a', 'audioUrl': ['x']}, {'id': 'c', 'audioUrl': ['z']}]})
+
+
+if __name__ == '__main__':
+    unittest.main()
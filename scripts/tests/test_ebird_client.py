@@ -0,0 +1,30 @@
+"""EBirdClient per-endpoint counters, against the stub server."""
+
+import unittest
+
+from support import stub_server
+
+from ebird_client import EBirdClient
+
+
+class MetricsTest(unittest.TestCase):
+    def test_latency_excludes_rate_limit_waits_and_streams_count_body_bytes(self):
+        latency = 0.1
+        with stub_server('--latency', latency, '--asset-size', 5000) as base_url:
+            with EBirdClient(api_key='test', api_base=f'{base_url}/v2', rate=2, burst=1) as client:
+                for _ in range(4):
+                    client.get_json('ref/region/list/subnational1/US', endpoint='regions')
+                with client.get(f'{base_url}/api/v2/asset/1/mp3', stream=True, endpoint='asset') as response:
+                    body = b''.join(response.iter_content(1024))
+                metrics = client.metrics()
+
+        regions = metrics['regions']
+        self.assertEqual(regions['requests'], 4)
+        self.assertGreater(regions['waitSeconds'], 0.5)  # 4 requests through a 2/s bucket holding 1 token
+        self.assertLess(regions['maxSeconds'], latency + 0.15)
+        self.assertAlmostEqual(regions['meanSeconds'], regions['seconds'] / 4)
+        self.assertEqual(metrics['asset']['bytes'], len(body))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""Concurrent subregion fetch in generate-daily-region-data.py, against the stub server."""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from support import SCRIPTS_DIR, load_script, run_script, stub_server
+
+from ebird_client import EBirdClient
+
+region_data = load_script('generate-daily-region-data.py')
+
+with open(os.path.join(SCRIPTS_DIR, 'data', 'regions', 'us-subregions.json'), 'r', encoding='utf-8') as f:
+    US_SUBREGIONS = json.load(f)
+
+
+def make_client(base_url, workers, max_retries=0):
+    return EBirdClient(api_key='test', api_base=f'{base_url}/v2', pool_size=workers,
+                       rate=1000, burst=1000, max_retries=max_retries, backoff=0.01)
+
+
+class FetchAllSubregionsTest(unittest.TestCase):
+    def test_fetches_every_subregion_concurrently_in_input_order(self):
+        jobs = [('us', subregion) for subregion in US_SUBREGIONS[:16]]
+        latency = 0.2
+        with stub_server('--latency', latency) as base_url, make_client(base_url, 8) as client:
+            start = time.perf_counter()
+            fetched = region_data.fetch_all_subregions(client, jobs, 8)
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(list(fetched['us']), [subregion['name'] for subregion in US_SUBREGIONS[:16]])
+        for species in fetched['us'].values():
+            self.assertTrue(species)
+            self.assertEqual(species, sorted(set(species)))
+        # 16 requests one after another would take 3.2 s; 8 workers need about two rounds
+        self.assertLess(elapsed, len(jobs) * latency / 2)
+
+    def test_skips_subregions_whose_request_failed(self):
+        jobs = [('us', subregion) for subregion in US_SUBREGIONS[:4]]
+        with stub_server('--fail-rate', 1.0) as base_url, make_client(base_url, 4) as client:
+            fetched = region_data.fetch_all_subregions(client, jobs, 4)
+        self.assertEqual(fetched, {})
+
+    def test_observation_fetch_is_labelled(self):
+        jobs = [('us', US_SUBREGIONS[0])]
+        with tempfile.TemporaryDirectory() as workdir, stub_server() as base_url, make_client(base_url, 1) as client:
+            store = region_data.ObservationStore(os.path.join(workdir, 'obs.json'), 30)
+            fetch = region_data.partial(region_data.fetch_subregion_observations, store, region_data.date.today())
+            fetched = region_data.fetch_all_subregions(client, jobs, 1, fetch, 'observations')
+        observations = fetched['us'][US_SUBREGIONS[0]['name']]
+        self.assertTrue(all('speciesCode' in observation for observation in observations))
+
+
+class AllSubregionsCommandTest(unittest.TestCase):
+    def test_all_writes_one_merged_document(self):
+        with tempfile.TemporaryDirectory() as workdir, stub_server() as base_url:
+            subregions_file = os.path.join(workdir, 'us-subregions.json')
+            with open(subregions_file, 'w', encoding='utf-8') as f:
+                json.dump(US_SUBREGIONS[:5], f)
+            output_file = os.path.join(workdir, 'out.json')
+            result = run_script('generate-daily-region-data.py', subregions_file, output_file, '--all',
+                                '--workers', 5, '--api-base', f'{base_url}/v2', '--rate', 100,
+                                env={'EBIRD_API_KEY': 'test'})
+            self.assertEqual(result.returncode, 0, result.stderr)
+            with open(output_file, 'r', encoding='utf-8') as f:
+                output = json.load(f)
+
+        self.assertEqual(list(output), ['us'])
+        self.assertEqual(list(output['us']), [subregion['name'] for subregion in US_SUBREGIONS[:5]])
+        self.assertTrue(all(species and 'id' in species[0] for species in output['us'].values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+"""transcode-audio.py against generated WAV fixtures, without ffmpeg."""
+
+import array
+import json
+import math
+import os
+import tempfile
+import unittest
+import wave
+
+from support import load_script, local_birds, run_script, stub_server
+
+from audio_store import asset_id_for
+
+transcode = load_script('transcode-audio.py')
+
+
+def load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_tone(path, seconds, rate=44100, channels=2, sample_width=2):
+    """A sine tone WAV fixture with the given layout."""
+    frames = []
+    for n in range(int(seconds * rate)):
+        value = math.sin(2 * math.pi * 440 * n / rate)
+        if sample_width == 1:
+            frames.append(bytes([int(127 + 100 * value)]) * channels)
+        else:
+            frames.append(array.array('h', [int(12000 * value)] * channels).tobytes())
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(rate)
+        wav.writeframes(b''.join(frames))
+
+
+class MakeClipTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workdir.cleanup)
+        self.source = os.path.join(self.workdir.name, 'source.wav')
+        self.digest = 'ab' * 32
+
+    def make_clip(self, **settings):
+        options = {'fmt': 'wav', 'start': 0.5, 'seconds': 1.0, 'bitrate': '24k', 'sample_rate': 8000, **settings}
+        _, path, size = transcode.make_clip(self.digest, self.source, self.workdir.name, options['fmt'],
+                                            options['start'], options['seconds'], options['bitrate'],
+                                            options['sample_rate'])
+        self.assertEqual(size, os.path.getsize(path))
+        return path
+
+    def test_stereo_clip_is_trimmed_mixed_and_downsampled(self):
+        write_tone(self.source, 3)
+        with wave.open(self.make_clip(), 'rb') as clip:
+            self.assertEqual((clip.getnchannels(), clip.getsampwidth(), clip.getframerate()), (1, 2, 8000))
+            self.assertEqual(clip.getnframes(), 8000)
+            samples = array.array('h', clip.readframes(clip.getnframes()))
+        self.assertGreater(max(samples), 10000)  # The tone survives the mono mix
+
+    def test_8bit_source_and_lower_rate_are_not_upsampled(self):
+        write_tone(self.source, 2, rate=8000, channels=1, sample_width=1)
+        with wave.open(self.make_clip(sample_rate=22050), 'rb') as clip:
+            self.assertEqual((clip.getnchannels(), clip.getsampwidth(), clip.getframerate()), (1, 2, 8000))
+
+    def test_clip_settings_are_part_of_the_name(self):
+        write_tone(self.source, 3)
+        first = self.make_clip()
+        mtime = os.path.getmtime(first)
+        self.assertEqual(self.make_clip(), first)
+        self.assertEqual(os.path.getmtime(first), mtime)  # Same settings reuse the clip
+
+        changed = {self.make_clip(seconds=2.0), self.make_clip(start=0.0), self.make_clip(sample_rate=16000)}
+        self.assertNotIn(first, changed)
+        self.assertEqual(len(changed), 3)
+        with wave.open(self.make_clip(seconds=2.0), 'rb') as clip:
+            self.assertEqual(clip.getnframes(), 16000)
+
+
+class TranscodePipelineTest(unittest.TestCase):
+    def test_download_and_transcode_wav_fixtures(self):
+        fixtures = ('--asset-format', 'wav', '--asset-seconds', 20)
+        with tempfile.TemporaryDirectory() as workdir, stub_server(*fixtures) as base_url:
+            # Asset 1001 is shared by both regions
+            birds = local_birds(base_url, {'us': [[1001, 1002], [1003]], 'uk': [[1001]]})
+            birds_file = os.path.join(workdir, 'birds.json')
+            with open(birds_file, 'w', encoding='utf-8') as f:
+                json.dump(birds, f)
+            store_dir = os.path.join(workdir, 'store')
+            clips_dir = os.path.join(workdir, 'clips')
+            rewritten_file = os.path.join(workdir, 'birds-clips.json')
+
+            result = run_script('download-audio.py', birds_file, '--store', store_dir, '--workers', 3)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            result = run_script('transcode-audio.py', birds_file, '--store', store_dir, '--output-dir', clips_dir,
+                                '--format', 'wav', '--seconds', 5, '--sample-rate', 8000, '--workers', 2,
+                                '--rewrite-birds', rewritten_file, '--url-prefix', '/clips')
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertIn('Clips: 3 (0 failed)', result.stdout)
+
+            assets = load_json(os.path.join(store_dir, 'index.json'))['assets']
+            source_mb = sum(entry['bytes'] for entry in assets.values()) / 1e6
+            self.assertIn(f'Bytes: {source_mb:.1f} MB source', result.stdout)  # Shared asset counted once
+
+            manifest = load_json(os.path.join(clips_dir, 'manifest.json'))
+            shared = asset_id_for(birds['uk'][0]['audioUrl'][0])
+            self.assertEqual(manifest['uk']['uk000'][0]['path'], manifest['us']['us000'][0]['path'])
+            for region in manifest.values():
+                for clips in region.values():
+                    for clip in clips:
+                        with wave.open(os.path.join(clips_dir, clip['path']), 'rb') as wav:
+                            self.assertEqual((wav.getframerate(), wav.getnframes()), (8000, 40000))
+            self.assertIn(shared, assets)
+
+            rewritten = load_json(rewritten_file)
+            self.assertEqual(rewritten['us'][0]['audioUrl'],
+                             [f"/clips/{clip['path']}" for clip in manifest['us']['us000']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Audio Clip Transcoder
+
+Runs after game-data-generator.py and download-audio.py: trims every stored
+asset to a short clip, re-encodes it at a low bitrate, and writes a manifest
+mapping species id to clip paths and byte sizes. Optionally writes a copy of
+birds.json whose audioUrl lists point at the clips.
+
+Encoding uses ffmpeg. WAV input with --format wav is trimmed, mixed to mono
+and downsampled with the standard library, so the pipeline runs without ffmpeg
+against WAV fixtures (e.g. from `ebird-stub-server.py --asset-format wav`).
+
+Clips are named after the source digest and the clip settings, so changing
+--format, --start, --seconds, --bitrate or --sample-rate builds new clips
+instead of reusing ones made with other settings.
+
+Usage:
+    python transcode-audio.py ./public/data/birds.json --store ./audio/store \
+        --output-dir ./public/audio/clips --manifest ./public/audio/clips/manifest.json \
+        --rewrite-birds ./public/data/birds-clips.json --url-prefix /audio/clips
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import wave
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from audio_store import AudioStore, asset_id_for
+
+FORMATS = {
+    # format: (extension, ffmpeg codec arguments)
+    'opus': ('opus', ['-c:a', 'libopus', '-application', 'audio']),
+    'mp3': ('mp3', ['-c:a', 'libmp3lame']),
+    'wav': ('wav', ['-c:a', 'pcm_s16le']),
+}
+
+
+def is_wav(path):
+    with open(path, 'rb') as f:
+        header = f.read(12)
+    return header[:4] == b'RIFF' and header[8:12] == b'WAVE'
+
+
+def clip_name(sha256, fmt, start, seconds, bitrate, sample_rate):
+    """File name of a clip: the source digest plus a tag for the settings it was built with."""
+    settings = json.dumps([fmt, start, seconds, bitrate if fmt != 'wav' else None, sample_rate])
+    tag = hashlib.sha256(settings.encode('utf-8')).hexdigest()[:8]
+    ext, _ = FORMATS[fmt]
+    return f'{sha256[:16]}-{tag}.{ext}'
+
+
+def decode_pcm(frames, sample_width):
+    """Unpack little-endian PCM frames into signed 16-bit samples."""
+    if sample_width == 2:
+        samples = array('h', frames)
+        if sys.byteorder == 'big':
+            samples.byteswap()
+        return samples
+    if sample_width == 1:  # 8-bit WAV is unsigned
+        return array('h', ((value - 128) << 8 for value in frames))
+    return array('h', (int.from_bytes(frames[i:i + sample_width], 'little', signed=True) >> (8 * sample_width - 16)
+                       for i in range(0, len(frames), sample_width)))
+
+
+def trim_wav(source, target, start, seconds, sample_rate):
+    """Write a [start, start + seconds) window of a WAV file as 16-bit mono, downsampled to sample_rate."""
+    with wave.open(source, 'rb') as src:
+        channels = src.getnchannels()
+        sample_width = src.getsampwidth()
+        rate = src.getframerate()
+        first = min(int(start * rate), src.getnframes())
+        src.setpos(first)
+        samples = decode_pcm(src.readframes(int(seconds * rate)), sample_width)
+
+    if channels > 1:
+        mixed = [sum(frame) // channels for frame in zip(*(samples[c::channels] for c in range(channels)))]
+        samples = array('h', mixed)
+
+    out_rate = min(sample_rate, rate)  # Never upsample, it only adds bytes
+    if out_rate < rate and samples:
+        step = rate / out_rate
+        last = len(samples) - 1
+        samples = array('h', (samples[min(int(i * step), last)] for i in range(int(len(samples) / step))))
+
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    with wave.open(target, 'wb') as dst:
+        dst.setnchannels(1)
+        dst.setsampwidth(2)
+        dst.setframerate(out_rate)
+        dst.writeframes(samples.tobytes())
+
+
+def transcode(source, target, fmt, start, seconds, bitrate, sample_rate):
+    """Trim and re-encode one file with ffmpeg."""
+    _, codec_args = FORMATS[fmt]
+    command = [
+        'ffmpeg', '-nostdin', '-y', '-loglevel', 'error',
+        '-ss', str(start), '-t', str(seconds), '-i', source,
+        '-vn', '-ac', '1', '-ar', str(sample_rate),
+        *codec_args,
+    ]
+    if fmt != 'wav':
+        command += ['-b:a', bitrate]
+    subprocess.run(command + [target], check=True, capture_output=True)
+
+
+def make_clip(sha256, source, output_dir, fmt, start, seconds, bitrate, sample_rate):
+    """Process-pool worker: build one clip and return (source digest, clip path, size in bytes)."""
+    ext, _ = FORMATS[fmt]
+    target = os.path.join(output_dir, clip_name(sha256, fmt, start, seconds, bitrate, sample_rate))
+    if os.path.exists(target):  # Same source and settings, so the clip is already correct
+        return sha256, target, os.path.getsize(target)
+
+    tmp_target = f'{target}.tmp.{ext}'
+    if fmt == 'wav' and is_wav(source):
+        trim_wav(source, tmp_target, start, seconds, sample_rate)
+    else:
+        transcode(source, tmp_target, fmt, start, seconds, bitrate, sample_rate)
+    os.replace(tmp_target, target)
+    return sha256, target, os.path.getsize(target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Trim and re-encode stored audio into small clips for the game.')
+    parser.add_argument('birds_file', help='Path to birds.json')
+    parser.add_argument('--store', default='./audio/store', help='Store directory written by download-audio.py (default: ./audio/store)')
+    parser.add_argument('--output-dir', default='./public/audio/clips', help='Directory for clips (default: ./public/audio/clips)')
+    parser.add_argument('--manifest', help='Manifest output path (default: <output-dir>/manifest.json)')
+    parser.add_argument('--format', choices=sorted(FORMATS), default='opus', help='Clip format (default: opus)')
+    parser.add_argument('--bitrate', default='24k', help='Target bitrate for lossy formats (default: 24k)')
+    parser.add_argument('--sample-rate', type=int, default=22050, help='Output sample rate for ffmpeg encodes (default: 22050)')
+    parser.add_argument('--start', type=float, default=0.0, help='Clip start offset in seconds (default: 0)')
+    parser.add_argument('--seconds', type=float, default=10.0, help='Clip length in seconds (default: 10)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Encoder processes (default: CPU count)')
+    parser.add_argument('--rewrite-birds', help='Also write a copy of birds.json whose audioUrl lists point at the clips')
+    parser.add_argument('--url-prefix', default='/audio/clips', help='URL prefix for clips in --rewrite-birds output (default: /audio/clips)')
+    args = parser.parse_args()
+
+    if args.format != 'wav' and shutil.which('ffmpeg') is None:
+        print(f"❌ ffmpeg not found on PATH (required for --format {args.format})", file=sys.stderr)
+        sys.exit(1)
+
+    with open(args.birds_file, 'r', encoding='utf-8') as f:
+        birds_data = json.load(f)
+
+    store = AudioStore(args.store)
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest_path = args.manifest or os.path.join(args.output_dir, 'manifest.json')
+
+    # One clip job per stored object, however many URLs, species or regions reference it
+    jobs = {}
+    digests = {}
+    missing = 0
+    for birds in birds_data.values():
+        for bird in birds:
+            for url in bird.get('audioUrl', []):
+                asset_id = asset_id_for(url)
+                entry = store.get(asset_id)
+                if entry is None:
+                    missing += 1
+                    continue
+                digests[asset_id] = entry
+                jobs.setdefault(entry['sha256'], store.object_path(entry['sha256'], entry['ext']))
+
+    print(f"🎵 Building {len(jobs)} clips ({missing} URLs not in store) with {args.workers} workers...")
+
+    clips = {}
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(make_clip, sha256, source, args.output_dir, args.format,
+                            args.start, args.seconds, args.bitrate, args.sample_rate)
+            for sha256, source in jobs.items()
+        ]
+        for future in as_completed(futures):
+            try:
+                sha256, path, size = future.result()
+                clips[sha256] = (path, size)
+            except Exception as e:
+                failed += 1
+                print(f"❌ {e}")
+
+    # Manifest: region -> species id -> clips
+    manifest = {}
+    for region, birds in birds_data.items():
+        region_manifest = manifest.setdefault(region, {})
+        for bird in birds:
+            for url in bird.get('audioUrl', []):
+                entry = digests.get(asset_id_for(url))
+                if entry is None or entry['sha256'] not in clips:
+                    continue
+                path, size = clips[entry['sha256']]
+                region_manifest.setdefault(bird['id'], []).append({
+                    'path': os.path.relpath(path, args.output_dir),
+                    'bytes': size,
+                    'source': url,
+                })
+
+    # Each stored object and its clip are counted once, however often they are referenced
+    source_bytes = sum(entry['bytes'] for entry in {e['sha256']: e for e in digests.values()}.values()
+                       if entry['sha256'] in clips)
+    clip_bytes = sum(size for _, size in clips.values())
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    if args.rewrite_birds:
+        prefix = args.url_prefix.rstrip('/')
+        rewritten = {}
+        for region, birds in birds_data.items():
+            species_clips = manifest.get(region, {})
+            rewritten[region] = [
+                {**bird, 'audioUrl': [f"{prefix}/{clip['path']}" for clip in species_clips[bird['id']]]}
+                if bird['id'] in species_clips else bird
+                for bird in birds
+            ]
+        with open(args.rewrite_birds, 'w', encoding='utf-8') as f:
+            json.dump(rewritten, f, indent=2, ensure_ascii=False)
+        print(f"✅ Clip-based birds data saved to {args.rewrite_birds}")
+
+    ratio = source_bytes / clip_bytes if clip_bytes else 0
+    print("\n📊 Summary:")
+    print(f"   Clips: {len(clips)} ({failed} failed)")
+    print(f"   Bytes: {source_bytes / 1e6:.1f} MB source -> {clip_bytes / 1e6:.1f} MB clips ({ratio:.1f}x smaller)")
+    print(f"✅ Manifest saved to {manifest_path}")
+
+
+if __name__ == '__main__':
+    main()
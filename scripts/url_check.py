@@ -0,0 +1,138 @@
+"""
+Liveness checks for the audio URLs in birds.json.
+
+Each URL is probed with a HEAD request, falling back to a one-byte ranged GET
+when the server refuses HEAD. Results are kept in a JSON status cache:
+
+    {"urls": {url: {"state": "alive" | "dead" | "error", "status": 200,
+                    "contentLength": 123456, "contentType": "audio/mpeg",
+                    "checkedAt": 1700000000}}}
+
+Alive and dead results younger than the TTL are not probed again. Errors
+(timeouts, 5xx, 429) are treated as transient: they are never fresh and never
+cause a URL to be pruned. Only 404 and 410 mark a URL dead.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+import requests
+
+from audio_store import HostSessionPool
+
+DEFAULT_STATUS_CACHE = os.getenv('BIRDLE_URL_STATUS', '.cache/audio-url-status.json')
+DEFAULT_TTL = 7 * 24 * 3600
+DEAD_STATUSES = {404, 410}
+HEAD_UNSUPPORTED = {403, 405, 501}
+CONTENT_RANGE_TOTAL = re.compile(r'/(\d+)$')
+
+
+def content_length_for(response: requests.Response) -> Optional[int]:
+    """Full size of the resource: the Content-Range total for ranged answers, else Content-Length."""
+    if response.status_code == 206:
+        match = CONTENT_RANGE_TOTAL.search(response.headers.get('Content-Range', ''))
+        if match:
+            return int(match.group(1))
+    length = response.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+
+def probe_url(session: requests.Session, url: str, timeout: float = 10) -> Dict[str, Any]:
+    """Probe one URL without downloading its body and return its status entry."""
+    try:
+        response = session.head(url, allow_redirects=True, timeout=timeout)
+        if response.status_code in HEAD_UNSUPPORTED:
+            with session.get(url, headers={'Range': 'bytes=0-0'}, stream=True, timeout=timeout) as response:
+                pass  # Leaving the block without reading the body discards it
+    except requests.RequestException as e:
+        return {'state': 'error', 'status': None, 'error': str(e), 'checkedAt': int(time.time())}
+
+    if response.status_code < 400:
+        state = 'alive'
+    elif response.status_code in DEAD_STATUSES:
+        state = 'dead'
+    else:
+        state = 'error'
+    return {
+        'state': state,
+        'status': response.status_code,
+        'contentLength': content_length_for(response) if state == 'alive' else None,
+        'contentType': response.headers.get('Content-Type', '').split(';')[0].strip() or None,
+        'checkedAt': int(time.time()),
+    }
+
+
+class UrlStatusCache:
+    """JSON-backed URL status cache with a freshness TTL."""
+
+    def __init__(self, path: str = DEFAULT_STATUS_CACHE, ttl: float = DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('urls', {})
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            return self.entries.get(url)
+
+    def is_fresh(self, url: str, now: Optional[float] = None) -> bool:
+        entry = self.get(url)
+        if not entry or entry['state'] == 'error':
+            return False
+        return (now or time.time()) - entry['checkedAt'] < self.ttl
+
+    def put(self, url: str, entry: Dict[str, Any]) -> None:
+        with self.lock:
+            self.entries[url] = entry
+
+    def dead_urls(self) -> Set[str]:
+        with self.lock:
+            return {url for url, entry in self.entries.items() if entry['state'] == 'dead'}
+
+    def save(self) -> None:
+        """Atomically write the cache."""
+        with self.lock:
+            data = {'urls': dict(sorted(self.entries.items()))}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def check_urls(urls: Iterable[str], cache: UrlStatusCache, workers: int = 64, per_host: int = 32,
+               timeout: float = 10, on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> List[str]:
+    """
+    Probe every URL whose cache entry is missing, stale or an error, on a
+    bounded thread pool with pooled keep-alive connections capped per host.
+    Results go into the cache as they arrive. Returns the URLs probed.
+    """
+    todo = [url for url in dict.fromkeys(urls) if not cache.is_fresh(url)]
+    sessions = HostSessionPool(per_host)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(probe_url, sessions.get(url), url, timeout): url for url in todo}
+            for future in as_completed(futures):
+                url = futures[future]
+                entry = future.result()
+                cache.put(url, entry)
+                if on_result:
+                    on_result(url, entry)
+    finally:
+        sessions.close()
+    return todo
+
+
+def load_dead_urls(path: str) -> Set[str]:
+    """URLs a status cache recorded as dead (404/410), for builds that should skip them."""
+    return UrlStatusCache(path, ttl=0).dead_urls()
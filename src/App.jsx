@@ -4,7 +4,7 @@ import { Play, Pause, Settings, Share2, Volume2, MapPin, RefreshCw, Info, BarCha
 
 import PracticeGame from './utils/PracticeGame';
 import CountdownToMidnight from './utils/CountdownToMidnight';
-import { loadGameData } from './utils/LoadGameData';
+import { loadGameData, loadRegionBirds } from './utils/LoadGameData';
 import { getTodayString, formatDateForDisplay } from './utils/DateUtils';
 import { getStoredData, setStoredData } from './utils/StorageUtils';
 import {
@@ -26,6 +26,9 @@ export default function AudioBirdle() {
   // Data state
   const [regions, setRegions] = useState([]);
   const [birds, setBirds] = useState({});
+  const [hashIndex, setHashIndex] = useState({});
+  const [distractors, setDistractors] = useState({});
+  const [shardManifest, setShardManifest] = useState(null);
   const [currentView, setCurrentView] = useState(VIEWS.GAME);
   const [selectedRegion, setSelectedRegion] = useState(() =>
     getStoredData(STORAGE_KEYS.REGION, null)
@@ -49,16 +52,31 @@ export default function AudioBirdle() {
   // Current daily game state
   const currentDailyGame = selectedRegion ? getDailyGameState(gameState, selectedRegion, today) : null;
 
-  // Load initial data
+  // Load initial data (only the stored region's birds when sharded data is available)
   useEffect(() => {
-    loadGameData()
-      .then(({ regions, birds }) => {
+    loadGameData(getStoredData(STORAGE_KEYS.REGION, null))
+      .then(({ regions, birds, hashIndex, distractors, shardManifest }) => {
         setRegions(regions);
         setBirds(birds);
+        setHashIndex(hashIndex);
+        setDistractors(distractors);
+        setShardManifest(shardManifest);
       })
       .catch(console.error);
   }, []);
 
+  // Load a region's shards the first time it is selected
+  useEffect(() => {
+    if (!shardManifest || !selectedRegion || birds[selectedRegion] || !shardManifest.regions[selectedRegion]) return;
+    loadRegionBirds(shardManifest, selectedRegion)
+      .then(loaded => {
+        setBirds(prev => ({ ...prev, [selectedRegion]: loaded.birds }));
+        setHashIndex(prev => ({ ...prev, [selectedRegion]: loaded.hashIndex }));
+        setDistractors(prev => ({ ...prev, [selectedRegion]: loaded.distractors }));
+      })
+      .catch(console.error);
+  }, [shardManifest, selectedRegion, birds]);
+
   // Bird loading state
   const [todaysBird, setTodaysBird] = useState(null);
   const [loadingBird, setLoadingBird] = useState(false);
@@ -71,7 +89,7 @@ export default function AudioBirdle() {
   useEffect(() => {
     if (selectedRegion && birds[selectedRegion]) {
       setLoadingBird(true);
-      getDailyBirdWithFallback(selectedRegion, birds[selectedRegion], today)
+      getDailyBirdWithFallback(selectedRegion, birds[selectedRegion], today, hashIndex[selectedRegion])
         .then(bird => {
           setTodaysBird(bird);
           setLoadingBird(false);
@@ -84,7 +102,7 @@ export default function AudioBirdle() {
           setLoadingBird(false);
         });
     }
-  }, [selectedRegion, birds, today]);
+  }, [selectedRegion, birds, hashIndex, today]);
 
   // Generate answer options
   const answerOptions = generateAnswerOptions(
@@ -92,7 +110,8 @@ export default function AudioBirdle() {
     birds,
     today,
     todaysBird,
-    GAME_CONFIG.ANSWER_OPTIONS_COUNT
+    GAME_CONFIG.ANSWER_OPTIONS_COUNT,
+    distractors[selectedRegion]
   );
 
   // Persist game state
@@ -561,6 +580,7 @@ export default function AudioBirdle() {
       <PracticeGame
         region={selectedRegion}
         birds={birds}
+        distractors={distractors[selectedRegion]}
         regions={regions}
         onBack={() => setCurrentView(VIEWS.GAME)}
       />
@@ -16,19 +16,38 @@ export const hashBirdId = (birdId) => {
   return fullHash.substring(0, 8); // Return first 8 characters
 };
 
+/**
+ * Compare two answer hashes numerically, so zero-padded hashes from the
+ * Python generators match unpadded hashes from hashBirdId
+ * @param {string} a - First hash
+ * @param {string} b - Second hash
+ * @returns {boolean} - True if both hashes have the same value
+ */
+const hashesMatch = (a, b) => parseInt(a, 16) === parseInt(b, 16);
+
 /**
  * Find the bird that matches the given answer hash
  * @param {Array} birds - Array of bird objects
  * @param {string} answerHash - The hash to match against
+ * @param {Object} [hashIndex] - Precomputed answer hash -> bird index lookup for this region
  * @returns {Object|null} - The matching bird or null if not found
  */
-export const findBirdByHash = (birds, answerHash) => {
+export const findBirdByHash = (birds, answerHash, hashIndex = null) => {
   if (!birds || !answerHash) return null;
+
+  // Single lookup when the generator's hash index is available
+  if (hashIndex) {
+    const bird = birds[hashIndex[answerHash.toLowerCase()]];
+    if (bird && hashesMatch(hashBirdId(bird.id), answerHash)) {
+      return bird;
+    }
+  }
   
+  // Fall back to hashing every bird (missing or stale index)
   for (const bird of birds) {
     const birdHash = hashBirdId(bird.id);
     // console.log(`Checking bird: ${bird.name} (${bird.id}) -> Hash: ${birdHash}, Against: ${answerHash}`);
-    if (birdHash === answerHash.toLowerCase()) {
+    if (hashesMatch(birdHash, answerHash)) {
       return bird;
     }
   }
@@ -60,27 +79,62 @@ export const loadDailyBirdData = async () => {
   }
 };
 
+// One request per date, shared by every caller (daily bird, subregion display)
+const dailyEntriesByDate = new Map();
+
+/**
+ * Load the entries scheduled for one date from its immutable daily/<date>.json
+ * shard, falling back to the full daily.json when the shard is not published
+ * @param {string} date - Date string (YYYY-MM-DD)
+ * @returns {Promise<Array>} - Promise resolving to that date's entries
+ */
+export const loadDailyEntries = (date) => {
+  if (!dailyEntriesByDate.has(date)) {
+    const request = (async () => {
+      try {
+        const response = await fetch(`/data/daily/${date}.json`);
+        if (response.ok) {
+          const entries = await response.json();
+          if (Array.isArray(entries)) {
+            return entries;
+          }
+        }
+      } catch {
+        // Missing shard (or an HTML fallback page); use daily.json below
+      }
+      const dailyData = await loadDailyBirdData();
+      return dailyData.filter(entry => entry.date === date);
+    })();
+    // Let a failed load be retried on the next call
+    request.catch(() => dailyEntriesByDate.delete(date));
+    dailyEntriesByDate.set(date, request);
+  }
+  return dailyEntriesByDate.get(date);
+};
+
+/**
+ * Load the daily entry for a region and date
+ * @param {string} region - Region identifier
+ * @param {string} date - Date string (YYYY-MM-DD)
+ * @returns {Promise<Object|undefined>} - Promise resolving to the entry, if scheduled
+ */
+export const loadDailyEntry = async (region, date) => {
+  const entries = await loadDailyEntries(date);
+  return entries.find(entry => entry.region === region);
+};
+
 /**
  * Get today's bird using the daily.json approach
  * @param {string} region - The selected region
  * @param {Array} birds - Array of birds for the region
  * @param {string} date - Current date string (YYYY-MM-DD)
+ * @param {Object} [hashIndex] - Precomputed answer hash -> bird index lookup for this region
  * @returns {Promise<Object|null>} - Promise resolving to today's bird or null
  */
-export const getTodaysBirdFromDaily = async (region, birds, date) => {
+export const getTodaysBirdFromDaily = async (region, birds, date, hashIndex = null) => {
   try {
-    const dailyData = await loadDailyBirdData();
-    
-    // Additional safety check
-    if (!Array.isArray(dailyData)) {
-      console.error('Daily data is not an array, cannot proceed');
-      return null;
-    }
-    
     // Find the entry for today's date and region
-    const todaysEntry = dailyData.find(entry =>
-      entry.date === date && entry.region === region
-    );
+    const todaysEntry = await loadDailyEntry(region, date);
     
     if (!todaysEntry) {
       console.warn(`No daily bird entry found for ${region} on ${date}`);
@@ -88,7 +142,7 @@ export const getTodaysBirdFromDaily = async (region, birds, date) => {
     }
     
     // Find the bird that matches the hash
-    const bird = findBirdByHash(birds, todaysEntry.answerHash);
+    const bird = findBirdByHash(birds, todaysEntry.answerHash, hashIndex);
     if (!bird) {
       console.warn(`No bird found matching hash ${todaysEntry.answerHash} for ${region} on ${date}`);
       return null;
@@ -0,0 +1,46 @@
+// Wrong-answer candidates for the multiple-choice rounds.
+// Uses the per-region distractor table written by game-data-generator.py (see scripts/distractors.py)
+// so a question costs O(family + similar list); without a table it scans the region's birds.
+
+/**
+ * Look up a bird's table entry, checking it still points at the same bird
+ * @param {Array} regionBirds - The region's birds, in birds.json order
+ * @param {Object} [distractors] - The region's distractor table
+ * @param {Object} correctBird - The correct answer
+ * @returns {Array|null} - [familyId, orderId, position], or null when missing or stale
+ */
+const getTableEntry = (regionBirds, distractors, correctBird) => {
+  const entry = distractors?.species?.[correctBird.id];
+  return entry && regionBirds[entry[2]]?.id === correctBird.id ? entry : null;
+};
+
+/**
+ * Other birds of the correct bird's family, in region order
+ * @param {Array} regionBirds - The region's birds, in birds.json order
+ * @param {Object} correctBird - The correct answer
+ * @param {Object} [distractors] - The region's distractor table
+ * @returns {Array} - Same-family birds, excluding the correct one
+ */
+export const getSameFamilyBirds = (regionBirds, correctBird, distractors = null) => {
+  const entry = getTableEntry(regionBirds, distractors, correctBird);
+  if (entry) {
+    const [familyId, , position] = entry;
+    return distractors.familyMembers[familyId]
+      .filter(index => index !== position)
+      .map(index => regionBirds[index]);
+  }
+  return regionBirds.filter(bird => bird.id !== correctBird.id && bird.family === correctBird.family);
+};
+
+/**
+ * Birds from other families to fill the remaining options
+ * @param {Array} regionBirds - The region's birds, in birds.json order
+ * @param {Object} correctBird - The correct answer
+ * @param {Object} [distractors] - The region's distractor table
+ * @returns {Array} - With a table, the ranked similar species (same order first); otherwise every other-family bird
+ */
+export const getOtherFamilyBirds = (regionBirds, correctBird, distractors = null) => {
+  const entry = getTableEntry(regionBirds, distractors, correctBird);
+  const candidates = entry ? distractors.similar[entry[2]].map(index => regionBirds[index]) : regionBirds;
+  return candidates.filter(bird => bird.id !== correctBird.id && bird.family !== correctBird.family);
+};
@@ -2,6 +2,7 @@
 
 import { getTodaysBirdFromDaily, findBirdByHash } from './DailyBirdUtils';
 import { hashString } from './HashUtils';
+import { getSameFamilyBirds, getOtherFamilyBirds } from './DistractorUtils';
 import { GAME_CONFIG } from './Constants';
 
 /**
@@ -315,12 +316,13 @@ export const getDailyBird = (region, birds, date) => {
  * @param {string} region - Region identifier
  * @param {Array} birds - Array of birds for the region
  * @param {string} date - Date string (YYYY-MM-DD)
+ * @param {Object} [hashIndex] - Precomputed answer hash -> bird index lookup for this region
  * @returns {Promise<Object|null>} - Promise resolving to today's bird
  */
-export const getDailyBirdWithFallback = async (region, birds, date) => {
+export const getDailyBirdWithFallback = async (region, birds, date, hashIndex = null) => {
   try {
     // First try to get from daily.json
-    const bird = await getTodaysBirdFromDaily(region, birds, date);
+    const bird = await getTodaysBirdFromDaily(region, birds, date, hashIndex);
     if (bird) return bird;
     
     // Fallback to hash-based selection
@@ -372,9 +374,10 @@ const deterministicShuffle = (array, seed) => {
  * @param {string} date - Date string
  * @param {Object} correctBird - The correct bird for today
  * @param {number} optionCount - Number of options to generate
+ * @param {Object} [distractors] - Precomputed distractor table for this region
  * @returns {Array} - Array of bird options including the correct answer
  */
-export const generateAnswerOptions = (region, birds, date, correctBird, optionCount = 4) => {
+export const generateAnswerOptions = (region, birds, date, correctBird, optionCount = 4, distractors = null) => {
   if (!birds[region] || !correctBird) return [];
   
   const regionBirds = birds[region];
@@ -383,11 +386,8 @@ export const generateAnswerOptions = (region, birds, date, correctBird, optionCo
   const seed = hashString(`${region}-${date}-${correctBird.id}-options`);
   const random = createSeededRandom(seed);
   
-  // Get birds that aren't the correct answer
-  const availableBirds = regionBirds.filter(bird => bird.id !== correctBird.id);
-  
   // First, try to get birds from the same family as the correct bird
-  const sameFamilyBirds = availableBirds.filter(bird => bird.family === correctBird.family);
+  const sameFamilyBirds = getSameFamilyBirds(regionBirds, correctBird, distractors);
   
   let selectedWrongBirds = [];
   
@@ -401,8 +401,8 @@ export const generateAnswerOptions = (region, birds, date, correctBird, optionCo
     const shuffledSameFamily = deterministicShuffle(sameFamilyBirds, seed);
     selectedWrongBirds = [...shuffledSameFamily];
     
-    // Get remaining birds (excluding same family birds and correct bird)
-    const remainingBirds = availableBirds.filter(bird => bird.family !== correctBird.family);
+    // Get remaining birds (similar species from other families, or every other-family bird without a table)
+    const remainingBirds = getOtherFamilyBirds(regionBirds, correctBird, distractors);
     const shuffledRemaining = deterministicShuffle(remainingBirds, seed);
     
     // Add birds from other families to reach the desired count
@@ -1,9 +1,86 @@
-export async function loadGameData() {
+// Sharded bird data written by game-data-generator.py --shard-dir (see scripts/bird_shards.py)
+const SHARD_DIR = '/data/birds';
+
+const decodeUrl = (value, prefixes) => {
+  const match = /^(\d+):/.exec(value);
+  return match ? prefixes[Number(match[1])] + value.slice(match[0].length) : value;
+};
+
+async function loadShardManifest() {
+  try {
+    const response = await fetch(`${SHARD_DIR}/manifest.json`);
+    if (response.ok) {
+      return await response.json();
+    }
+  } catch (error) {
+    console.warn('Bird shards unavailable, falling back to birds.json:', error);
+  }
+  return null;
+}
+
+// Load one region's birds (with decoded audio URLs), hash index and distractor table from its shards
+export async function loadRegionBirds(manifest, regionId) {
+  const region = manifest.regions[regionId];
+  if (!region) {
+    return { birds: [], hashIndex: {}, distractors: null };
+  }
+
+  const [shard, audio] = await Promise.all([
+    fetch(`${SHARD_DIR}/${region.birds}`).then(res => res.json()),
+    region.audio ? fetch(`${SHARD_DIR}/${region.audio}`).then(res => res.json()) : null
+  ]);
+
+  const birds = shard.birds.map(bird => ({
+    ...bird,
+    audioUrl: (audio ? audio[bird.id] : bird.audioUrl).map(url => decodeUrl(url, manifest.urlPrefixes))
+  }));
+
+  return { birds, hashIndex: shard.hashIndex, distractors: shard.distractors || null };
+}
+
+export async function loadGameData(selectedRegion = null) {
   const regionsRes = await fetch('/data/regions.json');
   const regions = await regionsRes.json();
 
+  // With shards, only the selected region is downloaded up front; others load on demand
+  const shardManifest = await loadShardManifest();
+  if (shardManifest) {
+    const birds = {};
+    const hashIndex = {};
+    const distractors = {};
+    if (selectedRegion && shardManifest.regions[selectedRegion]) {
+      const loaded = await loadRegionBirds(shardManifest, selectedRegion);
+      birds[selectedRegion] = loaded.birds;
+      hashIndex[selectedRegion] = loaded.hashIndex;
+      distractors[selectedRegion] = loaded.distractors;
+    }
+    return { regions, birds, hashIndex, distractors, shardManifest };
+  }
+
   const birdsRes = await fetch('/data/birds.json');
   const birds = await birdsRes.json();
 
-  return { regions, birds };
+  // Optional answer hash -> bird index lookup written by game-data-generator.py
+  let hashIndex = {};
+  try {
+    const hashIndexRes = await fetch('/data/birds-hash-index.json');
+    if (hashIndexRes.ok) {
+      hashIndex = await hashIndexRes.json();
+    }
+  } catch (error) {
+    console.warn('Hash index unavailable, falling back to hashing birds:', error);
+  }
+
+  // Optional per-region distractor tables written by game-data-generator.py
+  let distractors = {};
+  try {
+    const distractorsRes = await fetch('/data/birds-distractors.json');
+    if (distractorsRes.ok) {
+      distractors = await distractorsRes.json();
+    }
+  } catch (error) {
+    console.warn('Distractor tables unavailable, falling back to scanning birds:', error);
+  }
+
+  return { regions, birds, hashIndex, distractors, shardManifest: null };
 }
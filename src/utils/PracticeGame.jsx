@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { Play, Pause, Volume2, RotateCcw, ArrowRight } from 'lucide-react';
 import { createAudioControls } from './AudioUtils';
+import { GAME_CONFIG } from './Constants';
 import {
   createInitialPracticeState,
   getPracticeBird,
@@ -9,7 +10,7 @@ import {
   startNewPracticeRound
 } from './PracticeGameLogic';
 
-export default function PracticeGame({ region, birds, regions, onBack }) {
+export default function PracticeGame({ region, birds, distractors, regions, onBack }) {
   const [practiceState, setPracticeState] = useState(null);
   const [isPlaying, setIsPlaying] = useState(false);
   const [audioError, setAudioError] = useState(false);
@@ -23,7 +24,7 @@ export default function PracticeGame({ region, birds, regions, onBack }) {
       const firstBird = getPracticeBird(region, birds, 0);
       
       if (firstBird) {
-        const answerOptions = generatePracticeAnswerOptions(region, birds, 0, firstBird);
+        const answerOptions = generatePracticeAnswerOptions(region, birds, 0, firstBird, GAME_CONFIG.ANSWER_OPTIONS_COUNT, distractors);
         
         setPracticeState({
           ...initialState,
@@ -32,7 +33,7 @@ export default function PracticeGame({ region, birds, regions, onBack }) {
         });
       }
     }
-  }, [region, birds]);
+  }, [region, birds, distractors]);
 
   // Reset audio index when bird changes
   useEffect(() => {
@@ -76,7 +77,7 @@ export default function PracticeGame({ region, birds, regions, onBack }) {
   const startNextRound = () => {
     if (!practiceState) return;
 
-    const newState = startNewPracticeRound(practiceState, birds);
+    const newState = startNewPracticeRound(practiceState, birds, distractors);
     setPracticeState(newState);
   };
 
@@ -87,7 +88,9 @@ export default function PracticeGame({ region, birds, regions, onBack }) {
       practiceState.region,
       birds,
       practiceState.practiceIndex,
-      practiceState.currentBird
+      practiceState.currentBird,
+      GAME_CONFIG.ANSWER_OPTIONS_COUNT,
+      distractors
     );
 
     setPracticeState({
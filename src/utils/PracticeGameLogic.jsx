@@ -1,4 +1,5 @@
 import { hashString } from './HashUtils';
+import { getSameFamilyBirds, getOtherFamilyBirds } from './DistractorUtils';
 import { GAME_CONFIG } from './Constants';
 
 /**
@@ -75,18 +76,15 @@ export const getPracticeBird = (region, birds, practiceIndex) => {
 /**
  * Generates answer options for practice mode
  */
-export const generatePracticeAnswerOptions = (region, birds, practiceIndex, correctBird, optionCount = 4) => {
+export const generatePracticeAnswerOptions = (region, birds, practiceIndex, correctBird, optionCount = 4, distractors = null) => {
   if (!birds[region] || !correctBird) return [];
   
   const regionBirds = birds[region];
   const seed = hashString(`practice-options-${region}-${practiceIndex}-${correctBird.id}`);
   const random = createSeededRandom(seed);
   
-  // Get birds that aren't the correct answer
-  const availableBirds = regionBirds.filter(bird => bird.id !== correctBird.id);
-  
   // First, try to get birds from the same family as the correct bird
-  const sameFamilyBirds = availableBirds.filter(bird => bird.family === correctBird.family);
+  const sameFamilyBirds = getSameFamilyBirds(regionBirds, correctBird, distractors);
   
   let selectedWrongBirds = [];
   
@@ -100,8 +98,8 @@ export const generatePracticeAnswerOptions = (region, birds, practiceIndex, corr
     const shuffledSameFamily = deterministicShuffle(sameFamilyBirds, seed);
     selectedWrongBirds = [...shuffledSameFamily];
     
-    // Get remaining birds (excluding same family birds and correct bird)
-    const remainingBirds = availableBirds.filter(bird => bird.family !== correctBird.family);
+    // Get remaining birds (similar species from other families, or every other-family bird without a table)
+    const remainingBirds = getOtherFamilyBirds(regionBirds, correctBird, distractors);
     const shuffledRemaining = deterministicShuffle(remainingBirds, seed);
     
     // Add birds from other families to reach the desired count
@@ -151,7 +149,7 @@ export const processPracticeGuess = (practiceState, guessedBirdId) => {
 /**
  * Starts a new practice round
  */
-export const startNewPracticeRound = (currentState, birds) => {
+export const startNewPracticeRound = (currentState, birds, distractors = null) => {
   const nextPracticeIndex = currentState.practiceIndex + 1;
   const nextBird = getPracticeBird(currentState.region, birds, nextPracticeIndex);
   
@@ -162,7 +160,8 @@ export const startNewPracticeRound = (currentState, birds) => {
     birds,
     nextPracticeIndex,
     nextBird,
-    GAME_CONFIG.ANSWER_OPTIONS_COUNT
+    GAME_CONFIG.ANSWER_OPTIONS_COUNT,
+    distractors
   );
 
   return {
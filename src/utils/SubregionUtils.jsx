@@ -1,4 +1,5 @@
 import { useState, useEffect } from 'react';
+import { loadDailyEntry } from './DailyBirdUtils';
 
 // Hook to fetch subregion data
 export const useSubregion = (selectedRegion, today) => {
@@ -8,13 +9,8 @@ export const useSubregion = (selectedRegion, today) => {
   useEffect(() => {
     const fetchSubregion = async () => {
       try {
-        const response = await fetch('/data/daily.json');
-        const data = await response.json();
-        
         // Find today's entry for the selected region
-        const todayEntry = data.find(entry => 
-          entry.date === today && entry.region === selectedRegion
-        );
+        const todayEntry = await loadDailyEntry(selectedRegion, today);
         
         if (todayEntry) {
           setSubregion(todayEntry.subregion);